@@ -1,5 +1,11 @@
-from config import api, db
-from routes import auth_bp, task_bp, user_bp, message_bp, comment_bp, checklist_bp, subtask_bp, attachment_bp
+from flask_migrate import upgrade
+
+from compression import compress_response
+from config import api, NOTIFICATION_DISPATCHER_ENABLED
+from notifications import start_notification_dispatcher
+from routes import auth_bp, task_bp, user_bp, message_bp, comment_bp, checklist_bp, subtask_bp, attachment_bp, \
+    search_bp, sync_bp, event_bp
+from utils import validate_page_args
 
 # attach the routes to the flask application
 api.register_blueprint(auth_bp, url_prefix="/auth_routes")
@@ -10,13 +16,26 @@ api.register_blueprint(comment_bp, url_prefix="/comment_routes")
 api.register_blueprint(checklist_bp, url_prefix="/checklist_routes")
 api.register_blueprint(subtask_bp, url_prefix="/subtask_routes")
 api.register_blueprint(attachment_bp, url_prefix="/attachment_routes")
+api.register_blueprint(search_bp, url_prefix="/search_routes")
+api.register_blueprint(sync_bp, url_prefix="/sync_routes")
+api.register_blueprint(event_bp, url_prefix="/event_routes")
+
+# reject the invalid limit and cursor of paginated routes with validation error
+api.before_request(validate_page_args)
+
+# compress the responses with the encoding the client accepts
+api.after_request(compress_response)
+
+# send the push notifications saved by the routes in background
+if NOTIFICATION_DISPATCHER_ENABLED:
+    start_notification_dispatcher()
 
 # entry point of flask application
 if __name__ == '__main__':
 
-    # create database
+    # create/upgrade database (same as running flask db upgrade)
     with api.app_context():
-        db.create_all()
+        upgrade()
 
     # run application
     api.run()
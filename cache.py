@@ -0,0 +1,106 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from cachetools import TTLCache
+
+from config import AUTH_CACHE_BACKEND, AUTH_CACHE_TTL, AUTH_CACHE_SIZE, AUTH_CACHE_PATH
+
+
+class MemoryIdentityCache:
+    """Keep the identities of users in the memory of this process, other processes keep their own copy so the
+    invalidations are only seen by this process (the others see them when the ttl ends)
+    """
+
+    def __init__(self, ttl: int, size: int):
+        """
+        :param ttl: seconds an identity is kept
+        :param size: maximum number of identities kept
+        """
+        self.identities: TTLCache = TTLCache(maxsize=size, ttl=ttl)
+        self.lock: threading.Lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Get a copy of the identity of user, None if not cached or expired"""
+        with self.lock:
+            identity: Optional[Dict[str, Any]] = self.identities.get(user_id)
+        return dict(identity) if identity else None
+
+    def set(self, user_id: int, identity: Dict[str, Any]) -> None:
+        """Cache the identity of user"""
+        with self.lock:
+            self.identities[user_id] = dict(identity)
+
+    def invalidate(self, user_id: int) -> None:
+        """Remove the identity of user, used when the user is changed or deleted"""
+        with self.lock:
+            self.identities.pop(user_id, None)
+
+
+class SQLiteIdentityCache:
+    """Keep the identities of users in a SQLite file shared by all processes of the host, so invalidations are seen
+    by every worker immediately
+    """
+
+    def __init__(self, ttl: int, size: int, path: str):
+        """
+        :param ttl: seconds an identity is kept
+        :param size: maximum number of identities kept
+        :param path: path of the SQLite file
+        """
+        self.ttl: int = ttl
+        self.size: int = size
+        self.path: str = path
+        # sqlite connections can not be shared between threads
+        self.local: threading.local = threading.local()
+
+        directory: str = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.connection() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS identity (user_id INTEGER PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+
+    def connection(self) -> sqlite3.Connection:
+        """Get the connection of the current thread"""
+        if not hasattr(self.local, "connection"):
+            self.local.connection = sqlite3.connect(self.path, timeout=5)
+        return self.local.connection
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Get the identity of user, None if not cached or expired"""
+        row = self.connection().execute(
+            "SELECT data FROM identity WHERE user_id = ? AND expires > ?", (user_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, user_id: int, identity: Dict[str, Any]) -> None:
+        """Cache the identity of user, the expired and the oldest identities are removed when the cache is full"""
+        now: float = time.time()
+        with self.connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO identity (user_id, data, expires) VALUES (?, ?, ?)",
+                (user_id, json.dumps(identity), now + self.ttl)
+            )
+            if connection.execute("SELECT COUNT(*) FROM identity").fetchone()[0] > self.size:
+                connection.execute("DELETE FROM identity WHERE expires <= ?", (now,))
+                connection.execute(
+                    "DELETE FROM identity WHERE user_id IN "
+                    "(SELECT user_id FROM identity ORDER BY expires LIMIT max((SELECT COUNT(*) FROM identity) - ?, 0))",
+                    (self.size,)
+                )
+
+    def invalidate(self, user_id: int) -> None:
+        """Remove the identity of user, used when the user is changed or deleted"""
+        with self.connection() as connection:
+            connection.execute("DELETE FROM identity WHERE user_id = ?", (user_id,))
+
+
+# the identities of authorized users, so the routes do not get the user from the database on every request
+identity_cache = SQLiteIdentityCache(AUTH_CACHE_TTL, AUTH_CACHE_SIZE, AUTH_CACHE_PATH) if AUTH_CACHE_BACKEND == "sqlite" \
+    else MemoryIdentityCache(AUTH_CACHE_TTL, AUTH_CACHE_SIZE)
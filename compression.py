@@ -0,0 +1,133 @@
+import gzip
+import time
+import zlib
+from typing import Dict, List, Optional, Iterator, Callable, Tuple
+
+import click
+from flask import request, Response
+
+from config import api, COMPRESSION_MIN_SIZE, COMPRESSION_STREAM_SIZE, COMPRESSION_LEVEL
+
+# brotli is optional, gzip is used if it is not installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# minimum size in bytes of each type of response to compress, other types are not compressed (images and attachments
+# are already compressed), json gains from smaller sizes than markup since its keys repeat in every item
+COMPRESSION_THRESHOLDS: Dict[str, int] = {
+    "application/json": COMPRESSION_MIN_SIZE,
+    "text/html": max(COMPRESSION_MIN_SIZE, 1024),
+    "text/plain": max(COMPRESSION_MIN_SIZE, 1024),
+    "text/css": max(COMPRESSION_MIN_SIZE, 1024),
+    "application/javascript": max(COMPRESSION_MIN_SIZE, 1024),
+    "image/svg+xml": max(COMPRESSION_MIN_SIZE, 1024)
+}
+# brotli quality used for responses, higher qualities are too slow for responses made on every request
+BROTLI_QUALITY: int = 4
+# bytes compressed at once when the response is streamed
+CHUNK_SIZE: int = 64 * 1024
+
+
+def get_encodings() -> List[str]:
+    """Get the encodings the server can use, from the most preferred"""
+    return ["br", "gzip"] if brotli else ["gzip"]
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress the data with the encoding
+
+    :param data: the response body
+    :param encoding: br or gzip
+    :return: the compressed body
+    """
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESSION_LEVEL)
+
+
+def create_compressor(encoding: str) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    """Create the compressor of streamed response
+
+    :param encoding: br or gzip
+    :return: the function that compresses the next chunk and the function that ends the compressed body
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        return compressor.process, compressor.finish
+    # wbits 31 = gzip header and trailer
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+def stream_compressed(data: bytes, encoding: str) -> Iterator[bytes]:
+    """Compress the large response in chunks, so the client receives the first bytes before the whole body is compressed
+
+    :param data: the response body
+    :param encoding: br or gzip
+    :return: the compressed chunks
+    """
+    compress_chunk, finish = create_compressor(encoding)
+    for idx in range(0, len(data), CHUNK_SIZE):
+        chunk: bytes = compress_chunk(data[idx:idx + CHUNK_SIZE])
+        if chunk:
+            yield chunk
+    yield finish()
+
+
+def compress_response(response: Response) -> Response:
+    """Compress the response with the encoding the client accepts (Accept-Encoding header), the small responses, the
+    files (attachments and images), the streams (event stream) and the types that are already compressed are sent as is
+
+    :param response: the response of route
+    :return: the compressed response
+    """
+    threshold: Optional[int] = COMPRESSION_THRESHOLDS.get(response.mimetype)
+    if threshold is None or response.direct_passthrough or response.is_streamed or request.method == "HEAD" \
+            or response.status_code < 200 or response.status_code in (204, 304) or "Content-Encoding" in response.headers:
+        return response
+
+    # the response depends on Accept-Encoding, caches should not send the compressed response to other clients
+    response.vary.add("Accept-Encoding")
+    encoding: Optional[str] = request.accept_encodings.best_match(get_encodings())
+    if not encoding or response.content_length is None or response.content_length < threshold:
+        return response
+
+    data: bytes = response.get_data()
+    if len(data) >= COMPRESSION_STREAM_SIZE:
+        # the length of compressed body is not known, it is sent in chunks
+        response.response = stream_compressed(data, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        response.set_data(compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+
+    # the compressed body is not the same bytes, the ETag is only equal to the uncompressed response
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+@api.cli.command("benchmark-compression")
+@click.option("--token", required=True, help="Authorization token of the user that requests the endpoints.")
+@click.option("--endpoints", default="/task_routes/get_tasks,/task_routes/get_created_tasks,"
+                                     "/user_routes/search_users?search_query=a,/message_routes/get_received_messages",
+              help="Comma separated endpoints (path and query) to measure.")
+@click.option("--repeat", default=20, help="Number of compressions of each response.")
+def benchmark_compression(token: str, endpoints: str, repeat: int) -> None:
+    """Report the size and the CPU time to compress the response of each endpoint with each encoding"""
+    client = api.test_client()
+    for endpoint in endpoints.split(","):
+        response = client.get(endpoint, headers={"Authorization": token, "Accept-Encoding": "identity"})
+        data: bytes = response.get_data()
+        click.echo(f"{endpoint} ({response.status_code}): {len(data)} bytes")
+
+        for encoding in get_encodings():
+            start: float = time.process_time()
+            for _ in range(repeat):
+                compressed: bytes = compress(data, encoding)
+            milliseconds: float = (time.process_time() - start) / repeat * 1000
+            click.echo(f"  {encoding}: {len(compressed)} bytes ({len(compressed) / max(len(data), 1):.0%}), "
+                       f"{milliseconds:.2f}ms CPU")
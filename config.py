@@ -6,6 +6,7 @@ import firebase_admin
 from firebase_admin.credentials import Certificate
 
 from flask import Flask
+from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 from firebase_admin import credentials
 
@@ -19,13 +20,72 @@ PASSWORD_REGEX = re.compile(os.getenv("PASSWORD_REGEX"))
 EMAIL_REGEX = re.compile(os.getenv("EMAIL_REGEX"))
 # pattern for matching name
 NAME_REGEX = re.compile(os.getenv("NAME_REGEX"))
-# salt used for hashing passwords
-SALT: bytes = os.getenv("SALT").encode("utf-8")
+# salt that was used for hashing all passwords, the passwords hashed with it get their own salt on log in
+SALT: Optional[bytes] = os.getenv("SALT").encode("utf-8") if os.getenv("SALT") else None
+# bcrypt cost of hashing passwords (2^rounds iterations), the passwords of other cost are rehashed on log in
+BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
 # google password for sending mails to user
 PASSWORD: Optional[str] = os.getenv("PASSWORD")
 
 ALLOWED_FILE_EXTENSIONS: Set[str] = {"7z", "aac", "accdb", "accft", "adx", "ai", "aiff", "aifc", "amr", "amv", "avi", "avif", "bmp", "blend", "cdf", "cdr", "cgm", "csv", "doc", "docx", "docm", "dot", "dotx", "dpx", "drc", "dtd", "dwf", "dwg", "dxf", "email", "emf", "eml", "emz", "eot", "esd", "exp", "f4v", "fbx", "flac", "flv", "fni", "fnx", "fodg", "fodp", "fods", "fodt", "gif", "gz", "hdi", "icl", "ico", "img", "info", "iso", "j2c", "jp2", "jpe", "jpeg", "jpg", "json", "jxl", "ldb", "lz", "m3u", "m3u8", "m4a", "m4p", "m4r", "m4v", "md", "mdf", "mdi", "mov", "mp2", "mp3", "mp4", "mpa", "mpc", "mpeg", "mpg", "mso", "mxf", "odb", "odf", "odg", "odp", "ods", "odt", "oga", "ogg", "ogv", "ogx", "ost", "otf", "otg", "otp", "ots", "ott", "pdf", "pgn", "png", "pptx", "ppsx", "ppt", "psd", "psdc", "pub", "rar", "rtf", "svg", "swf", "stc", "std", "sti", "stw", "sxc", "sxd", "sxg", "sxi", "sxm", "sxw", "tak", "tar", "taz", "tb2", "tbz", "tbz2", "tif", "tiff", "torrent", "ttc", "ttf", "url", "uxf", "wav", "webm", "wma", "wmdb", "wmf", "wmv", "wtx", "xls", "xlsb", "xlsm", "xlsx", "xmf", "xml", "xps", "zip"}
 ALLOWED_IMAGE_EXTENSIONS: Set[str] = {"png", "jpg", "jpeg", "gif", "bmp", "webp"}
+# image used for users that do not exist anymore
+DELETED_USER_IMAGE: str = "images/deleted_user.png"
+# maximum number of encoded avatars kept in memory
+AVATAR_CACHE_SIZE: int = int(os.getenv("AVATAR_CACHE_SIZE", "512"))
+# number of items returned per page when the client asks for pages without limit
+DEFAULT_PAGE_SIZE: int = int(os.getenv("DEFAULT_PAGE_SIZE", "20"))
+# maximum number of items the client can ask per page
+MAX_PAGE_SIZE: int = int(os.getenv("MAX_PAGE_SIZE", "100"))
+# 1 to return every task and message of the lists when the client does not ask for pages (old clients that do not read
+# X-Next-Cursor), 0 to return the first page
+UNPAGED_LISTS: bool = os.getenv("UNPAGED_LISTS", "0") == "1"
+# memory to keep the identities of authorized users in each process, sqlite to share them between the processes
+AUTH_CACHE_BACKEND: str = os.getenv("AUTH_CACHE_BACKEND", "memory")
+# seconds the identity of authorized user is kept
+AUTH_CACHE_TTL: int = int(os.getenv("AUTH_CACHE_TTL", "60"))
+# maximum number of identities of authorized users kept
+AUTH_CACHE_SIZE: int = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+# path of the SQLite file of the sqlite identity cache
+AUTH_CACHE_PATH: str = os.getenv("AUTH_CACHE_PATH", "instance/auth_cache.db")
+# number of threads that hash and check passwords with bcrypt
+PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# number of passwords that can wait for a thread, more requests are rejected until the threads are free
+PASSWORD_HASH_QUEUE: int = int(os.getenv("PASSWORD_HASH_QUEUE", "8"))
+# failed attempts per minute allowed for the same email from the same client address on log in and change password
+LOGIN_EMAIL_LIMIT: int = int(os.getenv("LOGIN_EMAIL_LIMIT", "5"))
+# failed attempts per hour allowed for the same email from every client address, limits the guessing of a password
+# from many addresses
+LOGIN_ACCOUNT_LIMIT: int = int(os.getenv("LOGIN_ACCOUNT_LIMIT", "20"))
+# attempts per minute allowed for the same client address on sign up, log in and change password
+LOGIN_IP_LIMIT: int = int(os.getenv("LOGIN_IP_LIMIT", "30"))
+# run the background job that sends the push notifications saved in the outbox
+NOTIFICATION_DISPATCHER_ENABLED: bool = os.getenv("NOTIFICATION_DISPATCHER_ENABLED", "1") == "1"
+# seconds between each sending of push notifications in the outbox
+NOTIFICATION_DISPATCH_INTERVAL: int = int(os.getenv("NOTIFICATION_DISPATCH_INTERVAL", "2"))
+# maximum number of push notifications sent each time
+NOTIFICATION_BATCH_SIZE: int = int(os.getenv("NOTIFICATION_BATCH_SIZE", "100"))
+# number of tries before the push notification is dropped
+NOTIFICATION_MAX_ATTEMPTS: int = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "5"))
+# seconds the changes of task are merged into one push notification (0 to send each change)
+NOTIFICATION_COALESCE_WINDOW: int = int(os.getenv("NOTIFICATION_COALESCE_WINDOW", "10"))
+# firebase to send push notifications with FCM, fake to only record them (testing without FCM)
+NOTIFICATION_TRANSPORT: str = os.getenv("NOTIFICATION_TRANSPORT", "firebase")
+# minimum size in bytes of json responses that are compressed (the other types have their own minimum)
+COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "512"))
+# size in bytes of responses that are compressed in chunks (streamed) instead of at once
+COMPRESSION_STREAM_SIZE: int = int(os.getenv("COMPRESSION_STREAM_SIZE", "1048576"))
+# gzip compression level, 1 (fastest) to 9 (smallest)
+COMPRESSION_LEVEL: int = int(os.getenv("COMPRESSION_LEVEL", "6"))
+# maximum number of changes read from the change log at once for each event stream
+EVENT_QUEUE_SIZE: int = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+# seconds between the heartbeats of idle event streams
+EVENT_HEARTBEAT: int = int(os.getenv("EVENT_HEARTBEAT", "15"))
+# seconds between the reads of change log by the poller of process, the streams get the changes committed by other
+# processes after it
+EVENT_POLL_INTERVAL: float = float(os.getenv("EVENT_POLL_INTERVAL", "2"))
+# days the changes are kept for the sync route, the clients with older cursors get every item again
+CHANGE_LOG_RETENTION_DAYS: int = int(os.getenv("CHANGE_LOG_RETENTION_DAYS", "30"))
 
 # initialize flask application
 api: Flask = Flask(__name__, template_folder="templates")
@@ -37,3 +97,5 @@ api.config['SECRET_KEY'] = os.getenv("SECRET_KEY")
 api.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024
 # integrate SQLAlchemy on flask
 db: SQLAlchemy = SQLAlchemy(api)
+# integrate database migrations (flask db upgrade) on flask
+migrate: Migrate = Migrate(api, db, render_as_batch=True)
@@ -5,8 +5,8 @@ from config import db
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    name = db.Column(db.String, nullable=False, default="Test")
-    email = db.Column(db.String, nullable=False, default="test@gmail.com")
+    name = db.Column(db.String, nullable=False, default="Test", index=True, unique=True)
+    email = db.Column(db.String, nullable=False, default="test@gmail.com", index=True, unique=True)
     password = db.Column(db.String, nullable=False, default="test123")
     image_path = db.Column(db.String, nullable=False, default="images")
     role = db.Column(db.String, nullable=False, default="NA")
@@ -21,10 +21,18 @@ class Task(db.Model):
     status = db.Column(db.String, nullable=False, default="OPEN")
     priority = db.Column(db.String, nullable=False, default="LOW")
     due = db.Column(db.DateTime, nullable=False, default=datetime.now())
-    date_sent = db.Column(db.DateTime, nullable=False, default=datetime.now())
+    date_sent = db.Column(db.DateTime, nullable=False, default=datetime.now)
     assignee = db.Column(db.String, nullable=False, default="")
-    creator_id = db.Column(db.Integer, nullable=False, default=0)
+    creator_id = db.Column(db.Integer, nullable=False, default=0, index=True)
     type = db.Column(db.String, nullable=False, default="TASK")
+    revision = db.Column(db.Integer, nullable=False, default=1)
+
+
+class TaskAssignee(db.Model):
+    task_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, primary_key=True)
+
+    __table_args__ = (db.Index("ix_task_assignee_user_id_task_id", "user_id", "task_id"),)
 
 
 class TaskComment(db.Model):
@@ -34,45 +42,61 @@ class TaskComment(db.Model):
     mentions_id = db.Column(db.String, nullable=False, default="")
     user_id = db.Column(db.Integer, nullable=False, default=0)
     task_id = db.Column(db.Integer, nullable=False, default=0)
-    date_sent = db.Column(db.DateTime, nullable=False, default=datetime.now())
+    date_sent = db.Column(db.DateTime, nullable=False, default=datetime.now)
     likes_id = db.Column(db.String, nullable=False, default="")
 
+    __table_args__ = (db.Index("ix_task_comment_task_id_date_sent", "task_id", "date_sent"),)
+
 
 class Subtask(db.Model):
     subtask_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    task_id = db.Column(db.Integer, nullable=False, default=0)
+    task_id = db.Column(db.Integer, nullable=False, default=0, index=True)
     description = db.Column(db.String, nullable=False, default="TestTaskDesc")
     status = db.Column(db.String, nullable=False, default="OPEN")
     priority = db.Column(db.String, nullable=False, default="LOW")
     due = db.Column(db.DateTime, nullable=False, default=datetime.now())
-    date_sent = db.Column(db.DateTime, nullable=False, default=datetime.now())
+    date_sent = db.Column(db.DateTime, nullable=False, default=datetime.now)
     assignee = db.Column(db.String, nullable=False, default="")
     creator_id = db.Column(db.Integer, nullable=False, default=0)
     type = db.Column(db.String, nullable=False, default="TASK")
 
 
+class SubtaskAssignee(db.Model):
+    subtask_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, primary_key=True)
+
+    __table_args__ = (db.Index("ix_subtask_assignee_user_id_subtask_id", "user_id", "subtask_id"),)
+
+
 class Checklist(db.Model):
     checklist_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    task_id = db.Column(db.Integer, nullable=False, default=0)
+    task_id = db.Column(db.Integer, nullable=False, default=0, index=True)
     user_id = db.Column(db.Integer, nullable=False, default=0)
     description = db.Column(db.String, nullable=False, default="TestTaskDesc")
     is_checked = db.Column(db.Boolean, nullable=False, default=False)
     assignee = db.Column(db.String, nullable=False, default="")
-    date_sent = db.Column(db.DateTime, nullable=False, default=datetime.now())
+    date_sent = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+
+class ChecklistAssignee(db.Model):
+    checklist_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, primary_key=True)
+
+    __table_args__ = (db.Index("ix_checklist_assignee_user_id_checklist_id", "user_id", "checklist_id"),)
 
 
 class Attachment(db.Model):
     attachment_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    task_id = db.Column(db.Integer, nullable=False, default=0)
+    task_id = db.Column(db.Integer, nullable=False, default=0, index=True)
     user_id = db.Column(db.Integer, nullable=False, default=0)
     attachment_path = db.Column(db.String, nullable=False, default="attachments")
     file_name = db.Column(db.String, nullable=False, default="file.docx")
-    date_sent = db.Column(db.DateTime, nullable=False, default=datetime.now())
+    date_sent = db.Column(db.DateTime, nullable=False, default=datetime.now)
 
 
 class Message(db.Model):
     message_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    date_sent = db.Column(db.DateTime, nullable=False, default=datetime.now())
+    date_sent = db.Column(db.DateTime, nullable=False, default=datetime.now)
     title = db.Column(db.String, nullable=False, default="TestMessage")
     description = db.Column(db.String, nullable=False, default="TestMessageDesc")
     sender_id = db.Column(db.Integer, nullable=False, default=0)
@@ -81,13 +105,52 @@ class Message(db.Model):
     file_names = db.Column(db.String, nullable=False, default="")
     deleted_from_sender = db.Column(db.Boolean, nullable=False, default=False)
     deleted_from_receiver = db.Column(db.Boolean, nullable=False, default=False)
+    revision = db.Column(db.Integer, nullable=False, default=1)
+
+    __table_args__ = (
+        db.Index("ix_message_sender_id_deleted_from_sender_date_sent", "sender_id", "deleted_from_sender", "date_sent"),
+        db.Index("ix_message_receiver_id_deleted_from_receiver_date_sent", "receiver_id", "deleted_from_receiver", "date_sent")
+    )
 
 
 class MessageReply(db.Model):
     message_reply_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    message_id = db.Column(db.Integer, nullable=False, default=0)
-    date_sent = db.Column(db.DateTime, nullable=False, default=datetime.now())
+    message_id = db.Column(db.Integer, nullable=False, default=0, index=True)
+    date_sent = db.Column(db.DateTime, nullable=False, default=datetime.now)
     description = db.Column(db.String, nullable=False, default="TestMessageDesc")
     from_id = db.Column(db.Integer, nullable=False, default=0)
     attachment_paths = db.Column(db.String, nullable=False, default="")
     file_names = db.Column(db.String, nullable=False, default="")
+
+
+class NotificationOutbox(db.Model):
+    notification_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, nullable=False, default=0)
+    title = db.Column(db.String, nullable=False, default="TestNotification")
+    body = db.Column(db.String, nullable=False, default="TestNotificationBody")
+    task_id = db.Column(db.Integer, nullable=False, default=0)
+    changes = db.Column(db.String, nullable=False, default="")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
+    claim_token = db.Column(db.String, nullable=False, default="")
+    last_error = db.Column(db.String, nullable=False, default="")
+    date_sent = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (db.Index("ix_notification_outbox_task_id_user_id", "task_id", "user_id"),)
+
+
+class ChangeLog(db.Model):
+    change_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, nullable=False, default=0)
+    type = db.Column(db.String, nullable=False, default="tasks")
+    item_id = db.Column(db.Integer, nullable=False, default=0)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
+    date_changed = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    # sqlite_autoincrement so the ids of removed changes are never used again and the cursors of clients stay valid
+    __table_args__ = (db.Index("ix_change_log_user_id_change_id", "user_id", "change_id"), {"sqlite_autoincrement": True})
+
+
+class Revision(db.Model):
+    name = db.Column(db.String, primary_key=True)
+    revision = db.Column(db.Integer, nullable=False, default=1)
@@ -0,0 +1,174 @@
+import json
+import threading
+import time
+from typing import Dict, Any, List, Set, Iterator, Callable, Tuple, Optional
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from config import api, db, EVENT_QUEUE_SIZE, EVENT_HEARTBEAT, EVENT_POLL_INTERVAL
+from db import ChangeLog
+
+
+class Subscription:
+    """One stream (connection) of user, the stream is woken up when the user has new changes and reads them from the
+    change log after the last change it sent, so the changes are never lost or sent twice even if the stream misses a
+    wake up
+    """
+
+    def __init__(self, user_id: int, change_id: int):
+        """
+        :param user_id: the user of stream
+        :param change_id: the id of last change the client has
+        """
+        self.user_id: int = user_id
+        self.change_id: int = change_id
+        self.changed: threading.Event = threading.Event()
+
+    def wake_up(self) -> None:
+        """Tell the stream that the user has new changes"""
+        self.changed.set()
+
+
+class EventHub:
+    """Wake up the streams of users in this process when their changes are committed, the changes committed by other
+    processes are found by one poller thread of the process that reads the change log for every stream
+    """
+
+    def __init__(self):
+        self.subscriptions: Dict[int, Set[Subscription]] = {}
+        self.lock: threading.Lock = threading.Lock()
+        self.poller: Optional[threading.Thread] = None
+
+    def subscribe(self, user_id: int, change_id: int) -> Subscription:
+        """Start receiving the changes of user
+
+        :param user_id: the user of stream
+        :param change_id: the id of last change the client has, the stream sends the changes after it
+        :return: the subscription of stream, should be removed with unsubscribe when the stream is closed
+        """
+        subscription: Subscription = Subscription(user_id, change_id)
+        with self.lock:
+            self.subscriptions.setdefault(user_id, set()).add(subscription)
+            # start polling the change log when the first stream of process is opened
+            if self.poller is None:
+                self.poller = threading.Thread(target=self.poll_changes, name="event-poller", daemon=True)
+                self.poller.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop receiving the changes of the closed stream"""
+        with self.lock:
+            subscriptions: Set[Subscription] = self.subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscriptions.pop(subscription.user_id, None)
+
+    def publish(self, user_id: int) -> None:
+        """Wake up every stream of user
+
+        :param user_id: the user that has new changes
+        """
+        with self.lock:
+            subscriptions: List[Subscription] = list(self.subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.wake_up()
+
+    def poll_changes(self) -> None:
+        """Read the users that have new changes in the change log every EVENT_POLL_INTERVAL and wake up their streams,
+        one query for every stream of this process instead of one for each stream (runs in the poller thread)
+        """
+        change_id: Optional[int] = None
+        while True:
+            time.sleep(EVENT_POLL_INTERVAL)
+            with self.lock:
+                subscriptions: List[Subscription] = [y for x in self.subscriptions.values() for y in x]
+            if not subscriptions:
+                # start again from the streams opened later
+                change_id = None
+                continue
+            if change_id is None:
+                # the streams already have the changes before their change id
+                change_id = min(x.change_id for x in subscriptions)
+
+            try:
+                with api.app_context():
+                    changes: List[Tuple[int, int]] = db.session.query(
+                        ChangeLog.user_id, func.max(ChangeLog.change_id)
+                    ).filter(ChangeLog.change_id > change_id).group_by(ChangeLog.user_id).all()
+            except Exception:
+                # the database is not available now, try again on the next poll
+                continue
+            for user_id, last_change_id in changes:
+                change_id = max(change_id, last_change_id)
+                self.publish(user_id)
+
+    def get_info(self) -> Dict[str, int]:
+        """Get the number of users and streams connected to this process"""
+        with self.lock:
+            return {"users": len(self.subscriptions), "streams": sum(len(x) for x in self.subscriptions.values())}
+
+
+# the streams connected to this process, they are woken up after the routes commit the changes of their users
+event_hub: EventHub = EventHub()
+
+
+def queue_events(user_ids: List[int]) -> None:
+    """Wake up the streams of users when the current transaction is committed, nothing is sent if it is rolled back
+
+    :param user_ids: the users that have new changes
+    """
+    db.session.info.setdefault("events", []).extend(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def publish_queued_events(session: Session) -> None:
+    """Wake up the streams of users changed by the committed transaction"""
+    for user_id in dict.fromkeys(session.info.pop("events", [])):
+        event_hub.publish(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def drop_queued_events(session: Session) -> None:
+    """Drop the events of the rolled back transaction"""
+    session.info.pop("events", None)
+
+
+def stream_events(user_id: int, change_id: int,
+                  read_events: Callable[[int, int, int], List[Tuple[int, Dict[str, Any]]]]) -> Iterator[str]:
+    """Send the changes of user as server-sent events until the client disconnects, the changes are read from the
+    change log when the stream is woken up (by the commit of this process or the poller of change log), the id of each
+    event is the sync cursor of change so the client can continue with the sync route after reconnecting
+
+    The stream is subscribed when the response starts and unsubscribed when it is closed, so a response that is never
+    sent does not leave its subscription behind
+
+    :param user_id: the user of stream
+    :param change_id: the id of last change the client has, the stream sends the changes after it
+    :param read_events: get the change id and event of the changes of user after the change id (user id, change id
+        and maximum number of changes)
+    :return: the server-sent events
+    """
+    subscription: Subscription = event_hub.subscribe(user_id, change_id)
+    try:
+        # wait 3 seconds before reconnecting
+        yield "retry: 3000\n\n"
+        while True:
+            subscription.changed.clear()
+            # the stream runs after the request ended, the change log is read in its own application context
+            with api.app_context():
+                changes: List[Tuple[int, Dict[str, Any]]] = read_events(
+                    subscription.user_id, subscription.change_id, EVENT_QUEUE_SIZE
+                )
+            for change_id, change in changes:
+                subscription.change_id = change_id
+                yield f"id: {change['cursor']}\nevent: change\ndata: {json.dumps(change)}\n\n"
+            # read the next changes at once if the client is behind
+            if len(changes) == EVENT_QUEUE_SIZE:
+                continue
+
+            while not subscription.changed.wait(timeout=EVENT_HEARTBEAT):
+                # comment line, keeps the connection open through proxies and finds the disconnected clients
+                yield ": heartbeat\n\n"
+    finally:
+        event_hub.unsubscribe(subscription)
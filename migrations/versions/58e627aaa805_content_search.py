@@ -0,0 +1,81 @@
+"""content search
+
+Revision ID: 58e627aaa805
+Revises: e4cd1b7de0fd
+Create Date: 2026-10-18 18:36:35.867685
+
+SQLite FTS5 indexes of the task titles and descriptions, subtask and comment
+descriptions, and message titles and descriptions, kept in sync by triggers
+(see the user search revision). Other databases have no content search.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '58e627aaa805'
+down_revision = 'e4cd1b7de0fd'
+branch_labels = None
+depends_on = None
+
+# full-text search table -> (content table, id column, indexed columns)
+SEARCH_TABLES = {
+    'task_search': ('task', 'task_id', ['title', 'description']),
+    'subtask_search': ('subtask', 'subtask_id', ['description']),
+    'comment_search': ('task_comment', 'comment_id', ['description']),
+    'message_search': ('message', 'message_id', ['title', 'description']),
+}
+
+
+def drop_search_triggers(search_table):
+    for event in ('insert', 'delete', 'update'):
+        op.execute(f'DROP TRIGGER IF EXISTS {search_table}_{event}')
+
+
+def create_search_triggers(search_table):
+    table, id_column, columns = SEARCH_TABLES[search_table]
+    names = ', '.join(columns)
+    new_values = ', '.join(f'new.{x}' for x in columns)
+    old_values = ', '.join(f'old.{x}' for x in columns)
+
+    drop_search_triggers(search_table)
+    op.execute(
+        f'CREATE TRIGGER {search_table}_insert AFTER INSERT ON {table} BEGIN '
+        f'INSERT INTO {search_table} (rowid, {names}) VALUES (new.{id_column}, {new_values}); '
+        'END'
+    )
+    op.execute(
+        f'CREATE TRIGGER {search_table}_delete AFTER DELETE ON {table} BEGIN '
+        f"INSERT INTO {search_table} ({search_table}, rowid, {names}) VALUES ('delete', old.{id_column}, {old_values}); "
+        'END'
+    )
+    op.execute(
+        f'CREATE TRIGGER {search_table}_update AFTER UPDATE OF {names} ON {table} BEGIN '
+        f"INSERT INTO {search_table} ({search_table}, rowid, {names}) VALUES ('delete', old.{id_column}, {old_values}); "
+        f'INSERT INTO {search_table} (rowid, {names}) VALUES (new.{id_column}, {new_values}); '
+        'END'
+    )
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for search_table, (table, id_column, columns) in SEARCH_TABLES.items():
+        op.execute(
+            f"CREATE VIRTUAL TABLE {search_table} USING fts5({', '.join(columns)}, "
+            f"content='{table}', content_rowid='{id_column}', tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        create_search_triggers(search_table)
+        # index the existing rows
+        op.execute(f"INSERT INTO {search_table} ({search_table}) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for search_table in SEARCH_TABLES:
+        drop_search_triggers(search_table)
+        op.execute(f'DROP TABLE IF EXISTS {search_table}')
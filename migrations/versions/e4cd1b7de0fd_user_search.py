@@ -0,0 +1,66 @@
+"""user search
+
+Revision ID: e4cd1b7de0fd
+Revises: e941aee88091
+Create Date: 2026-10-18 18:35:19.938453
+
+The user_search table is a SQLite FTS5 trigram index of the user names, kept
+in sync by triggers. Migrations that rebuild the user table in batch mode drop
+the triggers, so they should call create_user_search_triggers() again.
+Other databases search the names without the index.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4cd1b7de0fd'
+down_revision = 'e941aee88091'
+branch_labels = None
+depends_on = None
+
+
+def create_user_search_triggers():
+    op.execute('DROP TRIGGER IF EXISTS user_search_insert')
+    op.execute('DROP TRIGGER IF EXISTS user_search_delete')
+    op.execute('DROP TRIGGER IF EXISTS user_search_update')
+    op.execute(
+        'CREATE TRIGGER user_search_insert AFTER INSERT ON "user" BEGIN '
+        'INSERT INTO user_search (rowid, name) VALUES (new.id, new.name); '
+        'END'
+    )
+    op.execute(
+        'CREATE TRIGGER user_search_delete AFTER DELETE ON "user" BEGIN '
+        "INSERT INTO user_search (user_search, rowid, name) VALUES ('delete', old.id, old.name); "
+        'END'
+    )
+    op.execute(
+        'CREATE TRIGGER user_search_update AFTER UPDATE OF name ON "user" BEGIN '
+        "INSERT INTO user_search (user_search, rowid, name) VALUES ('delete', old.id, old.name); "
+        'INSERT INTO user_search (rowid, name) VALUES (new.id, new.name); '
+        'END'
+    )
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute(
+        'CREATE VIRTUAL TABLE user_search USING fts5('
+        "name, content='user', content_rowid='id', tokenize='trigram')"
+    )
+    create_user_search_triggers()
+    # index the existing users
+    op.execute("INSERT INTO user_search (user_search) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute('DROP TRIGGER IF EXISTS user_search_insert')
+    op.execute('DROP TRIGGER IF EXISTS user_search_delete')
+    op.execute('DROP TRIGGER IF EXISTS user_search_update')
+    op.execute('DROP TABLE IF EXISTS user_search')
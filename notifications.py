@@ -0,0 +1,216 @@
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple, Set, Iterable
+
+import click
+from firebase_admin import messaging
+from flask_apscheduler import APScheduler
+
+from config import api, db, NOTIFICATION_DISPATCH_INTERVAL, NOTIFICATION_BATCH_SIZE, NOTIFICATION_MAX_ATTEMPTS, \
+    NOTIFICATION_TRANSPORT
+from db import NotificationOutbox, User
+
+logger: logging.Logger = logging.getLogger(__name__)
+# scheduler that runs the notification dispatcher in background
+scheduler: APScheduler = APScheduler()
+# seconds a claimed notification is hidden from other workers while it is being sent
+CLAIM_SECONDS: int = 60
+# maximum seconds to wait before sending a failed notification again
+MAX_BACKOFF_SECONDS: int = 600
+# maximum number of devices FCM accepts in one multicast message
+MULTICAST_LIMIT: int = 500
+
+
+class FirebaseTransport:
+    """Send push notifications with Firebase Cloud Messaging"""
+
+    def send_multicast(self, data: Dict[str, str], tokens: List[str]) -> List[Optional[Exception]]:
+        """Send the same push notification to multiple devices with one request
+
+        :param data: the data of notification (title and body)
+        :param tokens: the push notifications tokens of devices, up to 500
+        :return: the error of each token, None if sent
+        """
+        response: messaging.BatchResponse = messaging.send_each_for_multicast(messaging.MulticastMessage(
+            data=data,
+            android=messaging.AndroidConfig(priority="high"),
+            tokens=tokens
+        ))
+        return [None if x.success else x.exception for x in response.responses]
+
+
+class FakeTransport:
+    """Record push notifications instead of sending them, used for testing and benchmarking without FCM"""
+
+    def __init__(self, latency: float = 0.0, unregistered_tokens: Iterable[str] = ()):
+        """
+        :param latency: seconds each request waits, to simulate the round-trip to FCM
+        :param unregistered_tokens: tokens that will fail as unregistered devices
+        """
+        self.latency: float = latency
+        self.unregistered_tokens: Set[str] = set(unregistered_tokens)
+        self.requests: List[Tuple[Dict[str, str], List[str]]] = []
+
+    def send_multicast(self, data: Dict[str, str], tokens: List[str]) -> List[Optional[Exception]]:
+        """Record the push notification, see FirebaseTransport.send_multicast"""
+        time.sleep(self.latency)
+        self.requests.append((data, tokens))
+        return [messaging.UnregisteredError("Unregistered token") if x in self.unregistered_tokens else None for x in tokens]
+
+
+# the transport used by the notification dispatcher
+transport = FakeTransport() if NOTIFICATION_TRANSPORT == "fake" else FirebaseTransport()
+
+
+def start_notification_dispatcher() -> None:
+    """Start the background job that sends the push notifications saved in the outbox"""
+    scheduler.init_app(api)
+    scheduler.add_job(
+        id="dispatch_notifications",
+        func=dispatch_notifications,
+        trigger="interval",
+        seconds=NOTIFICATION_DISPATCH_INTERVAL,
+        max_instances=1,
+        coalesce=True
+    )
+    scheduler.start()
+
+
+def dispatch_notifications() -> None:
+    """Send the pending push notifications in the outbox, failed notifications are tried again later with
+    exponential backoff and dropped after the maximum attempts
+    """
+    with api.app_context():
+        try:
+            deliver_notifications(claim_notifications())
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(f"Unable to dispatch notifications: {e}")
+
+
+def claim_notifications() -> List[NotificationOutbox]:
+    """Claim the pending notifications so other workers running the dispatcher do not send them too
+
+    :return: the claimed notifications
+    """
+    now: datetime = datetime.now()
+    claim_token: str = uuid.uuid4().hex
+    pending_ids = db.session.query(NotificationOutbox.notification_id).filter(
+        NotificationOutbox.next_attempt <= now
+    ).order_by(NotificationOutbox.next_attempt).limit(NOTIFICATION_BATCH_SIZE)
+
+    NotificationOutbox.query.filter(
+        NotificationOutbox.notification_id.in_(pending_ids.scalar_subquery()),
+        NotificationOutbox.next_attempt <= now
+    ).update({
+        "claim_token": claim_token,
+        "next_attempt": now + timedelta(seconds=CLAIM_SECONDS)
+    }, synchronize_session=False)
+    db.session.commit()
+
+    return NotificationOutbox.query.filter_by(claim_token=claim_token).all()
+
+
+def deliver_notifications(notifications: List[NotificationOutbox]) -> None:
+    """Send the notifications with one multicast request per notification content, sent notifications are removed
+    from the outbox and the tokens of unregistered devices are removed from the users
+
+    :param notifications: the claimed notifications
+    """
+    # get the push notifications tokens of all recipients in one query
+    users: Dict[int, User] = {
+        x.id: x for x in User.query.filter(User.id.in_({x.user_id for x in notifications})).all()
+    }
+
+    # group the devices of the same title and body, each device once even if it has more notifications of the same
+    # content (e.g. the users logged in on the same device)
+    recipients: Dict[Tuple[str, str], Dict[str, List[NotificationOutbox]]] = {}
+    for notification in notifications:
+        user: Optional[User] = users.get(notification.user_id)
+        # nobody to send, the user is deleted or have no device
+        if not user or not user.push_notifications_token:
+            db.session.delete(notification)
+            continue
+        recipients.setdefault((notification.title, notification.body), {}).setdefault(
+            user.push_notifications_token, []
+        ).append(notification)
+
+    unregistered_tokens: Set[str] = set()
+    for (title, body), devices in recipients.items():
+        errors: List[Optional[Exception]] = send_multicast({"title": title, "body": body}, list(devices))
+
+        for (token, token_notifications), error in zip(devices.items(), errors):
+            for notification in token_notifications:
+                if error is None:
+                    db.session.delete(notification)
+                elif isinstance(error, messaging.UnregisteredError):
+                    unregistered_tokens.add(token)
+                    db.session.delete(notification)
+                else:
+                    retry_notification(notification, error)
+
+    # the app was uninstalled or the token expired, stop sending to it
+    if unregistered_tokens:
+        User.query.filter(User.push_notifications_token.in_(unregistered_tokens)).update(
+            {"push_notifications_token": ""}, synchronize_session=False
+        )
+
+
+def send_multicast(data: Dict[str, str], tokens: List[str]) -> List[Optional[Exception]]:
+    """Send the push notification to the devices in batches of the FCM multicast limit
+
+    :param data: the data of notification (title and body)
+    :param tokens: the push notifications tokens of devices
+    :return: the error of each token, None if sent
+    """
+    errors: List[Optional[Exception]] = []
+    for idx in range(0, len(tokens), MULTICAST_LIMIT):
+        batch: List[str] = tokens[idx:idx + MULTICAST_LIMIT]
+        try:
+            errors.extend(transport.send_multicast(data, batch))
+        except Exception as e:
+            errors.extend([e] * len(batch))
+    return errors
+
+
+def retry_notification(notification: NotificationOutbox, error: Exception) -> None:
+    """Schedule the failed notification to be sent again, or drop it after the maximum attempts
+
+    :param notification: the failed notification
+    :param error: the reason it failed
+    """
+    notification.attempts += 1
+    notification.last_error = str(error)
+    if notification.attempts >= NOTIFICATION_MAX_ATTEMPTS:
+        logger.warning(f"Dropped notification {notification.notification_id} after {notification.attempts} attempts: {error}")
+        db.session.delete(notification)
+    else:
+        notification.next_attempt = datetime.now() + timedelta(seconds=min(2 ** notification.attempts, MAX_BACKOFF_SECONDS))
+
+
+@api.cli.command("benchmark-notifications")
+@click.option("--recipients", default=1000, help="Number of devices that receive the notification.")
+@click.option("--latency", default=0.02, help="Seconds of each simulated FCM request.")
+def benchmark_notifications(recipients: int, latency: float) -> None:
+    """Compare one FCM request per recipient with multicast batches, using the fake transport (no FCM calls)"""
+    global transport
+    previous_transport = transport
+    data: Dict[str, str] = {"title": "Benchmark", "body": "Benchmark notification"}
+    tokens: List[str] = [f"token-{x}" for x in range(recipients)]
+
+    try:
+        transport = FakeTransport(latency=latency)
+        start: float = time.perf_counter()
+        for token in tokens:
+            send_multicast(data, [token])
+        click.echo(f"one request per recipient: {len(transport.requests)} requests, {time.perf_counter() - start:.3f}s")
+
+        transport = FakeTransport(latency=latency)
+        start = time.perf_counter()
+        send_multicast(data, tokens)
+        click.echo(f"multicast batches: {len(transport.requests)} requests, {time.perf_counter() - start:.3f}s")
+    finally:
+        transport = previous_transport
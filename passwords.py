@@ -0,0 +1,132 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Any, Tuple, List
+
+import bcrypt
+import click
+from flask import jsonify, Response
+
+from config import api, db, SALT, BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE
+from db import User
+
+logger: logging.Logger = logging.getLogger(__name__)
+# threads that run bcrypt, so a burst of logins can only use this number of cores
+password_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+# slots of the running and waiting passwords, the request is rejected when there is no free slot
+password_slots: threading.BoundedSemaphore = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE)
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when there are too many passwords waiting to be hashed or checked"""
+
+
+def run_bcrypt(function: Callable[..., Any], *args: Any) -> Any:
+    """Run the bcrypt function on the password threads and wait for the result, the threads limit the CPU used by
+    bcrypt and the slots reject the passwords that would wait too long, but the calling request thread is still
+    blocked until the result is ready
+
+    :param function: the bcrypt function
+    :param args: the arguments of function
+    :return: the result of function
+    :raise PasswordHashingBusy: if all threads are running and the queue is full
+    """
+    if not password_slots.acquire(blocking=False):
+        raise PasswordHashingBusy("Too many passwords are being processed")
+
+    try:
+        future: Future = password_executor.submit(function, *args)
+    except Exception:
+        password_slots.release()
+        raise
+    future.add_done_callback(lambda _: password_slots.release())
+    return future.result()
+
+
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    """Hash the password with bcrypt using a new salt
+
+    :param password: the password of user
+    :param rounds: the bcrypt cost
+    :return: the hashed password to save in database, it contains the salt and cost
+    """
+    return run_bcrypt(bcrypt.hashpw, password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+
+
+def check_password(password: str, hashed_password: str) -> bool:
+    """Check if the password matches the hashed password with bcrypt
+
+    :param password: the password from request
+    :param hashed_password: the hashed password from database
+    :return: if the password matches
+    """
+    return run_bcrypt(bcrypt.checkpw, password.encode(), hashed_password.encode())
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Check if the hashed password should be hashed again, when its cost is not the configured cost or it was
+    hashed with the old global salt
+
+    :param hashed_password: the hashed password from database ($2b$<cost>$<salt><hash>)
+    :return: if the password should be hashed again
+    """
+    if SALT and hashed_password.encode().startswith(SALT):
+        return True
+    return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+
+
+def rehash_password_later(user_id: int, password: str, hashed_password: str) -> None:
+    """Hash the password again with the configured cost on a free password thread without waiting for it, nothing is
+    done if there is no free slot (the password is rehashed on a later log in)
+
+    :param user_id: the user that logged in
+    :param password: the password from request
+    :param hashed_password: the current hashed password of user
+    """
+    if not password_slots.acquire(blocking=False):
+        return
+
+    try:
+        future: Future = password_executor.submit(rehash_password, user_id, password, hashed_password)
+    except Exception:
+        password_slots.release()
+        return
+    future.add_done_callback(lambda _: password_slots.release())
+
+
+def rehash_password(user_id: int, password: str, hashed_password: str) -> None:
+    """Hash the password and save it if the password of user was not changed meanwhile, runs on a password thread"""
+    new_password: str = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
+    with api.app_context():
+        try:
+            User.query.filter_by(id=user_id, password=hashed_password).update(
+                {"password": new_password}, synchronize_session=False
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(f"Unable to rehash the password of user {user_id}: {e}")
+
+
+def busy_response() -> Tuple[Response, int]:
+    """Response when the passwords can not be processed now, the client should try again after a second"""
+    response: Response = jsonify({"error": "Server is busy, try again later"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
+@api.cli.command("benchmark-login")
+@click.option("--rounds", default="10,11,12,13", help="Comma separated bcrypt costs to measure.")
+@click.option("--logins", default=20, help="Number of password checks for each cost.")
+def benchmark_login(rounds: str, logins: int) -> None:
+    """Report the password checks per second of each bcrypt cost using the password threads"""
+    click.echo(f"password threads: {PASSWORD_HASH_WORKERS}")
+    for cost in [int(x) for x in rounds.split(",")]:
+        hashed_password: str = hash_password("benchmark password", cost)
+        start: float = time.perf_counter()
+        futures: List[Future] = [password_executor.submit(bcrypt.checkpw, b"benchmark password", hashed_password.encode()) for _ in range(logins)]
+        for future in futures:
+            future.result()
+        seconds: float = time.perf_counter() - start
+        click.echo(f"cost {cost}: {logins / seconds:.1f} logins/s, {seconds / logins * 1000:.1f}ms per login")
@@ -6,3 +6,6 @@ from .comment_routes import comment_bp
 from .checklist_routes import checklist_bp
 from .subtask_routes import subtask_bp
 from .attachment_routes import attachment_bp
+from .search_routes import search_bp
+from .sync_routes import sync_bp
+from .event_routes import event_bp
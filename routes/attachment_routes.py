@@ -1,5 +1,5 @@
 import os
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Tuple, List, Optional
 
 from flask import Blueprint, request, jsonify, send_from_directory, Response
 from werkzeug.datastructures import FileStorage
@@ -7,7 +7,8 @@ from werkzeug.datastructures import FileStorage
 from config import ALLOWED_FILE_EXTENSIONS, db
 from db import Attachment, Task
 from routes.auth_wrapper import auth_required
-from utils import allowed_file, map_attachments, filename_secure, send_notification_to_assignees, string_to_int_list
+from utils import allowed_file, map_attachments, filename_secure, send_notification_to_assignees, string_to_int_list, \
+    query_task_section, preload_users, page_response, mark_task_changed, jsonify_with_users, InvalidQueryArgs
 
 attachment_bp = Blueprint("attachment_routes", __name__)
 
@@ -41,12 +42,14 @@ def upload_attachment(current_user: Dict[str, Any]) -> Tuple[Response, int]:
             send_notification_to_assignees(
                 "Attachment",
                 current_user["name"] + " sent attachment.",
-                [*string_to_int_list(task.assignee), task.creator_id]
+                [*string_to_int_list(task.assignee), task.creator_id],
+                current_user["id"]
             )
+            mark_task_changed("attachments", new_attachment, task_id)
             # commit/apply the added attachment
             db.session.commit()
             # return the created attachment as response
-            return jsonify(map_attachments(new_attachment)), 201
+            return jsonify_with_users(map_attachments(new_attachment)), 201
         except Exception as e:
             db.session.rollback()
             return jsonify({"error": f"Unhandled exception: {e}"}), 500
@@ -80,6 +83,8 @@ def delete_attachment(current_user: Dict[str, Any]) -> Tuple[Response, int]:
             if os.path.exists(attachment_to_delete.attachment_path):
                 os.remove(attachment_to_delete.attachment_path)
 
+            mark_task_changed("attachments", attachment_to_delete, attachment_to_delete.task_id, deleted=True)
+
             # commit/apply the deletion
             db.session.commit()
             # return message
@@ -89,3 +94,21 @@ def delete_attachment(current_user: Dict[str, Any]) -> Tuple[Response, int]:
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Unhandled exception: {e}"}), 500
+
+
+@attachment_bp.route("/get_attachments", methods=["GET"])
+@auth_required
+def get_attachments(_: Dict[str, Any]) -> Tuple[Response, int]:
+    try:
+        task_id: int = int(request.args.get("task_id"))
+        # get the attachments of task, in pages if the client asks (limit and cursor query parameters)
+        attachments: List[Attachment]
+        next_cursor: Optional[str]
+        attachments, next_cursor = query_task_section("attachments", task_id)
+        # get all the users of attachments in one query
+        preload_users([x.user_id for x in attachments])
+        return page_response([map_attachments(x) for x in attachments], next_cursor), 200
+    except InvalidQueryArgs as e:
+        return jsonify({"type": "Validation Error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Unhandled exception: {e}"}), 500
@@ -5,20 +5,19 @@ import string
 from datetime import datetime, timedelta
 import random
 from email.mime.text import MIMEText
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Optional
 
-import bcrypt
 import jwt
-from PIL import Image
-from PIL import ImageDraw
-from PIL import ImageFont
-from PIL.ImageFont import FreeTypeFont
 from flask import Blueprint, request, jsonify, Response
+from sqlalchemy.exc import IntegrityError
 from werkzeug.utils import secure_filename
 
-from config import db, api, SALT, PASSWORD
+from config import db, api, PASSWORD
 from db import User
-from utils import validate_signup, validate_login, get_response_image, validate_forgot_password
+from passwords import hash_password, PasswordHashingBusy, busy_response
+from throttle import throttle, throttle_failure
+from utils import validate_signup, validate_login, get_response_image, validate_forgot_password, \
+    create_letter_avatar, save_response_image, invalidate_response_image, user_exists
 
 auth_bp = Blueprint("auth_routes", __name__)
 
@@ -28,35 +27,42 @@ def sign_up() -> Tuple[Response, int]:
     try:
         # get the request body
         data: Dict[str, Any] = request.get_json()
+        # limit the sign ups of the same client
+        throttled: Optional[Tuple[Response, int]] = throttle()
+        if throttled:
+            return throttled
         # validate the data on request body
         validation: Dict[str, Any] = validate_signup(data["name"], data["email"], data["password"], data["confirmPassword"])
 
         # check if request is valid
         if validation["isValid"]:
-            # create font
-            font: FreeTypeFont = ImageFont.truetype("fonts/RobotoSlab-Black.ttf", 150)
-            # create 200x200 image with random background color
-            img: Image = Image.new("RGBA", (200, 200), (int(random.random() * 100) + 100, int(random.random() * 100) + 100, int(random.random() * 100) + 100))
-            draw: ImageDraw = ImageDraw.Draw(img)
-            # draw text to image at center with the first letter of username in uppercase
-            draw.text((100, 100), data["name"][0].upper(), fill=(0, 0, 0), font=font, anchor="mm")
+            # hash the password before creating the image, so no image is left when the server is busy
+            password: str = hash_password(data["password"])
             # create file name
-            filename: str = secure_filename(datetime.now().strftime('%d_%m_%Y_%H_%M_%S') + ".png")
-            # save image as the default user image
-            img.save(os.path.join("images", filename))
+            filename: str = secure_filename(datetime.now().strftime('%d_%m_%Y_%H_%M_%S_%f') + ".png")
+            # save the letter avatar with the first letter of username as the default user image
+            image: str = save_response_image(os.path.join("images", filename), create_letter_avatar(data["name"]))
 
             # create user with the path of image and valid request data
             user: User = User(
                 name=data["name"],
                 email=data["email"],
-                password=bcrypt.hashpw(data["password"].encode(), SALT).decode(),
+                password=password,
                 image_path="images/" + filename,
                 push_notifications_token=data["notificationToken"]
             )
             # add the user in database
             db.session.add(user)
-            # commit/apply the added user
-            db.session.commit()
+            try:
+                # commit/apply the added user
+                db.session.commit()
+            except IntegrityError:
+                # other user signed up with the same name or email after it was validated
+                db.session.rollback()
+                invalidate_response_image(user.image_path)
+                os.remove(user.image_path)
+                message: str = "Username already exist" if user_exists(User.name == data["name"]) else "Email already exist"
+                return jsonify({"type": "Validation Error", "message": message}), 400
 
             # create authorization token that will expire in 7 days
             token: str = jwt.encode({"user_id": user.id, "exp": datetime.now() + timedelta(days=7)}, api.config['SECRET_KEY'], algorithm='HS256')
@@ -68,11 +74,14 @@ def sign_up() -> Tuple[Response, int]:
                 "name": user.name,
                 "email": user.email,
                 "password": data["password"],
-                "image": get_response_image(user.image_path)
+                "image": image
             }
             return jsonify(response), 201
         else:
             return jsonify({"type": "Validation Error", "message": validation["message"]}), 400
+    except PasswordHashingBusy:
+        db.session.rollback()
+        return busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Unhandled exception: {e}"}), 500
@@ -83,6 +92,10 @@ def login() -> Tuple[Response, int]:
     try:
         # get the request body
         data: Dict[str, Any] = request.get_json()
+        # limit the attempts of the client and the failed attempts of the same email and client
+        throttled: Optional[Tuple[Response, int]] = throttle(data["email"])
+        if throttled:
+            return throttled
         # get the user that wants to log in
         user: User = User.query.filter_by(email=data["email"]).first()
         # validate log in
@@ -108,7 +121,12 @@ def login() -> Tuple[Response, int]:
             }
             return jsonify(response), 201
         else:
+            # only the failed attempts are limited for the email
+            throttle_failure(data["email"])
             return jsonify({"type": "Validation Error", "message": validation["message"]}), 400
+    except PasswordHashingBusy:
+        db.session.rollback()
+        return busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Unhandled exception: {e}"}), 500
@@ -153,6 +171,10 @@ def change_password() -> Tuple[Response, int]:
     try:
         # get the request body
         data: Dict[str, Any] = request.get_json()
+        # limit the attempts of the client and the failed attempts to guess the code of the same email and client
+        throttled: Optional[Tuple[Response, int]] = throttle(data["email"])
+        if throttled:
+            return throttled
         # get the user that will change the password
         user: User = User.query.filter_by(email=data["email"]).first()
         # validate the request data
@@ -160,12 +182,17 @@ def change_password() -> Tuple[Response, int]:
 
         # check if request is valid
         if validation["isValid"]:
-            user.password = bcrypt.hashpw(data["password"].encode(), SALT).decode()
+            user.password = hash_password(data["password"])
             user.forgot_password_code = ""
             db.session.commit()
             return jsonify({"message": "Success"}), 201
         else:
+            # only the failed attempts are limited for the email
+            throttle_failure(data["email"])
             return jsonify({"type": "Validation Error", "message": validation["message"]}), 400
+    except PasswordHashingBusy:
+        db.session.rollback()
+        return busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Unhandled exception: {e}"}), 500
@@ -4,6 +4,7 @@ from typing import Dict, Any, Tuple, Optional
 import jwt
 from flask import request, jsonify, Response
 
+from cache import identity_cache
 from config import api
 from db import User
 
@@ -22,19 +23,23 @@ def auth_required(f):
         try:
             # get the data from the token (decode it)
             data: Dict[str, Any] = jwt.decode(token, api.config['SECRET_KEY'], algorithms=['HS256'])
-            # get the user using the data of decoded token
-            user: Optional[User] = User.query.filter_by(id=data["user_id"]).first()
-
-            # check if user not exist
-            if not user:
-                return jsonify({"error": "User not found"}), 401
-
             # the user information that can be used for the routes that have authorization
-            current_user: Dict[str, Any] = {
-                "id": user.id,
-                "name": user.name,
-                "email": user.email
-            }
+            current_user: Optional[Dict[str, Any]] = identity_cache.get(data["user_id"])
+
+            if not current_user:
+                # get the user using the data of decoded token
+                user: Optional[User] = User.query.filter_by(id=data["user_id"]).first()
+
+                # check if user not exist
+                if not user:
+                    return jsonify({"error": "User not found"}), 401
+
+                current_user = {
+                    "id": user.id,
+                    "name": user.name,
+                    "email": user.email
+                }
+                identity_cache.set(user.id, current_user)
         except Exception as e:
             return jsonify({"error": f"Invalid token! {e}"}), 401
 
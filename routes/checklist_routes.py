@@ -1,12 +1,13 @@
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, List, Optional
 
 from flask import Blueprint, request, jsonify, Response
 
 from config import db
-from db import Task, Checklist
+from db import Task, Checklist, ChecklistAssignee
 from routes.auth_wrapper import auth_required
-from utils import validate_checklist, int_list_to_string, map_checklists, string_to_int_list, \
-    send_notification_to_assignees
+from utils import validate_checklist, map_checklists, string_to_int_list, send_notification_to_assignees, \
+    set_assignees, query_task_section, preload_users, page_response, checklist_user_ids, mark_task_changed, \
+    jsonify_with_users, get_assignee_ids, InvalidQueryArgs
 
 checklist_bp = Blueprint("checklist_routes", __name__)
 
@@ -20,7 +21,7 @@ def add_checklist(current_user: Dict[str, Any]) -> Tuple[Response, int]:
         # get the task the checklist belong (used for checking the current user create checklist if he/she is assignee or creator of task)
         task: Task = Task.query.filter_by(task_id=data["taskId"]).first()
         # validate the checklist and the user create it
-        validation: Dict[str, Any] = validate_checklist(data["description"], data["assignee"], current_user["id"], task.creator_id, task.assignee)
+        validation: Dict[str, Any] = validate_checklist(data["description"], data["assignee"], current_user["id"], task.creator_id, get_assignee_ids(task))
 
         # check if checklist is valid
         if validation["isValid"]:
@@ -28,23 +29,26 @@ def add_checklist(current_user: Dict[str, Any]) -> Tuple[Response, int]:
             new_checklist: Checklist = Checklist(
                 task_id=data["taskId"],
                 user_id=current_user["id"],
-                description=data["description"],
-                assignee=int_list_to_string(data["assignee"])
+                description=data["description"]
             )
             # add the checklist to database
             db.session.add(new_checklist)
+            set_assignees(new_checklist, data["assignee"])
 
             # send push notifications to the assignees of checklist
             send_notification_to_assignees(
                 "New Checklist Created",
                 current_user["name"] + " created new checklist.",
-                data["assignee"]
+                data["assignee"],
+                current_user["id"]
             )
 
+            mark_task_changed("checklists", new_checklist, new_checklist.task_id)
+
             # commit/apply the creation of checklist
             db.session.commit()
             # return the created checklist as response
-            return jsonify(map_checklists(new_checklist)), 201
+            return jsonify_with_users(map_checklists(new_checklist)), 201
         else:
             return jsonify({"type": "Validation Error", "message": validation["message"]}), 400
     except Exception as e:
@@ -62,15 +66,18 @@ def toggle_checklist(current_user: Dict[str, Any]) -> Tuple[Response, int]:
         checklist_to_toggle: Checklist = Checklist.query.filter_by(checklist_id=data["checklistId"]).first()
 
         # check if the user toggle checklist is an assignee of checklist
-        if current_user["id"] in string_to_int_list(checklist_to_toggle.assignee):
+        assignees: List[int] = get_assignee_ids(checklist_to_toggle)
+        if current_user["id"] in assignees:
             # check/uncheck the checklist
             checklist_to_toggle.is_checked = data["check"]
             # send push notifications to the checklist assignees
             send_notification_to_assignees(
                 "Checklist " + ("Checked" if data["check"] else "Unchecked"),
                 current_user["name"] + " " + ("checked" if data["check"] else "unchecked") + " checklist.",
-                string_to_int_list(checklist_to_toggle.assignee)
+                assignees,
+                current_user["id"]
             )
+            mark_task_changed("checklists", checklist_to_toggle, checklist_to_toggle.task_id)
             # commit/apply the toggled checklist
             db.session.commit()
             # return message
@@ -93,13 +100,17 @@ def delete_checklist(current_user: Dict[str, Any]) -> Tuple[Response, int]:
         if current_user["id"] == checklist_to_delete.user_id:
             # delete the checklist
             db.session.delete(checklist_to_delete)
+            db.session.query(ChecklistAssignee).filter_by(checklist_id=checklist_to_delete.checklist_id).delete()
             # send push notifications to the assignees of checklist that the checklist is deleted
             send_notification_to_assignees(
                 "Checklist Deleted",
                 current_user["name"] + " deleted checklist.",
-                string_to_int_list(checklist_to_delete.assignee)
+                string_to_int_list(checklist_to_delete.assignee),
+                current_user["id"]
             )
 
+            mark_task_changed("checklists", checklist_to_delete, checklist_to_delete.task_id, deleted=True)
+
             # commit/apply the deleted checklist
             db.session.commit()
             # return message
@@ -109,3 +120,21 @@ def delete_checklist(current_user: Dict[str, Any]) -> Tuple[Response, int]:
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Unhandled exception: {e}"}), 500
+
+
+@checklist_bp.route("/get_checklists", methods=["GET"])
+@auth_required
+def get_checklists(_: Dict[str, Any]) -> Tuple[Response, int]:
+    try:
+        task_id: int = int(request.args.get("task_id"))
+        # get the checklists of task, in pages if the client asks (limit and cursor query parameters)
+        checklists: List[Checklist]
+        next_cursor: Optional[str]
+        checklists, next_cursor = query_task_section("checklists", task_id)
+        # get all the users of checklists in one query
+        preload_users([y for x in checklists for y in checklist_user_ids(x)])
+        return page_response([map_checklists(x) for x in checklists], next_cursor), 200
+    except InvalidQueryArgs as e:
+        return jsonify({"type": "Validation Error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Unhandled exception: {e}"}), 500
@@ -1,4 +1,4 @@
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Tuple, List, Optional
 
 from flask import Blueprint, request, jsonify, Response
 
@@ -6,7 +6,8 @@ from config import db
 from db import TaskComment, Task
 from routes.auth_wrapper import auth_required
 from utils import validate_comment, int_list_to_string, map_comments, string_to_int_list, \
-    remove_item_from_stringed_list, add_item_from_stringed_list, send_notification_to_assignees
+    remove_item_from_stringed_list, add_item_from_stringed_list, send_notification_to_assignees, query_task_section, \
+    preload_users, page_response, comment_user_ids, mark_task_changed, jsonify_with_users, InvalidQueryArgs
 
 comment_bp = Blueprint("comment_routes", __name__)
 
@@ -39,13 +40,16 @@ def add_comment_to_task(current_user: Dict[str, Any]) -> Tuple[Response, int]:
             send_notification_to_assignees(
                 "Sent Comment",
                 current_user["name"] + " have sent comment to task.",
-                [*string_to_int_list(task.assignee), task.creator_id]
+                [*string_to_int_list(task.assignee), task.creator_id],
+                current_user["id"]
             )
 
+            mark_task_changed("comments", new_comment, new_comment.task_id)
+
             # commit/apply the sent comment
             db.session.commit()
             # return the created comment as response
-            return jsonify(map_comments(new_comment)), 201
+            return jsonify_with_users(map_comments(new_comment)), 201
         else:
             return jsonify({"type": "Validation Error", "message": validation["message"]}), 400
     except Exception as e:
@@ -70,6 +74,8 @@ def like_comment(current_user: Dict[str, Any]) -> Tuple[Response, int]:
             # if no like it
             comment_to_like.likes_id = add_item_from_stringed_list(comment_to_like.likes_id, current_user["id"])
 
+        mark_task_changed("comments", comment_to_like, comment_to_like.task_id)
+
         # commit/apply the liked comment
         db.session.commit()
         # return message
@@ -90,6 +96,7 @@ def delete_comment(current_user: Dict[str, Any]) -> Tuple[Response, int]:
         if current_user["id"] == comment_to_delete.user_id:
             # delete the comment
             db.session.delete(comment_to_delete)
+            mark_task_changed("comments", comment_to_delete, comment_to_delete.task_id, deleted=True)
             # commit/apply the deleted comment
             db.session.commit()
             # return message
@@ -99,3 +106,21 @@ def delete_comment(current_user: Dict[str, Any]) -> Tuple[Response, int]:
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Unhandled exception: {e}"}), 500
+
+
+@comment_bp.route("/get_comments", methods=["GET"])
+@auth_required
+def get_comments(_: Dict[str, Any]) -> Tuple[Response, int]:
+    try:
+        task_id: int = int(request.args.get("task_id"))
+        # get the comments of task, in pages if the client asks (limit and cursor query parameters)
+        comments: List[TaskComment]
+        next_cursor: Optional[str]
+        comments, next_cursor = query_task_section("comments", task_id)
+        # get all the users of comments in one query
+        preload_users([y for x in comments for y in comment_user_ids(x)])
+        return page_response([map_comments(x) for x in comments], next_cursor), 200
+    except InvalidQueryArgs as e:
+        return jsonify({"type": "Validation Error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Unhandled exception: {e}"}), 500
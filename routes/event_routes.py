@@ -0,0 +1,32 @@
+from typing import Dict, Any, Tuple, Iterator
+
+from flask import Blueprint, jsonify, Response, request
+
+from events import stream_events
+from routes.auth_wrapper import auth_required
+from utils import decode_cursor, get_latest_cursor, read_change_events
+
+event_bp = Blueprint("event_routes", __name__)
+
+
+@event_bp.route("/stream", methods=["GET"])
+@auth_required
+def stream(current_user: Dict[str, Any]) -> Tuple[Response, int]:
+    try:
+        # the reconnecting client continues after its last event (Last-Event-ID header is the sync cursor of change),
+        # the new stream sends the changes after it is opened
+        try:
+            change_id: int = int(decode_cursor(request.headers["Last-Event-ID"])[0]) \
+                if request.headers.get("Last-Event-ID") else get_latest_cursor()
+        except (ValueError, LookupError, TypeError):
+            return jsonify({"type": "Validation Error", "message": "Invalid Last-Event-ID"}), 400
+
+        # receive the changes of user (tasks, their sections and messages) while the connection is open
+        events: Iterator[str] = stream_events(current_user["id"], change_id, read_change_events)
+        return Response(events, mimetype="text/event-stream", headers={
+            "Cache-Control": "no-cache",
+            # do not buffer the events in proxies
+            "X-Accel-Buffering": "no"
+        }), 200
+    except Exception as e:
+        return jsonify({"error": f"Unhandled exception: {e}"}), 500
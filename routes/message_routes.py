@@ -3,15 +3,15 @@ import os
 from typing import Any, Dict, List, Optional, Tuple
 
 from flask import Blueprint, request, jsonify, Response
-from sqlalchemy import desc
 from werkzeug.datastructures import FileStorage
 
-from config import db
+from config import db, UNPAGED_LISTS
 from db import Message, MessageReply
 from routes.auth_wrapper import auth_required
 from utils import validate_message, list_to_string, map_replies, map_sent_messages, \
     map_received_messages, date_to_string, map_user, string_to_list, filename_secure, validate_reply, \
-    send_notification_to_assignees
+    send_notification_to_assignees, preload_users, paginate, page_response, touch_message, make_etag, not_modified, \
+    with_etag, get_users_revision, record_change, jsonify_with_users, InvalidQueryArgs
 
 message_bp = Blueprint("message_routes", __name__)
 
@@ -53,18 +53,21 @@ def message_user(current_user: Dict[str, Any]) -> Tuple[Response, int]:
             )
             # add the message in database
             db.session.add(new_message)
+            # add the message to the change log of sender and receiver, the clients get it with sync
+            record_change("messages", new_message, [new_message.sender_id, new_message.receiver_id])
 
             # send push notifications to the recipient
             send_notification_to_assignees(
                 "New Message",
                 current_user["name"] + " send you a message.",
-                [data["receiverId"]]
+                [data["receiverId"]],
+                current_user["id"]
             )
 
             # commit/apply the added message
             db.session.commit()
             # return the created message as response
-            return jsonify(map_sent_messages(new_message)), 201
+            return jsonify_with_users(map_sent_messages(new_message)), 201
         else:
             return jsonify({"type": "Validation Error", "message": validation["message"]}), 400
     except Exception as e:
@@ -111,14 +114,20 @@ def reply_to_message(current_user: Dict[str, Any]) -> Tuple[Response, int]:
             message: Message = Message.query.filter_by(message_id=data["messageId"]).first()
             message.deleted_from_sender = False
             message.deleted_from_receiver = False
+            # change the revision of message, so the clients know the message is changed
+            touch_message(message.message_id)
 
             # add the reply in database
             db.session.add(new_reply)
+            # add the reply and the undeleted message to the change log of sender and receiver, the clients get them with sync
+            record_change("replies", new_reply, [message.sender_id, message.receiver_id])
+            record_change("messages", message, [message.sender_id, message.receiver_id])
             # send push notification to other (receiver will receive the notification, if the user send the reply is message sender, vice versa)
             send_notification_to_assignees(
                 "New Reply",
                 current_user["name"] + " replies to your message.",
-                [message.receiver_id if current_user["id"] == message.sender_id else message.sender_id]
+                [message.receiver_id if current_user["id"] == message.sender_id else message.sender_id],
+                current_user["id"]
             )
 
             # commit/apply the changes in message and the added reply
@@ -136,8 +145,20 @@ def reply_to_message(current_user: Dict[str, Any]) -> Tuple[Response, int]:
 @auth_required
 def get_sent_messages(current_user: Dict[str, Any]) -> Tuple[Response, int]:
     try:
-        messages: List[Message] = Message.query.filter_by(sender_id=current_user["id"], deleted_from_sender=False).order_by(desc(Message.date_sent)).all()
-        return jsonify([map_sent_messages(x) for x in messages]), 200
+        # get the sent messages from newest, in pages (limit and cursor query parameters)
+        messages: List[Message]
+        next_cursor: Optional[str]
+        messages, next_cursor = paginate(
+            Message.query.filter_by(sender_id=current_user["id"], deleted_from_sender=False),
+            [Message.date_sent, Message.message_id],
+            descending=True,
+            always=not UNPAGED_LISTS
+        )
+        # get all the receivers in one query
+        preload_users([x.receiver_id for x in messages])
+        return page_response([map_sent_messages(x) for x in messages], next_cursor), 200
+    except InvalidQueryArgs as e:
+        return jsonify({"type": "Validation Error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}"}), 500
 
@@ -146,8 +167,20 @@ def get_sent_messages(current_user: Dict[str, Any]) -> Tuple[Response, int]:
 @auth_required
 def get_received_messages(current_user: Dict[str, Any]) -> Tuple[Response, int]:
     try:
-        messages: List[Message] = Message.query.filter_by(receiver_id=current_user["id"], deleted_from_receiver=False).order_by(desc(Message.date_sent)).all()
-        return jsonify([map_received_messages(x) for x in messages]), 200
+        # get the received messages from newest, in pages (limit and cursor query parameters)
+        messages: List[Message]
+        next_cursor: Optional[str]
+        messages, next_cursor = paginate(
+            Message.query.filter_by(receiver_id=current_user["id"], deleted_from_receiver=False),
+            [Message.date_sent, Message.message_id],
+            descending=True,
+            always=not UNPAGED_LISTS
+        )
+        # get all the senders in one query
+        preload_users([x.sender_id for x in messages])
+        return page_response([map_received_messages(x) for x in messages], next_cursor), 200
+    except InvalidQueryArgs as e:
+        return jsonify({"type": "Validation Error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}"}), 500
 
@@ -159,7 +192,6 @@ def get_message(current_user: Dict[str, Any]) -> Tuple[Response, int]:
         message_id: int = int(request.args.get("message_id"))
         # get the message and its replies from message id
         message: Message = Message.query.filter_by(message_id=message_id).first()
-        message_replies: List[MessageReply] = MessageReply.query.filter_by(message_id=message_id).all()
 
         # check if message is deleted from the user if the user is the sender
         if message.sender_id == current_user["id"] and message.deleted_from_sender:
@@ -168,11 +200,21 @@ def get_message(current_user: Dict[str, Any]) -> Tuple[Response, int]:
         if message.receiver_id == current_user["id"] and message.deleted_from_receiver:
             return jsonify({"type": "Validation Error", "message": "Unable to view the message."}), 400
 
+        # the client already has this revision of message with the same sender and receiver, do not get its replies again
+        etag: str = make_etag("message", message.message_id, message.revision, get_users_revision())
+        cached_response: Optional[Response] = not_modified(etag)
+        if cached_response:
+            return cached_response, 304
+        # get the sender and receiver in one query
+        preload_users([message.sender_id, message.receiver_id])
+        message_replies: List[MessageReply] = MessageReply.query.filter_by(message_id=message_id).all()
+
         # return the message and its replies as response
         response: Dict[str, Any] = {
             "messageId": message.message_id,
             "title": message.title,
             "description": message.description,
+            "revision": message.revision,
             "sentDate": date_to_string(message.date_sent),
             "sender": map_user(message.sender_id),
             "receiver": map_user(message.receiver_id),
@@ -180,7 +222,7 @@ def get_message(current_user: Dict[str, Any]) -> Tuple[Response, int]:
             "fileNames": string_to_list(message.file_names),
             "replies": [map_replies(x) for x in message_replies]
         }
-        return jsonify(response), 200
+        return with_etag(jsonify_with_users(response), etag), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}"}), 500
 
@@ -197,6 +239,8 @@ def delete_message(current_user: Dict[str, Any]) -> Tuple[Response, int]:
         if current_user["id"] == message_to_delete.sender_id:
             # delete the message permanently for both sender and receiver
             db.session.delete(message_to_delete)
+            # add the deletion to the change log of sender and receiver, the clients remove the message and its replies
+            record_change("messages", message_to_delete, [message_to_delete.sender_id, message_to_delete.receiver_id], deleted=True)
             # get the replies to delete
             replies_to_delete: List[MessageReply] = MessageReply.query.filter_by(message_id=message_id).all()
 
@@ -240,6 +284,12 @@ def delete_message_reply(current_user: Dict[str, Any]) -> Tuple[Response, int]:
                 if os.path.exists(path):
                     os.remove(path)
 
+            # change the revision of message, so the clients know the message is changed
+            touch_message(reply_to_delete.message_id)
+            # add the deletion to the change log of sender and receiver of message, the clients get it with sync
+            message: Message = Message.query.filter_by(message_id=reply_to_delete.message_id).first()
+            record_change("replies", reply_to_delete, [message.sender_id, message.receiver_id], deleted=True)
+
             # commit/apply the deletion
             db.session.commit()
             # return message
@@ -268,6 +318,12 @@ def delete_message_from_user(current_user: Dict[str, Any]) -> Tuple[Response, in
             # if receiver, delete from receiver
             message.deleted_from_receiver = True
 
+        # change the revision of message, so the clients know the message is changed
+        touch_message(message.message_id)
+        # the message is not visible to the user anymore, add it to the change log of user as deleted
+        if current_user["id"] in (message.sender_id, message.receiver_id):
+            record_change("messages", message, [current_user["id"]], deleted=True)
+
         # commit/apply the deletion
         db.session.commit()
         # return message
@@ -0,0 +1,44 @@
+from typing import Dict, Any, Tuple, List, Optional
+
+from flask import Blueprint, request, jsonify, Response
+
+from routes.auth_wrapper import auth_required
+from utils import search_content, to_search_phrase, search_table_available, page_response, date_to_string, \
+    SEARCH_TYPES, InvalidQueryArgs
+
+search_bp = Blueprint("search_routes", __name__)
+
+
+@search_bp.route("/search", methods=["GET"])
+@auth_required
+def search(current_user: Dict[str, Any]) -> Tuple[Response, int]:
+    try:
+        # the types of results the client asks (e.g. types=tasks,comments), every type if not specified
+        types: List[str] = request.args["types"].split(",") if "types" in request.args else list(SEARCH_TYPES)
+        if any(x not in SEARCH_TYPES for x in types):
+            return jsonify({"type": "Validation Error", "message": "Types should be tasks, subtasks, comments or messages"}), 400
+
+        # the full-text search tables only exist on SQLite
+        if not all(search_table_available(SEARCH_TYPES[x]["table"]) for x in types):
+            return jsonify({"error": "Search is not available on this database"}), 501
+
+        search_phrase: Optional[str] = to_search_phrase(request.args.get("q", ""))
+        if not search_phrase:
+            return jsonify({"type": "Validation Error", "message": "Search query should have a word"}), 400
+
+        # get the best matches first, in pages (limit and cursor query parameters)
+        results, next_cursor = search_content(search_phrase, current_user["id"], types)
+        return page_response([
+            {
+                "type": x.type,
+                "id": x.id,
+                "taskId": x.task_id,
+                "title": x.title,
+                "snippet": x.snippet,
+                "sentDate": date_to_string(x.date_sent)
+            } for x in results
+        ], next_cursor, with_users=False), 200
+    except InvalidQueryArgs as e:
+        return jsonify({"type": "Validation Error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Unhandled exception: {e}"}), 500
@@ -1,12 +1,14 @@
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Optional
 
 from flask import Blueprint, request, jsonify, Response
 
 from config import db
-from db import Task, Subtask
+from db import Task, Subtask, SubtaskAssignee
 from routes.auth_wrapper import auth_required
-from utils import validate_subtask, string_to_date, int_list_to_string, map_subtasks, validate_description, \
-    validate_due, validate_assignee, string_to_int_list, send_notification_to_assignees
+from utils import validate_subtask, string_to_date, map_subtasks, validate_description, validate_due, \
+    validate_assignee, string_to_int_list, send_notification_to_assignees, set_assignees, query_task_section, \
+    preload_users, page_response, subtask_user_ids, validate_subtask_update, changes_to_string, mark_task_changed, \
+    jsonify_with_users, get_assignee_ids, SUBTASK_UPDATE_FIELDS, InvalidQueryArgs
 
 subtask_bp = Blueprint("subtask_routes", __name__)
 
@@ -20,7 +22,7 @@ def add_subtask(current_user: Dict[str, Any]) -> Tuple[Response, int]:
         # get the task where the subtask is sent (used to check if user send the subtask is a creator or assignee of task)
         task: Task = Task.query.filter_by(task_id=data["taskId"]).first()
         # validate the subtask
-        validation: Dict[str, Any] = validate_subtask(data["description"], string_to_date(data["due"]), data["assignee"], current_user["id"], task.creator_id, task.assignee)
+        validation: Dict[str, Any] = validate_subtask(data["description"], string_to_date(data["due"]), data["assignee"], current_user["id"], task.creator_id, get_assignee_ids(task))
 
         # check if subtask is valid
         if validation["isValid"]:
@@ -31,23 +33,26 @@ def add_subtask(current_user: Dict[str, Any]) -> Tuple[Response, int]:
                 priority=data["priority"],
                 due=string_to_date(data["due"]),
                 creator_id=current_user["id"],
-                type=data["type"],
-                assignee=int_list_to_string(data["assignee"])
+                type=data["type"]
             )
             # add the subtask to the database
             db.session.add(new_subtask)
+            set_assignees(new_subtask, data["assignee"])
 
             # send push notifications to the assignees of subtask
             send_notification_to_assignees(
                 "New Subtask Created",
                 current_user["name"] + "  have assigned to you a new subtask.",
-                data["assignee"]
+                data["assignee"],
+                current_user["id"]
             )
 
+            mark_task_changed("subtasks", new_subtask, new_subtask.task_id)
+
             # commit/apply the added subtask
             db.session.commit()
             # return the created subtask
-            return jsonify(map_subtasks(new_subtask)), 201
+            return jsonify_with_users(map_subtasks(new_subtask)), 201
         else:
             return jsonify({"type": "Validation Error", "message": validation["message"]}), 400
     except Exception as e:
@@ -75,9 +80,12 @@ def change_subtask_description(current_user: Dict[str, Any]) -> Tuple[Response,
             send_notification_to_assignees(
                 "Subtask Description Updated",
                 current_user["name"] + " changed description of subtask.",
-                string_to_int_list(task_to_change.assignee)
+                string_to_int_list(task_to_change.assignee),
+                current_user["id"]
             )
 
+            mark_task_changed("subtasks", task_to_change, task_to_change.task_id)
+
             # commit/apply the changed subtask
             db.session.commit()
             # return message
@@ -107,9 +115,12 @@ def change_subtask_priority(current_user: Dict[str, Any]) -> Tuple[Response, int
             send_notification_to_assignees(
                 "Subtask Priority Updated",
                 current_user["name"] + " changed priority of subtask.",
-                string_to_int_list(task_to_change.assignee)
+                string_to_int_list(task_to_change.assignee),
+                current_user["id"]
             )
 
+            mark_task_changed("subtasks", task_to_change, task_to_change.task_id)
+
             # commit/apply the changed subtask
             db.session.commit()
             # return message
@@ -141,9 +152,12 @@ def change_subtask_due_date(current_user: Dict[str, Any]) -> Tuple[Response, int
             send_notification_to_assignees(
                 "Subtask Due Date Updated",
                 current_user["name"] + " changed due date of subtask.",
-                string_to_int_list(task_to_change.assignee)
+                string_to_int_list(task_to_change.assignee),
+                current_user["id"]
             )
 
+            mark_task_changed("subtasks", task_to_change, task_to_change.task_id)
+
             # commit/apply the changed subtask
             db.session.commit()
             # return message
@@ -169,15 +183,18 @@ def edit_subtask_assignees(current_user: Dict[str, Any]) -> Tuple[Response, int]
         # check if the data is valid
         if validation["isValid"]:
             # change the assignees
-            task_to_change.assignee = int_list_to_string(data["assignee"])
+            set_assignees(task_to_change, data["assignee"])
 
             # send push notifications to the new assignees of subtask
             send_notification_to_assignees(
                 "Subtask Assignees Updated",
                 current_user["name"] + " changed assignees of subtask.",
-                data["assignee"]
+                data["assignee"],
+                current_user["id"]
             )
 
+            mark_task_changed("subtasks", task_to_change, task_to_change.task_id)
+
             # commit/apply the changed subtask
             db.session.commit()
             # return message
@@ -207,9 +224,12 @@ def change_subtask_type(current_user: Dict[str, Any]) -> Tuple[Response, int]:
             send_notification_to_assignees(
                 "Subtask Type Updated",
                 current_user["name"] + " changed type of subtask.",
-                string_to_int_list(task_to_change.assignee)
+                string_to_int_list(task_to_change.assignee),
+                current_user["id"]
             )
 
+            mark_task_changed("subtasks", task_to_change, task_to_change.task_id)
+
             # commit/apply the changed subtask
             db.session.commit()
             # return message
@@ -231,7 +251,7 @@ def change_subtask_status(current_user: Dict[str, Any]) -> Tuple[Response, int]:
         task_to_change: Subtask = Subtask.query.filter_by(subtask_id=data["subtaskId"]).first()
 
         # check if the user changed the subtask is an assignee of subtask
-        assignees: List[int] = string_to_int_list(task_to_change.assignee)
+        assignees: List[int] = get_assignee_ids(task_to_change)
         if current_user["id"] in assignees:
             # change the status
             task_to_change.status = data["status"]
@@ -240,9 +260,12 @@ def change_subtask_status(current_user: Dict[str, Any]) -> Tuple[Response, int]:
             send_notification_to_assignees(
                 "Subtask Status Updated",
                 current_user["name"] + " changed status of subtask.",
-                [*assignees, task_to_change.creator_id]
+                [*assignees, task_to_change.creator_id],
+                current_user["id"]
             )
 
+            mark_task_changed("subtasks", task_to_change, task_to_change.task_id)
+
             # commit/apply the changed subtask
             db.session.commit()
             # return message
@@ -254,6 +277,55 @@ def change_subtask_status(current_user: Dict[str, Any]) -> Tuple[Response, int]:
         return jsonify({"error": f"Unhandled exception: {e}"}), 500
 
 
+@subtask_bp.route("/update_subtask", methods=["PATCH"])
+@auth_required
+def update_subtask(current_user: Dict[str, Any]) -> Tuple[Response, int]:
+    try:
+        # get the subtask request data, only the fields to change (description, priority, type, due, assignee, status)
+        data: Dict[str, Any] = request.get_json()
+        # get the subtask to change
+        task_to_change: Subtask = Subtask.query.filter_by(subtask_id=data["subtaskId"]).first()
+        # validate every field before changing any (creator changes the fields except status, assignees change status)
+        validation: Dict[str, Any] = validate_subtask_update(data, current_user["id"], task_to_change)
+
+        # check if the data is valid
+        if validation["isValid"]:
+            # change the fields in request
+            if "description" in data:
+                task_to_change.description = data["description"]
+            if "priority" in data:
+                task_to_change.priority = data["priority"]
+            if "type" in data:
+                task_to_change.type = data["type"]
+            if "due" in data:
+                task_to_change.due = string_to_date(data["due"])
+            if "assignee" in data:
+                set_assignees(task_to_change, data["assignee"])
+            if "status" in data:
+                task_to_change.status = data["status"]
+
+            # send one push notification with every change to the assignees of subtask (and creator if status changed)
+            changes: List[str] = [y for x, y in SUBTASK_UPDATE_FIELDS.items() if x in data]
+            send_notification_to_assignees(
+                "Subtask " + changes[0].title() + " Updated" if len(changes) == 1 else "Subtask Updated",
+                current_user["name"] + (" changed " if len(changes) == 1 else " updated ") + changes_to_string(changes) + " of subtask.",
+                [*string_to_int_list(task_to_change.assignee), *([task_to_change.creator_id] if "status" in data else [])],
+                current_user["id"]
+            )
+
+            mark_task_changed("subtasks", task_to_change, task_to_change.task_id)
+
+            # commit/apply every change at once
+            db.session.commit()
+            # return message
+            return jsonify({"message": "Success"}), 201
+        else:
+            return jsonify({"type": "Validation Error", "message": validation["message"]}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Unhandled exception: {e}"}), 500
+
+
 @subtask_bp.route("/delete_subtask", methods=["DELETE"])
 @auth_required
 def delete_subtask(current_user: Dict[str, Any]) -> Tuple[Response, int]:
@@ -265,14 +337,18 @@ def delete_subtask(current_user: Dict[str, Any]) -> Tuple[Response, int]:
         if current_user["id"] == subtask_to_delete.creator_id:
             # delete the subtask
             db.session.delete(subtask_to_delete)
+            db.session.query(SubtaskAssignee).filter_by(subtask_id=subtask_to_delete.subtask_id).delete()
 
             # send push notifications to the assignees of subtask
             send_notification_to_assignees(
                 "Subtask Deleted",
                 current_user["name"] + " deleted subtask.",
-                string_to_int_list(subtask_to_delete.assignee)
+                string_to_int_list(subtask_to_delete.assignee),
+                current_user["id"]
             )
 
+            mark_task_changed("subtasks", subtask_to_delete, subtask_to_delete.task_id, deleted=True)
+
             # commit/apply the deleted subtask
             db.session.commit()
             # return message
@@ -282,3 +358,21 @@ def delete_subtask(current_user: Dict[str, Any]) -> Tuple[Response, int]:
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Unhandled exception: {e}"}), 500
+
+
+@subtask_bp.route("/get_subtasks", methods=["GET"])
+@auth_required
+def get_subtasks(_: Dict[str, Any]) -> Tuple[Response, int]:
+    try:
+        task_id: int = int(request.args.get("task_id"))
+        # get the subtasks of task, in pages if the client asks (limit and cursor query parameters)
+        subtasks: List[Subtask]
+        next_cursor: Optional[str]
+        subtasks, next_cursor = query_task_section("subtasks", task_id)
+        # get all the users of subtasks in one query
+        preload_users([y for x in subtasks for y in subtask_user_ids(x)])
+        return page_response([map_subtasks(x) for x in subtasks], next_cursor), 200
+    except InvalidQueryArgs as e:
+        return jsonify({"type": "Validation Error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Unhandled exception: {e}"}), 500
@@ -0,0 +1,52 @@
+from typing import Dict, Any, Tuple, List
+
+import click
+from flask import Blueprint, request, jsonify, Response
+
+from config import api, CHANGE_LOG_RETENTION_DAYS
+from db import ChangeLog
+from routes.auth_wrapper import auth_required
+from utils import query_changes, map_changes, encode_cursor, decode_cursor, jsonify_with_users, get_oldest_cursor, \
+    get_latest_cursor, prune_change_log
+
+sync_bp = Blueprint("sync_routes", __name__)
+
+
+@sync_bp.route("/sync", methods=["GET"])
+@auth_required
+def sync(current_user: Dict[str, Any]) -> Tuple[Response, int]:
+    try:
+        # the cursor of last sync, every change of user if not specified (first sync)
+        try:
+            cursor: int = int(decode_cursor(request.args["cursor"])[0]) if request.args.get("cursor") else 0
+        except (ValueError, LookupError, TypeError):
+            return jsonify({"type": "Validation Error", "message": "Invalid cursor"}), 400
+
+        # the changes after the cursor were removed, the client should get every item again (task and message routes)
+        # then sync from the latest cursor
+        if cursor < get_oldest_cursor():
+            return jsonify({
+                "type": "Resync Required",
+                "message": "The changes after the cursor were removed, get every item again.",
+                "cursor": encode_cursor([get_latest_cursor()])
+            }), 410
+
+        # get the changes after the cursor from oldest, in pages (limit query parameter)
+        changes: List[ChangeLog]
+        has_more: bool
+        changes, has_more = query_changes(current_user["id"], cursor)
+        # return the changed items and the cursor of next sync, the client should sync again if there are more changes
+        return jsonify_with_users({
+            "changes": map_changes(changes, current_user["id"]),
+            "cursor": encode_cursor([changes[-1].change_id if changes else cursor]),
+            "hasMore": has_more
+        }), 200
+    except Exception as e:
+        return jsonify({"error": f"Unhandled exception: {e}"}), 500
+
+
+@api.cli.command("prune-change-log")
+@click.option("--days", default=CHANGE_LOG_RETENTION_DAYS, help="Days the changes are kept.")
+def prune_change_log_command(days: int) -> None:
+    """Remove the old changes of the change log, run it daily (e.g. with cron)"""
+    click.echo(f"Removed {prune_change_log(days)} changes older than {days} days")
@@ -1,13 +1,17 @@
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Optional
 
 from flask import Blueprint, request, jsonify, Response
 
 from config import db
-from db import Task, TaskComment, Subtask, Checklist, Attachment
+from db import Task, TaskComment, Subtask, Checklist, Attachment, TaskAssignee, SubtaskAssignee, ChecklistAssignee, \
+    NotificationOutbox
 from routes.auth_wrapper import auth_required
-from utils import validate_task, string_to_date, int_list_to_string, string_to_int_list, validate_assignee, \
-    validate_due, validate_name, validate_description, map_tasks, map_comments, map_subtasks, map_checklists, \
-    map_attachments, date_to_string, map_user, send_notification_to_assignees
+from utils import validate_task, string_to_date, string_to_int_list, validate_assignee, set_assignees, \
+    validate_due, validate_name, validate_description, map_tasks, date_to_string, map_user, \
+    send_notification_to_assignees, send_task_change_notification, preload_users, task_user_ids, query_tasks, \
+    page_response, query_task_section, validate_task_update, mark_task_changed, make_etag, not_modified, with_etag, \
+    get_users_revision, record_change, record_task_change, jsonify_with_users, get_assignee_ids, TASK_SECTIONS, \
+    TASK_UPDATE_FIELDS, InvalidQueryArgs
 
 task_bp = Blueprint("task_routes", __name__)
 
@@ -30,23 +34,26 @@ def add_task(current_user: Dict[str, Any]) -> Tuple[Response, int]:
                 priority=data["priority"],
                 due=string_to_date(data["due"]),
                 creator_id=current_user["id"],
-                type=data["type"],
-                assignee=int_list_to_string(data["assignee"])
+                type=data["type"]
             )
             # add the created task to the database
             db.session.add(new_task)
+            set_assignees(new_task, data["assignee"])
+            # add the task to the change log of the creator and assignees, the clients get it with sync
+            record_task_change("tasks", new_task, new_task.task_id)
 
             # send push notifications to the assignees of task
             send_notification_to_assignees(
                 "New Task Created",
                 current_user["name"] + " have assigned to you a new task.",
-                data["assignee"]
+                data["assignee"],
+                current_user["id"]
             )
 
             # commit/apply the added task
             db.session.commit()
             # return the created task as response
-            return jsonify(map_tasks(new_task)), 201
+            return jsonify_with_users(map_tasks(new_task)), 201
         else:
             return jsonify({"type": "Validation Error", "message": validation["message"]}), 400
     except Exception as e:
@@ -64,7 +71,7 @@ def change_task_status(current_user: Dict[str, Any]) -> Tuple[Response, int]:
         task_to_change: Task = Task.query.filter_by(task_id=data["taskId"]).first()
 
         # check if the user want to change status is an assignee of task
-        assignees: List[int] = string_to_int_list(task_to_change.assignee)
+        assignees: List[int] = get_assignee_ids(task_to_change)
         if current_user["id"] in assignees:
             # change the status
             task_to_change.status = data["status"]
@@ -73,9 +80,12 @@ def change_task_status(current_user: Dict[str, Any]) -> Tuple[Response, int]:
             send_notification_to_assignees(
                 "Task Status Updated",
                 current_user["name"] + " changed status of task \"" + task_to_change.title + "\".",
-                [*assignees, task_to_change.creator_id]
+                [*assignees, task_to_change.creator_id],
+                current_user["id"]
             )
 
+            mark_task_changed("tasks", task_to_change, task_to_change.task_id)
+
             # commit/apply the changed task
             db.session.commit()
             # return message
@@ -101,15 +111,22 @@ def edit_assignees(current_user: Dict[str, Any]) -> Tuple[Response, int]:
         # check if task is valid
         if validation["isValid"]:
             # change the assignees
-            task_to_change.assignee = int_list_to_string(data["assignee"])
+            # the removed assignees do not see the task anymore
+            record_change("tasks", task_to_change, [
+                x for x in string_to_int_list(task_to_change.assignee) if x not in data["assignee"] and x != task_to_change.creator_id
+            ], deleted=True)
+            set_assignees(task_to_change, data["assignee"])
 
             # send push notifications to the new assignees of task
             send_notification_to_assignees(
                 "Task Assignees Updated",
                 current_user["name"] + " changed assignees of task \"" + task_to_change.title + "\".",
-                data["assignee"]
+                data["assignee"],
+                current_user["id"]
             )
 
+            mark_task_changed("tasks", task_to_change, task_to_change.task_id)
+
             # commit/apply the changed task
             db.session.commit()
             # return message
@@ -137,12 +154,10 @@ def change_due_date(current_user: Dict[str, Any]) -> Tuple[Response, int]:
             # change the due date
             task_to_change.due = string_to_date(data["due"])
 
-            # send push notifications to the assignees of task
-            send_notification_to_assignees(
-                "Task Due Date Updated",
-                current_user["name"] + " changed due date of task \"" + task_to_change.title + "\".",
-                string_to_int_list(task_to_change.assignee)
-            )
+            # send push notifications to the assignees of task (merged with the other changes of task made recently)
+            send_task_change_notification(task_to_change, ["due date"], current_user)
+
+            mark_task_changed("tasks", task_to_change, task_to_change.task_id)
 
             # commit/apply the changed task
             db.session.commit()
@@ -169,12 +184,10 @@ def change_priority(current_user: Dict[str, Any]) -> Tuple[Response, int]:
             # change the priority
             task_to_change.priority = data["priority"]
 
-            # send push notifications to the assignees of task
-            send_notification_to_assignees(
-                "Task Priority Updated",
-                current_user["name"] + " changed priority of task \"" + task_to_change.title + "\".",
-                string_to_int_list(task_to_change.assignee)
-            )
+            # send push notifications to the assignees of task (merged with the other changes of task made recently)
+            send_task_change_notification(task_to_change, ["priority"], current_user)
+
+            mark_task_changed("tasks", task_to_change, task_to_change.task_id)
 
             # commit/apply the changed task
             db.session.commit()
@@ -201,12 +214,10 @@ def change_type(current_user: Dict[str, Any]) -> Tuple[Response, int]:
             # change the type
             task_to_change.type = data["type"]
 
-            # send push notifications to the assignees of task
-            send_notification_to_assignees(
-                "Task Type Updated",
-                current_user["name"] + " changed type of task \"" + task_to_change.title + "\".",
-                string_to_int_list(task_to_change.assignee)
-            )
+            # send push notifications to the assignees of task (merged with the other changes of task made recently)
+            send_task_change_notification(task_to_change, ["type"], current_user)
+
+            mark_task_changed("tasks", task_to_change, task_to_change.task_id)
 
             # commit/apply the changed task
             db.session.commit()
@@ -235,12 +246,10 @@ def change_name(current_user: Dict[str, Any]) -> Tuple[Response, int]:
             # change the name
             task_to_change.title = data["title"]
 
-            # send push notifications to the assignees of task
-            send_notification_to_assignees(
-                "Task Name Updated",
-                current_user["name"] + " changed name of task \"" + task_to_change.title + "\".",
-                string_to_int_list(task_to_change.assignee)
-            )
+            # send push notifications to the assignees of task (merged with the other changes of task made recently)
+            send_task_change_notification(task_to_change, ["name"], current_user)
+
+            mark_task_changed("tasks", task_to_change, task_to_change.task_id)
 
             # commit/apply the changed task
             db.session.commit()
@@ -269,12 +278,10 @@ def change_description(current_user: Dict[str, Any]) -> Tuple[Response, int]:
             # change the description
             task_to_change.description = data["description"]
 
-            # send push notifications to the assignees of task
-            send_notification_to_assignees(
-                "Task Description Updated",
-                current_user["name"] + " changed description of task \"" + task_to_change.title + "\".",
-                string_to_int_list(task_to_change.assignee)
-            )
+            # send push notifications to the assignees of task (merged with the other changes of task made recently)
+            send_task_change_notification(task_to_change, ["description"], current_user)
+
+            mark_task_changed("tasks", task_to_change, task_to_change.task_id)
 
             # commit/apply the changed task
             db.session.commit()
@@ -287,6 +294,53 @@ def change_description(current_user: Dict[str, Any]) -> Tuple[Response, int]:
         return jsonify({"error": f"Unhandled exception: {e}"}), 500
 
 
+@task_bp.route("/update_task", methods=["PATCH"])
+@auth_required
+def update_task(current_user: Dict[str, Any]) -> Tuple[Response, int]:
+    try:
+        # get the task request data, only the fields to change (title, description, priority, type, due, assignee)
+        data: Dict[str, Any] = request.get_json()
+        # get the task to change
+        task_to_change: Task = Task.query.filter_by(task_id=data["taskId"]).first()
+        # validate every field before changing any (who change it)
+        validation: Dict[str, Any] = validate_task_update(data, current_user["id"], task_to_change.creator_id)
+
+        # check if task is valid
+        if validation["isValid"]:
+            # change the fields in request
+            if "title" in data:
+                task_to_change.title = data["title"]
+            if "description" in data:
+                task_to_change.description = data["description"]
+            if "priority" in data:
+                task_to_change.priority = data["priority"]
+            if "type" in data:
+                task_to_change.type = data["type"]
+            if "due" in data:
+                task_to_change.due = string_to_date(data["due"])
+            if "assignee" in data:
+                # the removed assignees do not see the task anymore
+                record_change("tasks", task_to_change, [
+                    x for x in string_to_int_list(task_to_change.assignee) if x not in data["assignee"] and x != task_to_change.creator_id
+                ], deleted=True)
+                set_assignees(task_to_change, data["assignee"])
+
+            # send one push notification with every change to the assignees of task
+            send_task_change_notification(task_to_change, [y for x, y in TASK_UPDATE_FIELDS.items() if x in data], current_user)
+
+            mark_task_changed("tasks", task_to_change, task_to_change.task_id)
+
+            # commit/apply every change at once
+            db.session.commit()
+            # return message
+            return jsonify({"message": "Success"}), 201
+        else:
+            return jsonify({"type": "Validation Error", "message": validation["message"]}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Unhandled exception: {e}"}), 500
+
+
 @task_bp.route("/delete_task", methods=["DELETE"])
 @auth_required
 def delete_task(current_user: Dict[str, Any]) -> Tuple[Response, int]:
@@ -297,18 +351,31 @@ def delete_task(current_user: Dict[str, Any]) -> Tuple[Response, int]:
 
         # check if the user want to delete the task is the creator of task
         if current_user["id"] == task_to_delete.creator_id:
+            # add the deletion to the change log of the creator and assignees before the assignees are deleted, the
+            # clients remove the task and its sections
+            record_task_change("tasks", task_to_delete, task_id, deleted=True)
             # delete the task, its comments, checklists, subtasks and attachments
             db.session.delete(task_to_delete)
+            db.session.query(TaskAssignee).filter_by(task_id=task_id).delete()
+            db.session.query(SubtaskAssignee).filter(
+                SubtaskAssignee.subtask_id.in_(db.session.query(Subtask.subtask_id).filter_by(task_id=task_id))
+            ).delete(synchronize_session=False)
+            db.session.query(ChecklistAssignee).filter(
+                ChecklistAssignee.checklist_id.in_(db.session.query(Checklist.checklist_id).filter_by(task_id=task_id))
+            ).delete(synchronize_session=False)
             db.session.query(TaskComment).filter_by(task_id=task_id).delete()
             db.session.query(Subtask).filter_by(task_id=task_id).delete()
             db.session.query(Checklist).filter_by(task_id=task_id).delete()
             db.session.query(Attachment).filter_by(task_id=task_id).delete()
+            # the pending notifications of task changes are not sent anymore (the claimed ones are already being sent)
+            db.session.query(NotificationOutbox).filter_by(task_id=task_id, claim_token="").delete()
 
             # send push notifications to the assignees of task
             send_notification_to_assignees(
                 "Task Deleted",
                 current_user["name"] + " deleted task \"" + task_to_delete.title + "\".",
-                string_to_int_list(task_to_delete.assignee)
+                string_to_int_list(task_to_delete.assignee),
+                current_user["id"]
             )
 
             # commit/apply the deleted task, its comments, checklists, subtasks and attachments
@@ -326,9 +393,24 @@ def delete_task(current_user: Dict[str, Any]) -> Tuple[Response, int]:
 @auth_required
 def get_tasks(current_user: Dict[str, Any]) -> Tuple[Response, int]:
     try:
-        # get assigned tasks
-        tasks: List[Task] = Task.query.filter(Task.assignee.like(f"%{current_user['id']}%")).all()
-        return jsonify([map_tasks(x) for x in tasks]), 200
+        # get assigned tasks (filtered, sorted and paginated with the query parameters)
+        tasks: List[Task]
+        next_cursor: Optional[str]
+        tasks, next_cursor = query_tasks(
+            Task.query.join(TaskAssignee, TaskAssignee.task_id == Task.task_id).filter(TaskAssignee.user_id == current_user["id"])
+        )
+        # the client already has these tasks (same tasks, revisions and users), do not build the response again
+        etag: str = make_etag(
+            "assigned", current_user["id"], [(x.task_id, x.revision) for x in tasks], get_users_revision(), next_cursor
+        )
+        cached_response: Optional[Response] = not_modified(etag)
+        if cached_response:
+            return cached_response, 304
+        # get all the users of tasks in one query
+        preload_users([y for x in tasks for y in task_user_ids(x)])
+        return with_etag(page_response([map_tasks(x) for x in tasks], next_cursor), etag), 200
+    except InvalidQueryArgs as e:
+        return jsonify({"type": "Validation Error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}"}), 500
 
@@ -338,15 +420,29 @@ def get_tasks(current_user: Dict[str, Any]) -> Tuple[Response, int]:
 def get_task(_: Dict[str, Any]) -> Tuple[Response, int]:
     try:
         task_id: int = int(request.args.get("task_id"))
-        # get everything from task, its comments, checklists, subtasks and attachments
+        # get the task
         task: Task = Task.query.filter_by(task_id=task_id).first()
+        # the client already has this revision of task with the same users, do not get its sections again (the
+        # sections are part of the revision)
+        etag: str = make_etag("task", task.task_id, task.revision, get_users_revision())
+        cached_response: Optional[Response] = not_modified(etag)
+        if cached_response:
+            return cached_response, 304
+
         assignee_ids: List[int] = string_to_int_list(task.assignee)
-        comments: List[TaskComment] = TaskComment.query.filter_by(task_id=task_id).all()
-        subtasks: List[Subtask] = Subtask.query.filter_by(task_id=task_id).all()
-        checklists: List[Checklist] = Checklist.query.filter_by(task_id=task_id).all()
-        attachments: List[Attachment] = Attachment.query.filter_by(task_id=task_id).all()
+        # get the sections of task the client asks (e.g. include=comments,subtasks), every section if not specified
+        # only the first page of sections if the client asks (limit query parameter), the next pages are in section routes
+        include: List[str] = request.args["include"].split(",") if "include" in request.args else list(TASK_SECTIONS)
+        sections: Dict[str, Tuple[List[Any], Optional[str]]] = {
+            x: query_task_section(x, task_id, first_page=True) for x in TASK_SECTIONS if x in include
+        }
+        # get all the users of task and its sections in one query
+        preload_users([
+            *task_user_ids(task),
+            *[y for section, (items, _) in sections.items() for x in items for y in TASK_SECTIONS[section]["user_ids"](x)]
+        ])
 
-        # return the task, its comments, checklists, subtasks and attachments
+        # return the task and its comments, checklists, subtasks and attachments (the included sections)
         response: Dict[str, Any] = {
             "taskId": task.task_id,
             "title": task.title,
@@ -355,15 +451,18 @@ def get_task(_: Dict[str, Any]) -> Tuple[Response, int]:
             "priority": task.priority,
             "status": task.status,
             "type": task.type,
+            "revision": task.revision,
             "sentDate": date_to_string(task.date_sent),
             "assignees": [map_user(x) for x in assignee_ids],
             "creator": map_user(task.creator_id),
-            "comments": [map_comments(x) for x in comments],
-            "subtasks": [map_subtasks(x) for x in subtasks],
-            "checklists": [map_checklists(x) for x in checklists],
-            "attachments": [map_attachments(x) for x in attachments]
+            **{section: [TASK_SECTIONS[section]["map"](x) for x in items] for section, (items, _) in sections.items()}
         }
-        return jsonify(response), 200
+        json_response: Response = with_etag(jsonify_with_users(response), etag)
+        # the cursor of next page of each section (e.g. X-Next-Cursor-Comments)
+        for section, (_, next_cursor) in sections.items():
+            if next_cursor:
+                json_response.headers[f"X-Next-Cursor-{section.capitalize()}"] = next_cursor
+        return json_response, 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}"}), 500
 
@@ -372,8 +471,21 @@ def get_task(_: Dict[str, Any]) -> Tuple[Response, int]:
 @auth_required
 def get_created_tasks(current_user: Dict[str, Any]) -> Tuple[Response, int]:
     try:
-        # get created tasks
-        tasks: List[Task] = Task.query.filter_by(creator_id=current_user["id"]).all()
-        return jsonify([map_tasks(x) for x in tasks]), 200
+        # get created tasks (filtered, sorted and paginated with the query parameters)
+        tasks: List[Task]
+        next_cursor: Optional[str]
+        tasks, next_cursor = query_tasks(Task.query.filter_by(creator_id=current_user["id"]))
+        # the client already has these tasks (same tasks, revisions and users), do not build the response again
+        etag: str = make_etag(
+            "created", current_user["id"], [(x.task_id, x.revision) for x in tasks], get_users_revision(), next_cursor
+        )
+        cached_response: Optional[Response] = not_modified(etag)
+        if cached_response:
+            return cached_response, 304
+        # get all the users of tasks in one query
+        preload_users([y for x in tasks for y in task_user_ids(x)])
+        return with_etag(page_response([map_tasks(x) for x in tasks], next_cursor), etag), 200
+    except InvalidQueryArgs as e:
+        return jsonify({"type": "Validation Error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}"}), 500
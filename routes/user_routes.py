@@ -1,15 +1,18 @@
 import os
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Optional, Tuple
 
-import bcrypt
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, request, jsonify, Response, send_file
+from sqlalchemy.exc import IntegrityError
 from werkzeug.datastructures import FileStorage
 
-from config import ALLOWED_IMAGE_EXTENSIONS, db, SALT
+from cache import identity_cache
+from config import ALLOWED_IMAGE_EXTENSIONS, db, DELETED_USER_IMAGE
 from db import User
+from passwords import hash_password, PasswordHashingBusy, busy_response
 from routes.auth_wrapper import auth_required
-from utils import allowed_file, validate_user_name, validate_user_role, map_user, get_response_image, filename_secure, \
-    validate_password
+from utils import allowed_file, validate_user_name, validate_user_role, filename_secure, validate_password, \
+    invalidate_response_image, map_user_image, get_image_version, query_users, page_response, touch_users, \
+    InvalidQueryArgs
 
 user_bp = Blueprint("user_routes", __name__)
 
@@ -27,8 +30,12 @@ def upload_image(current_user: Dict[str, Any]) -> Tuple[Response, int]:
 
             if os.path.exists(user.image_path):
                 os.remove(user.image_path)
+            # the old image is not used anymore, remove it from encoded images cache
+            invalidate_response_image(user.image_path)
 
             user.image_path = "images/" + filename
+            # the responses with the user have the old image
+            touch_users()
             db.session.commit()
             return jsonify({"message": "Success"}), 201
         except Exception as e:
@@ -43,15 +50,23 @@ def upload_image(current_user: Dict[str, Any]) -> Tuple[Response, int]:
 def change_user_name(current_user: Dict[str, Any]) -> Tuple[Response, int]:
     try:
         data: Dict[str, Any] = request.get_json()
-        validation: Dict[str, Any] = validate_user_name(data["name"])
+        validation: Dict[str, Any] = validate_user_name(data["name"], current_user["id"])
 
         if validation["isValid"]:
             user: User = User.query.filter_by(id=current_user["id"]).first()
             user.name = data["name"]
+            # the responses with the user have the old name
+            touch_users()
             db.session.commit()
+            # the cached identity has the old name
+            identity_cache.invalidate(current_user["id"])
             return jsonify({"message": "Success"}), 201
         else:
             return jsonify({"type": "Validation Error", "message": validation["message"]}), 400
+    except IntegrityError:
+        # other user took the name after it was validated
+        db.session.rollback()
+        return jsonify({"type": "Validation Error", "message": "Username already exist"}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Unhandled exception: {e}"}), 500
@@ -85,11 +100,14 @@ def change_user_password(current_user: Dict[str, Any]) -> Tuple[Response, int]:
         validation: Dict[str, Any] = validate_password(data["currentPassword"], data["newPassword"], data["confirmPassword"], user.password)
 
         if validation["isValid"]:
-            user.password = bcrypt.hashpw(data["newPassword"].encode(), SALT).decode()
+            user.password = hash_password(data["newPassword"])
             db.session.commit()
             return jsonify({"message": "Success"}), 201
         else:
             return jsonify({"type": "Validation Error", "message": validation["message"]}), 400
+    except PasswordHashingBusy:
+        db.session.rollback()
+        return busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
@@ -113,12 +131,15 @@ def update_notifications_token(current_user: Dict[str, Any]) -> Tuple[Response,
 @auth_required
 def search_users(current_user: Dict[str, Any]) -> Tuple[Response, int]:
     try:
-        search_query: str = request.args.get("search_query")
-        users: List[User] = User.query.filter(
-            User.name.ilike(f'%{search_query}%'),
-            User.id != current_user["id"]
-        ).all()
-        return jsonify([map_user(x.id) for x in users]), 200
+        search_query: str = request.args.get("search_query", "")
+        users, next_cursor = query_users(search_query, current_user["id"])
+        # the users are mapped from the searched fields instead of querying each user again
+        # the users are the items, they are not sent again in the users sidecar
+        return page_response(
+            [{"id": x.id, "name": x.name, **map_user_image(x.id, x.image_path)} for x in users], next_cursor, with_users=False
+        ), 200
+    except InvalidQueryArgs as e:
+        return jsonify({"type": "Validation Error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}"}), 500
 
@@ -134,7 +155,7 @@ def get_user(_: Dict[str, Any]) -> Tuple[Response, int]:
                 "id": user.id,
                 "name": user.name,
                 "email": user.email,
-                "image": get_response_image(user.image_path),
+                **map_user_image(user.id, user.image_path),
                 "role": user.role
             }
         else:
@@ -142,7 +163,7 @@ def get_user(_: Dict[str, Any]) -> Tuple[Response, int]:
                 "id": user_id,
                 "name": "UnknownUser",
                 "email": "UnknownEmail",
-                "image": get_response_image("images/deleted_user.png"),
+                **map_user_image(user_id, DELETED_USER_IMAGE),
                 "role": "NA"
             }
         return jsonify(response), 200
@@ -150,13 +171,35 @@ def get_user(_: Dict[str, Any]) -> Tuple[Response, int]:
         return jsonify({"error": f"Unhandled exception: {e}"}), 500
 
 
+@user_bp.route("/get_user_image", methods=["GET"])
+@auth_required
+def get_user_image(_: Dict[str, Any]) -> Tuple[Response, int]:
+    try:
+        user_id: int = int(request.args.get("user_id"))
+        user: Optional[User] = User.query.filter_by(id=user_id).first()
+        image_path: str = user.image_path if user else DELETED_USER_IMAGE
+
+        # the image url is versioned (changes when the image changes) so the client can cache it for long time
+        response: Response = send_file(image_path, etag=get_image_version(image_path), conditional=True, max_age=31536000)
+        response.cache_control.public = False
+        response.cache_control.private = True
+        response.cache_control.immutable = True
+        return response, response.status_code
+    except Exception as e:
+        return jsonify({"error": f"Unhandled exception: {e}"}), 500
+
+
 @user_bp.route("/delete_user", methods=["DELETE"])
 @auth_required
 def delete_user(current_user: Dict[str, Any]) -> Tuple[Response, int]:
     try:
         user: User = User.query.filter_by(id=current_user["id"]).first()
         db.session.delete(user)
+        # the responses with the user should show the deleted user
+        touch_users()
         db.session.commit()
+        # the deleted user can not be authorized anymore
+        identity_cache.invalidate(current_user["id"])
         return jsonify({"message": "Success"}), 201
     except Exception as e:
         db.session.rollback()
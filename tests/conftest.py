@@ -0,0 +1,125 @@
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Callable, Optional, List, Iterator, Any
+
+import jwt
+import pytest
+
+ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# config initializes firebase admin with the service account key of the server
+if not os.path.exists(os.path.join(ROOT, "service_account_key.json")):
+    collect_ignore_glob = ["test_*.py"]
+
+
+@pytest.fixture(scope="session")
+def api(tmp_path_factory: pytest.TempPathFactory):
+    """The application with a database created by the migrations (flask db upgrade)"""
+    database: str = str(tmp_path_factory.mktemp("database") / "test.db")
+    os.environ.update({
+        "DIGIWORKHUB_DB_URI": f"sqlite:///{database}",
+        "SECRET_KEY": "secret",
+        "PASSWORD_REGEX": r"^(?=.*[A-Za-z])(?=.*\d).+$",
+        "EMAIL_REGEX": r"^[^@\s]+@[^@\s]+\.[a-z]+$",
+        "NAME_REGEX": r"^[A-Za-z0-9_ ]+$",
+        "NOTIFICATION_DISPATCHER_ENABLED": "0",
+        "NOTIFICATION_TRANSPORT": "fake",
+        "BCRYPT_ROUNDS": "4"
+    })
+    # the application uses paths relative to the repository (migrations, images and fonts)
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+
+    from flask_migrate import upgrade
+    import app
+
+    with app.api.app_context():
+        upgrade()
+    return app.api
+
+
+# the names and emails of users are unique, each user made by the tests has its own number
+user_numbers = count()
+
+
+@pytest.fixture(scope="session")
+def make_user(api) -> Callable[..., int]:
+    """Create users, the user has the image of deleted users so no image file is written"""
+    from config import db, DELETED_USER_IMAGE
+    from db import User
+
+    def make(name: Optional[str] = None, **fields: Any) -> int:
+        """
+        :param name: (Optional) the name of user, a unique name if not specified
+        :param fields: other columns of user (e.g. email, password)
+        :return: the id of user
+        """
+        number: int = next(user_numbers)
+        with api.app_context():
+            user: User = User(name=name or f"test_user_{number}", **{
+                "email": f"test_user_{number}@example.com", "image_path": DELETED_USER_IMAGE, **fields
+            })
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+    return make
+
+
+@pytest.fixture(scope="session")
+def make_task(api) -> Callable[..., int]:
+    """Create tasks with their assignees"""
+    from config import db
+    from db import Task
+    from utils import set_assignees
+
+    def make(creator_id: int, assignee_ids: List[int], title: str = "Test task title", **fields: Any) -> int:
+        """
+        :param creator_id: the user that created the task
+        :param assignee_ids: the assignees of task
+        :param title: (Optional) the title of task
+        :param fields: other columns of task (e.g. priority, due)
+        :return: the id of task
+        """
+        with api.app_context():
+            task: Task = Task(title=title, creator_id=creator_id, **{
+                "description": "Test task description " * 3, "due": datetime.now() + timedelta(days=3), **fields
+            })
+            db.session.add(task)
+            set_assignees(task, assignee_ids)
+            db.session.commit()
+            return task.task_id
+    return make
+
+
+@pytest.fixture(scope="session")
+def token_for() -> Callable[[int], str]:
+    """Get the authorization token of user (Authorization header)"""
+    def token(user_id: int) -> str:
+        return jwt.encode({"user_id": user_id, "exp": datetime.now() + timedelta(days=1)}, "secret", algorithm="HS256")
+    return token
+
+
+@pytest.fixture(scope="session")
+def count_queries(api) -> Callable[[], Any]:
+    """Count the statements executed in the with block (with count_queries() as statements: ...)"""
+    from sqlalchemy import event
+    from config import db
+
+    @contextmanager
+    def counter() -> Iterator[List[str]]:
+        statements: List[str] = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with api.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return counter
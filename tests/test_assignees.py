@@ -0,0 +1,47 @@
+from typing import Dict, Any
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def data(api, make_user, make_task, token_for) -> Dict[str, Any]:
+    """Users 1, 11 and 21 (their ids contain each other) and tasks assigned to 11 and 21 only"""
+    from config import db
+    from db import User
+
+    with api.app_context():
+        last_id: int = db.session.query(db.func.max(User.id)).scalar() or 0
+    while last_id < 21:
+        last_id = make_user()
+    creator_id: int = make_user()
+    task_ids: Dict[int, int] = {x: make_task(creator_id, [x], f"Task assigned to user {x}") for x in (11, 21)}
+    # the first user of test database exists (other modules may have created it)
+    return {"task_ids": task_ids, "headers": {"Authorization": token_for(1)}}
+
+
+def test_tasks_of_similar_ids_are_not_assigned(api, data):
+    response = api.test_client().get("/task_routes/get_tasks?limit=100", headers=data["headers"])
+    assert response.status_code == 200
+    assert not {x["taskId"] for x in response.get_json()} & set(data["task_ids"].values())
+
+
+def test_assignee_table_decides_the_assignees(api, data):
+    from config import db
+    from db import Task, ChangeLog
+
+    # a stale assignee column does not make the user an assignee
+    with api.app_context():
+        db.session.get(Task, data["task_ids"][11]).assignee = "1,11"
+        db.session.commit()
+    response = api.test_client().post("/task_routes/change_task_status", headers=data["headers"],
+                                      json={"taskId": data["task_ids"][11], "status": "COMPLETE"})
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Only assignees can edit status"
+
+    # the change of task is sent as deleted to the user that is not a member
+    with api.app_context():
+        db.session.add(ChangeLog(user_id=1, type="tasks", item_id=data["task_ids"][11]))
+        db.session.commit()
+    response = api.test_client().get("/sync_routes/sync", headers=data["headers"])
+    assert response.status_code == 200
+    assert [x["deleted"] for x in response.get_json()["changes"] if x["id"] == data["task_ids"][11]] == [True]
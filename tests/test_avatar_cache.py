@@ -0,0 +1,87 @@
+import io
+import os
+import shutil
+
+import pytest
+
+
+@pytest.fixture
+def avatar_cache(api, monkeypatch):
+    """An empty avatar cache with its own hits and misses"""
+    import utils
+    from cachetools import LRUCache
+
+    monkeypatch.setattr(utils, "avatar_cache", LRUCache(maxsize=100))
+    monkeypatch.setattr(utils, "avatar_cache_stats", {"hits": 0, "misses": 0})
+    return utils.avatar_cache
+
+
+@pytest.fixture
+def image_path(tmp_path) -> str:
+    """A copy of the deleted user image that can be modified"""
+    from config import DELETED_USER_IMAGE
+
+    path: str = str(tmp_path / "avatar.png")
+    shutil.copyfile(DELETED_USER_IMAGE, path)
+    return path
+
+
+def test_avatar_is_encoded_once(avatar_cache, image_path):
+    from utils import get_response_image, get_avatar_cache_info
+
+    assert get_response_image(image_path) == get_response_image(image_path)
+    assert get_avatar_cache_info()["hits"] == 1
+    assert get_avatar_cache_info()["misses"] == 1
+    assert get_avatar_cache_info()["hitRatio"] == 0.5
+
+
+def test_modified_avatar_is_encoded_again(avatar_cache, image_path):
+    from utils import get_response_image, get_avatar_cache_info, invalidate_response_image
+
+    get_response_image(image_path)
+    # the image file is replaced with the same name
+    os.utime(image_path, (0, 0))
+    get_response_image(image_path)
+    invalidate_response_image(image_path)
+    get_response_image(image_path)
+
+    assert get_avatar_cache_info()["hits"] == 0
+    assert get_avatar_cache_info()["misses"] == 3
+
+
+def test_deleted_user_image_is_shared(api, make_user, make_task, token_for, avatar_cache):
+    from utils import get_avatar_cache_info
+
+    # every user made by the tests has the deleted user image
+    user_ids = [make_user() for _ in range(5)]
+    task_id: int = make_task(user_ids[0], user_ids)
+    client = api.test_client()
+    for _ in range(2):
+        response = client.get(f"/task_routes/get_task?task_id={task_id}", headers={"Authorization": token_for(user_ids[0])})
+        assert response.status_code == 200
+
+    assert get_avatar_cache_info()["misses"] == 1
+    assert get_avatar_cache_info()["hits"] >= 11
+    assert get_avatar_cache_info()["size"] == 1
+
+
+def test_upload_image_invalidates_avatar(api, make_user, token_for, avatar_cache, image_path):
+    from config import DELETED_USER_IMAGE
+    from db import User
+    from utils import get_response_image
+
+    user_id: int = make_user(image_path=image_path)
+    get_response_image(image_path)
+    assert image_path in avatar_cache
+
+    with open(DELETED_USER_IMAGE, "rb") as file:
+        image: bytes = file.read()
+    response = api.test_client().post("/user_routes/upload_image", data={"file": (io.BytesIO(image), "avatar.png")},
+                                      headers={"Authorization": token_for(user_id)})
+    assert response.status_code == 201
+    with api.app_context():
+        new_image_path: str = User.query.filter_by(id=user_id).first().image_path
+    os.remove(new_image_path)
+
+    # the replaced image is removed from the cache
+    assert image_path not in avatar_cache
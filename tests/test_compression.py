@@ -0,0 +1,88 @@
+import gzip
+from typing import Dict, Any
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def data(api, make_user, make_task, token_for) -> Dict[str, Any]:
+    """A task with a json response larger than the compression threshold and a user without tasks (small response)"""
+    creator_id: int = make_user()
+    task_id: int = make_task(creator_id, [creator_id], description="Compressed task description " * 30)
+    return {
+        "url": f"/task_routes/get_task?task_id={task_id}",
+        "small_url": "/task_routes/get_tasks?status=COMPLETE",
+        "headers": {"Authorization": token_for(creator_id)}
+    }
+
+
+def get(api, data: Dict[str, Any], accept_encoding: str, url: str = "", **headers: str):
+    return api.test_client().get(url or data["url"], headers={**data["headers"], "Accept-Encoding": accept_encoding, **headers})
+
+
+def decode(response) -> bytes:
+    if response.headers.get("Content-Encoding") == "br":
+        import brotli
+        return brotli.decompress(response.get_data())
+    if response.headers.get("Content-Encoding") == "gzip":
+        return gzip.decompress(response.get_data())
+    return response.get_data()
+
+
+@pytest.mark.parametrize("accept_encoding, with_brotli, without_brotli", [
+    ("gzip", "gzip", "gzip"),
+    ("br, gzip", "br", "gzip"),
+    ("gzip;q=1.0, br;q=0.5", "gzip", "gzip"),
+    ("br;q=0, gzip", "gzip", "gzip"),
+    ("br", "br", None),
+    ("gzip;q=0", None, None),
+    ("identity", None, None),
+    ("*", "br", "gzip")
+])
+def test_negotiate_encoding(api, data, accept_encoding, with_brotli, without_brotli):
+    import compression
+
+    expected = with_brotli if compression.brotli else without_brotli
+    response = get(api, data, accept_encoding)
+    assert response.status_code == 200
+    assert response.headers.get("Content-Encoding") == expected
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert decode(response) == get(api, data, "identity").get_data()
+
+
+def test_skip_small_and_head_responses(api, data):
+    small = get(api, data, "gzip", data["small_url"])
+    assert small.status_code == 200
+    assert "Content-Encoding" not in small.headers
+    # the client may get a compressed response when the list grows
+    assert "Accept-Encoding" in small.headers["Vary"]
+
+    head = api.test_client().head(data["url"], headers={**data["headers"], "Accept-Encoding": "gzip"})
+    assert head.status_code == 200
+    assert "Content-Encoding" not in head.headers
+
+
+def test_weak_etag_is_not_modified(api, data):
+    response = get(api, data, "gzip")
+    etag: str = response.headers["ETag"]
+    # the compressed body is not the same bytes as the uncompressed body
+    assert etag.startswith('W/"')
+    assert not get(api, data, "identity").headers["ETag"].startswith("W/")
+
+    not_modified = get(api, data, "gzip", **{"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.get_data() == b""
+    assert "Content-Encoding" not in not_modified.headers
+    # the uncompressed copy of client is the same response
+    assert get(api, data, "identity", **{"If-None-Match": etag}).status_code == 304
+
+
+def test_stream_large_responses(api, data, monkeypatch):
+    import compression
+
+    monkeypatch.setattr(compression, "COMPRESSION_STREAM_SIZE", 1024)
+    monkeypatch.setattr(compression, "CHUNK_SIZE", 256)
+    response = get(api, data, "gzip")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert decode(response) == get(api, data, "identity").get_data()
@@ -0,0 +1,65 @@
+import re
+from typing import Dict, Any
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def data(api, make_user, make_task, token_for) -> Dict[str, Any]:
+    """A task created by one user and assigned to another, and a message between them"""
+    from config import db
+    from db import Message
+
+    creator_id: int = make_user()
+    assignee_id: int = make_user()
+    task_id: int = make_task(creator_id, [assignee_id])
+    with api.app_context():
+        message: Message = Message(sender_id=creator_id, receiver_id=assignee_id, title="ETag message title",
+                                   description="m" * 60)
+        db.session.add(message)
+        db.session.commit()
+        message_id: int = message.message_id
+    return {
+        "assignee_id": assignee_id,
+        "headers": {"Authorization": token_for(creator_id)},
+        "urls": [
+            f"/task_routes/get_task?task_id={task_id}",
+            "/task_routes/get_created_tasks",
+            f"/message_routes/get_message?message_id={message_id}"
+        ]
+    }
+
+
+def rename_user(api, token_for, user_id: int, name: str) -> None:
+    response = api.test_client().post("/user_routes/change_user_name", json={"name": name},
+                                      headers={"Authorization": token_for(user_id)})
+    assert response.status_code == 201
+
+
+@pytest.mark.parametrize("idx", [0, 1, 2])
+def test_etag_changes_with_users(api, data, token_for, idx):
+    client = api.test_client()
+    url: str = data["urls"][idx]
+
+    etag: str = client.get(url, headers=data["headers"]).headers["ETag"]
+    assert client.get(url, headers={**data["headers"], "If-None-Match": etag}).status_code == 304
+
+    # the renamed user is in the response, the client should not keep its copy
+    rename_user(api, token_for, data["assignee_id"], f"etag_renamed_{idx}")
+    response = client.get(url, headers={**data["headers"], "If-None-Match": etag})
+    assert response.status_code == 200
+    assert f"etag_renamed_{idx}" in response.get_data(as_text=True)
+    assert response.headers["ETag"] != etag
+
+
+def test_not_modified_task_does_not_query_sections(api, data, count_queries):
+    client = api.test_client()
+    url: str = data["urls"][0]
+    etag: str = client.get(url, headers=data["headers"]).headers["ETag"]
+
+    with count_queries() as statements:
+        response = client.get(url, headers={**data["headers"], "If-None-Match": etag})
+    assert response.status_code == 304
+    # the task and the revision of users, the identity of user is cached by the first request
+    assert len(statements) == 2
+    assert not any(re.search(r'\b(FROM|JOIN) "?(task_comment|subtask|checklist|attachment|user)\b', x) for x in statements)
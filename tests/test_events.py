@@ -0,0 +1,88 @@
+from typing import Dict, Any, List, Tuple
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def data(api, make_user, make_task) -> Dict[str, Any]:
+    """A user with a task and the latest change id"""
+    from utils import get_latest_cursor
+
+    user_id: int = make_user()
+    task_id: int = make_task(user_id, [user_id])
+    with api.app_context():
+        return {"user_id": user_id, "task_id": task_id, "change_id": get_latest_cursor()}
+
+
+def test_stream_reads_changes_of_other_processes(api, data, monkeypatch):
+    import events
+    from config import db
+    from db import ChangeLog
+    from utils import read_change_events
+
+    monkeypatch.setattr(events, "EVENT_HEARTBEAT", 0.05)
+    monkeypatch.setattr(events, "EVENT_POLL_INTERVAL", 0.05)
+    stream = events.stream_events(data["user_id"], data["change_id"], read_change_events)
+    # the stream is subscribed when it starts
+    assert events.event_hub.get_info()["streams"] == 0
+    assert next(stream) == "retry: 3000\n\n"
+    assert events.event_hub.get_info()["streams"] == 1
+    subscription = next(iter(events.event_hub.subscriptions[data["user_id"]]))
+    assert next(stream) == ": heartbeat\n\n"
+
+    # the change is written by another process, the poller of change log wakes up the stream
+    with api.app_context():
+        change: ChangeLog = ChangeLog(user_id=data["user_id"], type="tasks", item_id=data["task_id"])
+        db.session.add(change)
+        db.session.commit()
+        change_id: int = change.change_id
+    message: str = next(stream)
+    for _ in range(100):
+        if not message.startswith(": heartbeat"):
+            break
+        message = next(stream)
+    assert message.startswith("id: ")
+    assert subscription.change_id == change_id
+
+    stream.close()
+    assert events.event_hub.get_info()["streams"] == 0
+
+
+def test_heartbeat_does_not_read_change_log(api, data, monkeypatch):
+    import events
+
+    monkeypatch.setattr(events, "EVENT_HEARTBEAT", 0.01)
+    reads: List[int] = []
+
+    def read_events(user_id: int, change_id: int, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+        reads.append(change_id)
+        return []
+
+    stream = events.stream_events(data["user_id"], data["change_id"], read_events)
+    assert next(stream) == "retry: 3000\n\n"
+    assert [next(stream) for _ in range(5)] == [": heartbeat\n\n"] * 5
+    # only the first read when the stream is opened
+    assert reads == [data["change_id"]]
+    stream.close()
+
+
+def test_unstarted_stream_is_not_subscribed(api, data, token_for):
+    import events
+
+    response = api.test_client().get("/event_routes/stream", headers={"Authorization": token_for(data["user_id"])})
+    assert response.status_code == 200
+    response.close()
+    assert events.event_hub.get_info()["streams"] == 0
+
+
+def test_commit_wakes_up_streams(api, data, token_for):
+    import events
+
+    subscription = events.event_hub.subscribe(data["user_id"], data["change_id"])
+    try:
+        response = api.test_client().post("/task_routes/change_priority", headers={"Authorization": token_for(data["user_id"])},
+                                          json={"taskId": data["task_id"], "priority": "HIGH"})
+        assert response.status_code == 201
+        assert subscription.changed.is_set()
+    finally:
+        events.event_hub.unsubscribe(subscription)
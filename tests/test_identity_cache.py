@@ -0,0 +1,61 @@
+import pytest
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def identity_cache(request, api, tmp_path, monkeypatch):
+    """The identity cache of each backend, used by the authorization and the user routes"""
+    import routes.auth_wrapper
+    import routes.user_routes
+    from cache import MemoryIdentityCache, SQLiteIdentityCache
+
+    cache = SQLiteIdentityCache(60, 100, str(tmp_path / "auth_cache.db")) if request.param == "sqlite" \
+        else MemoryIdentityCache(60, 100)
+    monkeypatch.setattr(routes.auth_wrapper, "identity_cache", cache)
+    monkeypatch.setattr(routes.user_routes, "identity_cache", cache)
+    return cache
+
+
+def get_user(client, token: str, user_id: int) -> int:
+    return client.get(f"/user_routes/get_user?user_id={user_id}", headers={"Authorization": token}).status_code
+
+
+def test_identity_is_cached(api, make_user, token_for, count_queries, identity_cache):
+    client = api.test_client()
+    user_id: int = make_user()
+    token: str = token_for(user_id)
+
+    assert get_user(client, token, user_id) == 200
+    assert identity_cache.get(user_id)["id"] == user_id
+    with count_queries() as statements:
+        assert get_user(client, token, user_id) == 200
+    # only the user of route is read, the authorized user is not
+    assert len(statements) == 1
+
+
+def test_change_user_name_invalidates_identity(api, make_user, token_for, identity_cache, request):
+    client = api.test_client()
+    user_id: int = make_user()
+    token: str = token_for(user_id)
+    name: str = f"renamed {request.node.callspec.id}"
+
+    assert get_user(client, token, user_id) == 200
+    response = client.post("/user_routes/change_user_name", json={"name": name}, headers={"Authorization": token})
+    assert response.status_code == 201
+    assert identity_cache.get(user_id) is None
+
+    # the next request caches the new name
+    assert get_user(client, token, user_id) == 200
+    assert identity_cache.get(user_id)["name"] == name
+
+
+def test_delete_user_invalidates_identity(api, make_user, token_for, identity_cache):
+    client = api.test_client()
+    user_id: int = make_user()
+    token: str = token_for(user_id)
+
+    assert get_user(client, token, user_id) == 200
+    assert client.delete("/user_routes/delete_user", headers={"Authorization": token}).status_code == 201
+    assert identity_cache.get(user_id) is None
+
+    # the token of deleted user is not authorized anymore
+    assert get_user(client, token, user_id) == 401
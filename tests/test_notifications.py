@@ -0,0 +1,93 @@
+from typing import Dict, Any, List
+
+import pytest
+
+
+@pytest.fixture
+def data(make_user, make_task, token_for) -> Dict[str, Any]:
+    """A task created by one user and assigned to another"""
+    creator_id: int = make_user()
+    return {"task_id": make_task(creator_id, [make_user()]), "headers": {"Authorization": token_for(creator_id)}}
+
+
+def get_notifications(api, task_id: int) -> List[Any]:
+    from db import NotificationOutbox
+
+    with api.app_context():
+        return NotificationOutbox.query.filter_by(task_id=task_id).order_by(NotificationOutbox.notification_id).all()
+
+
+def change_priority(api, data: Dict[str, Any], priority: str) -> None:
+    response = api.test_client().post("/task_routes/change_priority", headers=data["headers"],
+                                      json={"taskId": data["task_id"], "priority": priority})
+    assert response.status_code == 201
+
+
+def claim(api, task_id: int) -> None:
+    from config import db
+    from db import NotificationOutbox
+
+    with api.app_context():
+        NotificationOutbox.query.filter_by(task_id=task_id).update({"claim_token": "claimed"})
+        db.session.commit()
+
+
+def test_changes_are_merged_until_claimed(api, data):
+    change_priority(api, data, "HIGH")
+    response = api.test_client().patch("/task_routes/update_task", headers=data["headers"],
+                                       json={"taskId": data["task_id"], "type": "MILESTONE"})
+    assert response.status_code == 201
+    assert [x.title for x in get_notifications(api, data["task_id"])] == ["Task Updated"]
+
+    # the claimed notification is being sent, the next change is a new notification
+    claim(api, data["task_id"])
+    change_priority(api, data, "LOW")
+    notifications = get_notifications(api, data["task_id"])
+    assert [(x.claim_token, x.changes) for x in notifications] == [("claimed", "priority|type"), ("", "priority")]
+
+
+def test_delete_task_removes_pending_notifications(api, data):
+    change_priority(api, data, "HIGH")
+    claim(api, data["task_id"])
+    change_priority(api, data, "LOW")
+
+    response = api.test_client().delete(f"/task_routes/delete_task?task_id={data['task_id']}", headers=data["headers"])
+    assert response.status_code == 201
+    assert [x.claim_token for x in get_notifications(api, data["task_id"])] == ["claimed"]
+
+
+def test_deliver_in_multicast_batches(api, make_user, monkeypatch):
+    import notifications
+    from config import db
+    from db import NotificationOutbox, User
+    from utils import send_notification_to_assignees
+
+    # more devices than one multicast, two users share a device, one device is unregistered
+    user_ids: List[int] = [
+        make_user(push_notifications_token=f"batch-token-{x}") for x in range(notifications.MULTICAST_LIMIT + 2)
+    ]
+    shared_id: int = make_user(push_notifications_token="batch-token-0")
+    actor_id: int = make_user(push_notifications_token="batch-token-actor")
+    transport = notifications.FakeTransport(unregistered_tokens=["batch-token-1"])
+    monkeypatch.setattr(notifications, "transport", transport)
+    monkeypatch.setattr(notifications, "NOTIFICATION_BATCH_SIZE", 10000)
+
+    with api.test_request_context():
+        send_notification_to_assignees(
+            "Batch Title", "Batch body", [*user_ids, user_ids[2], shared_id, actor_id], actor_id
+        )
+        # a second notification of the same content for one user
+        db.session.add(NotificationOutbox(user_id=user_ids[3], title="Batch Title", body="Batch body"))
+        db.session.commit()
+        notifications.deliver_notifications(notifications.claim_notifications())
+        db.session.commit()
+
+        requests: List[List[str]] = [tokens for data, tokens in transport.requests if data["title"] == "Batch Title"]
+        sent_tokens: List[str] = [y for x in requests for y in x]
+        # one multicast per chunk of the limit, each device once, the user that made the change is skipped
+        assert [len(x) for x in requests] == [notifications.MULTICAST_LIMIT, 2]
+        assert sorted(sent_tokens) == sorted(f"batch-token-{x}" for x in range(notifications.MULTICAST_LIMIT + 2))
+        # the sent notifications are removed and the unregistered device is cleared
+        assert NotificationOutbox.query.filter_by(title="Batch Title").count() == 0
+        assert db.session.get(User, user_ids[1]).push_notifications_token == ""
+        assert db.session.get(User, user_ids[0]).push_notifications_token == "batch-token-0"
@@ -0,0 +1,152 @@
+import json
+from base64 import urlsafe_b64encode
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Tuple
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def token(make_user, token_for) -> str:
+    """Authorization token of a new user"""
+    return token_for(make_user())
+
+
+@pytest.mark.parametrize("url", [
+    "/task_routes/get_tasks", "/task_routes/get_created_tasks", "/message_routes/get_received_messages",
+    "/comment_routes/get_comments?task_id=1", "/user_routes/search_users?search_query=pag", "/sync_routes/sync"
+])
+@pytest.mark.parametrize("args, message", [
+    ("limit=abc", "Invalid limit"),
+    ("limit=1.5", "Invalid limit"),
+    ("cursor=zz", "Invalid cursor"),
+    ("cursor=e30=", "Invalid cursor"),  # {}
+    ("cursor=W10=", "Invalid cursor")  # []
+])
+def test_invalid_page_args(api, token, url, args, message):
+    response = api.test_client().get(f"{url}{'&' if '?' in url else '?'}{args}", headers={"Authorization": token})
+    assert response.status_code == 400
+    assert response.get_json() == {"type": "Validation Error", "message": message}
+
+
+def test_valid_page_args(api, token):
+    response = api.test_client().get("/task_routes/get_tasks?limit=-1&cursor=WzBd", headers={"Authorization": token})  # [0]
+    assert response.status_code == 200
+
+
+@pytest.fixture(scope="module")
+def tasks(api, make_user, make_task, token_for) -> Dict[str, Any]:
+    """Tasks of one creator with different statuses, priorities, types and due dates"""
+    creator_id: int = make_user()
+    assignee_id: int = make_user()
+    now: datetime = datetime.now().replace(second=0, microsecond=0)
+    rows: List[Tuple[str, str, str, int]] = [
+        ("OPEN", "HIGH", "TASK", 5), ("COMPLETE", "LOW", "MILESTONE", 2), ("IN PROGRESS", "URGENT", "TASK", 9),
+        ("OPEN", "NORMAL", "MILESTONE", 1), ("ON HOLD", "LOW", "TASK", 7)
+    ]
+    task_ids: List[int] = [
+        make_task(creator_id, [assignee_id], f"Pagination task number {idx}", status=status, priority=priority,
+                  type=task_type, due=now + timedelta(days=days))
+        for idx, (status, priority, task_type, days) in enumerate(rows)
+    ]
+    return {"headers": {"Authorization": token_for(creator_id)}, "task_ids": task_ids, "now": now}
+
+
+def get_all_tasks(api, headers: Dict[str, str], args: str) -> List[int]:
+    """Get the ids of created tasks page by page (one task per page)"""
+    client = api.test_client()
+    task_ids: List[int] = []
+    cursor: str = ""
+    while True:
+        response = client.get(f"/task_routes/get_created_tasks?limit=1&{args}{cursor}", headers=headers)
+        assert response.status_code == 200, response.get_json()
+        task_ids.extend(x["taskId"] for x in response.get_json())
+        if "X-Next-Cursor" not in response.headers:
+            return task_ids
+        cursor = f"&cursor={response.headers['X-Next-Cursor']}"
+
+
+@pytest.mark.parametrize("args, expected", [
+    ("status=OPEN", [0, 3]),
+    ("status=OPEN,ON HOLD&priority=LOW,NORMAL", [3, 4]),
+    ("type=MILESTONE", [1, 3]),
+    ("sort=priority&order=desc", [2, 0, 3, 4, 1]),
+    ("sort=due", [3, 1, 0, 4, 2]),
+    ("sort=title&order=desc&type=TASK", [4, 2, 0]),
+    ("sort=sent_date", [0, 1, 2, 3, 4])
+])
+def test_filter_and_sort_tasks(api, tasks, args, expected):
+    assert get_all_tasks(api, tasks["headers"], args) == [tasks["task_ids"][x] for x in expected]
+
+
+def test_filter_tasks_by_due(api, tasks):
+    from utils import date_to_string
+
+    due_from: str = date_to_string(tasks["now"] + timedelta(days=2))
+    due_to: str = date_to_string(tasks["now"] + timedelta(days=7))
+    assert get_all_tasks(api, tasks["headers"], f"due_from={due_from}&due_to={due_to}&sort=due") == [
+        tasks["task_ids"][x] for x in [1, 0, 4]
+    ]
+
+
+def to_cursor(values: List[Any]) -> str:
+    return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+@pytest.mark.parametrize("args, message", [
+    ("due_from=garbage", "Invalid due_from"),
+    ("due_to=2024-01-01", "Invalid due_to"),
+    ("sort=bogus", "Invalid sort"),
+    ("order=up", "Invalid order"),
+    ("status=NOPE", "Invalid status"),
+    ("status=OPEN,NOPE", "Invalid status"),
+    ("priority=HIGHEST", "Invalid priority"),
+    ("type=EPIC", "Invalid type"),
+    (f"sort=due&cursor={to_cursor([5])}", "Invalid cursor"),
+    (f"sort=due&cursor={to_cursor([5, 1])}", "Invalid cursor"),
+    (f"sort=due&cursor={to_cursor(['yesterday', 1])}", "Invalid cursor"),
+    (f"sort=priority&cursor={to_cursor(['HIGH', 1])}", "Invalid cursor"),
+    (f"cursor={to_cursor([1, 2])}", "Invalid cursor"),
+    (f"cursor={to_cursor([1.5])}", "Invalid cursor")
+])
+def test_invalid_task_args(api, tasks, args, message):
+    client = api.test_client()
+    for url in ["/task_routes/get_tasks", "/task_routes/get_created_tasks"]:
+        response = client.get(f"{url}?{args}", headers=tasks["headers"])
+        assert response.status_code == 400
+        assert response.get_json() == {"type": "Validation Error", "message": message}
+
+
+def test_invalid_section_cursor(api, tasks):
+    # the comments are sorted by date and id
+    response = api.test_client().get(
+        f"/comment_routes/get_comments?task_id={tasks['task_ids'][0]}&cursor={to_cursor([1])}", headers=tasks["headers"]
+    )
+    assert response.status_code == 400
+    assert response.get_json() == {"type": "Validation Error", "message": "Invalid cursor"}
+
+
+def test_lists_use_default_page_size(api, make_user, make_task, token_for):
+    from config import db, DEFAULT_PAGE_SIZE
+    from db import Message
+
+    user_id: int = make_user()
+    other_id: int = make_user()
+    for _ in range(DEFAULT_PAGE_SIZE + 1):
+        make_task(other_id, [user_id])
+    with api.app_context():
+        db.session.add_all([
+            Message(sender_id=user_id, receiver_id=other_id, title="Paged message title", description="m" * 60)
+            for _ in range(DEFAULT_PAGE_SIZE + 1)
+        ])
+        db.session.commit()
+
+    client = api.test_client()
+    # the client did not ask for pages, it still gets the first page and the cursor of next page
+    for url, token in [("/task_routes/get_tasks", token_for(user_id)), ("/task_routes/get_created_tasks", token_for(other_id)),
+                       ("/message_routes/get_sent_messages", token_for(user_id)),
+                       ("/message_routes/get_received_messages", token_for(other_id))]:
+        response = client.get(url, headers={"Authorization": token})
+        assert response.status_code == 200
+        assert len(response.get_json()) == DEFAULT_PAGE_SIZE
+        assert "X-Next-Cursor" in response.headers
@@ -0,0 +1,39 @@
+import time
+from typing import Dict, Any
+
+import bcrypt
+
+PASSWORD: str = "password123"
+
+
+def log_in(client, email: str) -> int:
+    body: Dict[str, Any] = {"email": email, "password": PASSWORD, "notificationToken": ""}
+    return client.post("/auth_routes/log_in", json=body, environ_base={"REMOTE_ADDR": "10.1.0.1"}).status_code
+
+
+def test_legacy_salt_password_is_rehashed(api, make_user, monkeypatch):
+    import passwords
+    from db import User
+
+    # the old global salt, every password was hashed with it
+    salt: bytes = bcrypt.gensalt(rounds=4)
+    monkeypatch.setattr(passwords, "SALT", salt)
+    legacy_password: str = bcrypt.hashpw(PASSWORD.encode(), salt).decode()
+    user_id: int = make_user(email="legacy_salt_user@example.com", password=legacy_password)
+    client = api.test_client()
+
+    assert log_in(client, "legacy_salt_user@example.com") == 201
+
+    # the password is rehashed on a password thread after the log in
+    deadline: float = time.monotonic() + 5
+    with api.app_context():
+        while User.query.filter_by(id=user_id).first().password == legacy_password and time.monotonic() < deadline:
+            time.sleep(0.05)
+        new_password: str = User.query.filter_by(id=user_id).first().password
+
+    assert new_password != legacy_password
+    assert not new_password.encode().startswith(salt)
+    assert not passwords.password_needs_rehash(new_password)
+    assert bcrypt.checkpw(PASSWORD.encode(), new_password.encode())
+    # the user logs in with the new hash
+    assert log_in(client, "legacy_salt_user@example.com") == 201
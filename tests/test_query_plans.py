@@ -0,0 +1,147 @@
+import json
+import re
+from typing import List, Tuple, Any, Dict, Callable
+
+import pytest
+
+# tables of the routes, their queries should search an index instead of reading every row
+ROUTE_TABLES: List[str] = [
+    "task", "task_assignee", "task_comment", "subtask", "subtask_assignee", "checklist", "checklist_assignee",
+    "attachment", "message", "message_reply"
+]
+
+
+@pytest.fixture(scope="module")
+def data(api, make_user, make_task) -> Dict[str, Any]:
+    """Users, a task with every section and messages with replies, the database has enough rows of each table for
+    the query planner to prefer the indexes
+    """
+    from config import db
+    from db import TaskComment, Subtask, Checklist, Attachment, Message, MessageReply
+    from utils import set_assignees
+
+    user_ids: List[int] = [make_user() for _ in range(50)]
+    task_ids: List[int] = [
+        make_task(user_ids[idx % 50], [user_ids[(idx + 1) % 50], user_ids[(idx + 2) % 50]], title=f"Task title number {idx}")
+        for idx in range(200)
+    ]
+    with api.app_context():
+        for idx, task_id in enumerate(task_ids):
+            user_id: int = user_ids[idx % 50]
+            db.session.add_all([
+                TaskComment(description="comment text", user_id=user_id, task_id=task_id),
+                Attachment(task_id=task_id, user_id=user_id, attachment_path="attachments/none", file_name="none")
+            ])
+            subtask: Subtask = Subtask(task_id=task_id, description="s" * 60, creator_id=user_id)
+            checklist: Checklist = Checklist(task_id=task_id, user_id=user_id, description="c" * 60)
+            db.session.add_all([subtask, checklist])
+            set_assignees(subtask, [user_ids[(idx + 1) % 50]])
+            set_assignees(checklist, [user_id, user_ids[(idx + 1) % 50]])
+
+            message: Message = Message(sender_id=user_id, receiver_id=user_ids[(idx + 1) % 50],
+                                       title=f"Message title number {idx}", description="m" * 60)
+            db.session.add(message)
+            db.session.flush()
+            db.session.add(MessageReply(message_id=message.message_id, description="reply text", from_id=user_id))
+        db.session.commit()
+
+        return {
+            "user_id": user_ids[0],
+            "task_id": task_ids[0],
+            "comment_id": TaskComment.query.filter_by(task_id=task_ids[0]).first().comment_id,
+            "subtask_id": Subtask.query.filter_by(task_id=task_ids[0]).first().subtask_id,
+            "checklist_id": Checklist.query.filter_by(task_id=task_ids[0]).first().checklist_id,
+            "message_id": Message.query.filter_by(sender_id=user_ids[0]).first().message_id
+        }
+
+
+@pytest.fixture(scope="module")
+def capture_queries(api, token_for) -> Callable[[List[Tuple[str, str, Dict[str, Any]]], int], List[Tuple[str, Any]]]:
+    """Call the routes and get the statements and parameters they execute"""
+    from sqlalchemy import event
+    from config import db
+
+    def capture(requests: List[Tuple[str, str, Dict[str, Any]]], user_id: int) -> List[Tuple[str, Any]]:
+        statements: List[Tuple[str, Any]] = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if not executemany:
+                statements.append((statement, parameters))
+
+        client = api.test_client()
+        with api.app_context():
+            event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            for method, url, kwargs in requests:
+                response = getattr(client, method)(url, headers={"Authorization": token_for(user_id)}, **kwargs)
+                assert response.status_code < 400, (url, response.get_json())
+        finally:
+            with api.app_context():
+                event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+        return statements
+    return capture
+
+
+def full_scans(api, statements: List[Tuple[str, Any]]) -> List[Tuple[str, str]]:
+    """Get the route tables that are read row by row (SCAN without an index) by the statements"""
+    from config import db
+
+    scans: List[Tuple[str, str]] = []
+    with api.app_context():
+        connection = db.engine.raw_connection()
+        try:
+            for statement, parameters in statements:
+                if not re.match(r"\s*(SELECT|UPDATE|DELETE)", statement, re.IGNORECASE):
+                    continue
+                for row in connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall():
+                    # aliased tables (task_1) are the same table
+                    match = re.match(r"SCAN (\w+?)(_\d+)?\b(?! USING (COVERING )?INDEX)(?! USING INTEGER PRIMARY KEY)",
+                                     row[3])
+                    if match and match.group(1) in ROUTE_TABLES:
+                        scans.append((row[3], statement))
+        finally:
+            connection.close()
+    return scans
+
+
+def test_read_routes_use_indexes(api, data, capture_queries):
+    task_id: int = data["task_id"]
+    message_id: int = data["message_id"]
+    statements = capture_queries([
+        ("get", f"/task_routes/get_task?task_id={task_id}", {}),
+        ("get", "/task_routes/get_tasks", {}),
+        ("get", "/task_routes/get_tasks?limit=5&status=OPEN&sort=due", {}),
+        ("get", "/task_routes/get_created_tasks?limit=5", {}),
+        ("get", f"/comment_routes/get_comments?task_id={task_id}&limit=5", {}),
+        ("get", f"/subtask_routes/get_subtasks?task_id={task_id}&limit=5", {}),
+        ("get", f"/checklist_routes/get_checklists?task_id={task_id}&limit=5", {}),
+        ("get", f"/attachment_routes/get_attachments?task_id={task_id}&limit=5", {}),
+        ("get", "/message_routes/get_sent_messages?limit=5", {}),
+        ("get", "/message_routes/get_received_messages?limit=5", {}),
+        ("get", f"/message_routes/get_message?message_id={message_id}", {}),
+        ("get", "/sync_routes/sync", {})
+    ], data["user_id"])
+
+    assert statements
+    assert full_scans(api, statements) == []
+
+
+def test_write_routes_use_indexes(api, data, capture_queries):
+    task_id: int = data["task_id"]
+    statements = capture_queries([
+        ("post", "/task_routes/change_priority", {"json": {"taskId": task_id, "priority": "HIGH"}}),
+        ("patch", "/task_routes/update_task", {"json": {"taskId": task_id, "type": "MILESTONE"}}),
+        ("post", "/comment_routes/add_comment_to_task",
+         {"json": {"taskId": task_id, "description": "another comment", "replyId": [], "mentionsId": []}}),
+        ("post", "/comment_routes/like_comment", {"json": {"commentId": data["comment_id"]}}),
+        ("post", "/subtask_routes/change_subtask_priority", {"json": {"subtaskId": data["subtask_id"], "priority": "HIGH"}}),
+        ("post", "/checklist_routes/toggle_checklist", {"json": {"checklistId": data["checklist_id"], "check": True}}),
+        ("post", "/message_routes/reply_to_message",
+         {"data": {"replyBody": json.dumps({"messageId": data["message_id"], "description": "another reply"})}}),
+        ("post", "/message_routes/delete_message_from_user", {"json": {"messageId": data["message_id"]}}),
+        ("delete", f"/comment_routes/delete_comment?comment_id={data['comment_id']}", {}),
+        ("delete", f"/task_routes/delete_task?task_id={task_id}", {})
+    ], data["user_id"])
+
+    assert statements
+    assert full_scans(api, statements) == []
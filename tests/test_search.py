@@ -0,0 +1,81 @@
+from typing import Dict, Any, List, Tuple
+
+import pytest
+
+
+@pytest.fixture
+def data(api, make_user, make_task, token_for) -> Dict[str, Any]:
+    """A task of a creator with one assignee, a message between them and an other user, new for each test"""
+    from config import db
+    from db import Message
+
+    creator_id: int = make_user()
+    assignee_id: int = make_user()
+    task_id: int = make_task(creator_id, [assignee_id], "Platypus migration plan")
+    with api.app_context():
+        message: Message = Message(sender_id=creator_id, receiver_id=assignee_id, title="Platypus message title",
+                                   description="m" * 60)
+        db.session.add(message)
+        db.session.commit()
+        message_id: int = message.message_id
+    return {
+        "task_id": task_id,
+        "message_id": message_id,
+        "creator": {"Authorization": token_for(creator_id)},
+        "assignee": {"Authorization": token_for(assignee_id)},
+        "other": {"Authorization": token_for(make_user())}
+    }
+
+
+def search(api, headers: Dict[str, str], search_query: str) -> List[Tuple[str, int]]:
+    response = api.test_client().get(f"/search_routes/search?q={search_query}", headers=headers)
+    assert response.status_code == 200
+    return [(x["type"], x["id"]) for x in response.get_json()]
+
+
+def test_search_respects_visibility(api, data):
+    expected: List[Tuple[str, int]] = [("messages", data["message_id"]), ("tasks", data["task_id"])]
+    assert sorted(search(api, data["creator"], "platypus")) == expected
+    assert sorted(search(api, data["assignee"], "platyp")) == expected
+    assert search(api, data["other"], "platypus") == []
+
+    # the message deleted by the assignee is only found by the creator
+    response = api.test_client().post("/message_routes/delete_message_from_user", json={"messageId": data["message_id"]},
+                                      headers=data["assignee"])
+    assert response.status_code == 201
+    assert search(api, data["assignee"], "platypus") == [("tasks", data["task_id"])]
+    assert sorted(search(api, data["creator"], "platypus")) == expected
+
+
+def test_search_index_follows_changes(api, data):
+    client = api.test_client()
+    response = client.patch("/task_routes/update_task", json={"taskId": data["task_id"], "title": "Echidna migration plan"},
+                            headers=data["creator"])
+    assert response.status_code == 201
+    assert search(api, data["creator"], "platypus") == [("messages", data["message_id"])]
+    assert search(api, data["creator"], "echidna") == [("tasks", data["task_id"])]
+
+    response = client.post("/comment_routes/add_comment_to_task", headers=data["assignee"], json={
+        "taskId": data["task_id"], "description": "the numbat comment", "replyId": [], "mentionsId": []
+    })
+    assert response.status_code == 201
+    [(search_type, comment_id)] = search(api, data["creator"], "numbat")
+    assert search_type == "comments"
+
+    response = client.delete(f"/comment_routes/delete_comment?comment_id={comment_id}", headers=data["assignee"])
+    assert response.status_code == 201
+    assert search(api, data["creator"], "numbat") == []
+
+
+def test_search_is_one_query(api, data, count_queries):
+    client = api.test_client()
+    url: str = "/search_routes/search?q=platypus&limit=1"
+    # the identity of user is cached by the first request
+    response = client.get(url, headers=data["creator"])
+    assert response.headers["X-Next-Cursor"]
+    with count_queries() as statements:
+        assert client.get(f"{url}&cursor={response.headers['X-Next-Cursor']}", headers=data["creator"]).status_code == 200
+
+    # every type of results is searched with one statement and the snippets come from the index
+    assert len(statements) == 1
+    assert "MATCH" in statements[0]
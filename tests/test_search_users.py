@@ -0,0 +1,57 @@
+from typing import Dict, Any, List, Optional
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def data(make_user, token_for) -> Dict[str, Any]:
+    """Users with quokka in their names and the user that searches"""
+    user_ids: List[int] = [make_user(name=f"quokka_{idx}") for idx in range(12)]
+    user_ids.append(make_user(name="the quokka"))
+    return {"user_ids": user_ids, "headers": {"Authorization": token_for(make_user())}}
+
+
+def search(api, headers: Dict[str, str], search_query: str) -> List[str]:
+    """Get the names of every page of results"""
+    client = api.test_client()
+    names: List[str] = []
+    cursor: Optional[str] = ""
+    while cursor is not None:
+        response = client.get(f"/user_routes/search_users?search_query={search_query}&limit=5&cursor={cursor}",
+                              headers=headers)
+        assert response.status_code == 200
+        names += [x["name"] for x in response.get_json()]
+        cursor = response.headers.get("X-Next-Cursor")
+    return names
+
+
+def test_search_is_ranked_and_paged(api, data):
+    names: List[str] = search(api, data["headers"], "quokka")
+    # the names that start with the search query first, then the shorter names
+    assert names == [f"quokka_{idx}" for idx in range(10)] + ["quokka_10", "quokka_11", "the quokka"]
+
+
+def test_search_is_one_indexed_query(api, data, count_queries):
+    client = api.test_client()
+    url: str = "/user_routes/search_users?search_query=quokka&limit=20"
+    # the identity of user is cached by the first request
+    assert client.get(url, headers=data["headers"]).status_code == 200
+    with count_queries() as statements:
+        assert len(client.get(url, headers=data["headers"]).get_json()) == 13
+
+    # the users are projected from the search query, they are not queried again
+    assert len(statements) == 1
+    assert "user_search MATCH" in statements[0]
+
+
+def test_search_index_follows_name_changes(api, make_user, token_for, data):
+    user_id: int = make_user(name="wombat_old")
+    headers: Dict[str, str] = {"Authorization": token_for(user_id)}
+
+    response = api.test_client().post("/user_routes/change_user_name", json={"name": "wombat_new"}, headers=headers)
+    assert response.status_code == 201
+    assert search(api, data["headers"], "wombat") == ["wombat_new"]
+    assert search(api, data["headers"], "_old") == []
+
+    assert api.test_client().delete("/user_routes/delete_user", headers=headers).status_code == 201
+    assert search(api, data["headers"], "wombat") == []
@@ -0,0 +1,24 @@
+from typing import Dict
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def headers(make_user, make_task, token_for) -> Dict[str, str]:
+    """Authorization of a user that created a task"""
+    user_id: int = make_user(name="sidecar_user")
+    make_task(user_id, [user_id], title="Sidecar task title")
+    return {"Authorization": token_for(user_id)}
+
+
+def test_items_with_users_are_wrapped(api, headers):
+    body = api.test_client().get("/task_routes/get_created_tasks?users=sidecar", headers=headers).get_json()
+    assert [x["title"] for x in body["items"]] == ["Sidecar task title"]
+    assert body["items"][0]["creator"] in [int(x) for x in body["users"]]
+
+
+@pytest.mark.parametrize("url", ["/user_routes/search_users?search_query=sidecar", "/search_routes/search?q=sidecar"])
+def test_items_without_users_are_not_wrapped(api, headers, url):
+    response = api.test_client().get(f"{url}&users=sidecar", headers=headers)
+    assert response.status_code == 200
+    assert isinstance(response.get_json(), list)
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from typing import Dict, Any, List
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def data(make_user, make_task) -> Dict[str, Any]:
+    """A task with its creator, an assignee and a user that will be assigned instead"""
+    user_ids: List[int] = [make_user() for _ in range(3)]
+    return {"user_ids": user_ids, "task_id": make_task(user_ids[0], [user_ids[1]])}
+
+
+def test_sections_of_removed_assignee_are_tombstones(api, data, token_for):
+    client = api.test_client()
+    creator_id, assignee_id, new_assignee_id = data["user_ids"]
+    cursor: str = client.get("/sync_routes/sync", headers={"Authorization": token_for(assignee_id)}).get_json()["cursor"]
+
+    response = client.post("/comment_routes/add_comment_to_task", headers={"Authorization": token_for(creator_id)}, json={
+        "taskId": data["task_id"], "description": "comment of the removed assignee", "replyId": [], "mentionsId": []
+    })
+    assert response.status_code == 201
+    response = client.post("/task_routes/edit_assignees", headers={"Authorization": token_for(creator_id)},
+                           json={"taskId": data["task_id"], "assignee": [new_assignee_id]})
+    assert response.status_code == 201
+
+    # the comment was added while the user was an assignee, the user can not see it anymore
+    changes: List[Dict[str, Any]] = client.get(
+        f"/sync_routes/sync?cursor={cursor}", headers={"Authorization": token_for(assignee_id)}
+    ).get_json()["changes"]
+    assert {(x["type"], x["deleted"], x["item"]) for x in changes} == {("comments", True, None), ("tasks", True, None)}
+
+    # the creator still sees the comment
+    changes = client.get(f"/sync_routes/sync?cursor={cursor}", headers={"Authorization": token_for(creator_id)}).get_json()["changes"]
+    assert [x["item"]["description"] for x in changes if x["type"] == "comments"] == ["comment of the removed assignee"]
+
+
+def test_pruned_cursor_requires_resync(api, data, token_for):
+    from config import db
+    from db import ChangeLog
+    from utils import prune_change_log, encode_cursor
+
+    client = api.test_client()
+    headers: Dict[str, str] = {"Authorization": token_for(data["user_ids"][0])}
+    with api.app_context():
+        db.session.add_all([
+            ChangeLog(user_id=data["user_ids"][0], type="tasks", item_id=data["task_id"],
+                      date_changed=datetime.now() - timedelta(days=x)) for x in (60, 40)
+        ])
+        db.session.commit()
+        latest_change_id: int = db.session.query(db.func.max(ChangeLog.change_id)).scalar()
+        assert prune_change_log(30) > 0
+
+    # the changes after cursor 0 were removed, the client should get every item again
+    response = client.get("/sync_routes/sync", headers=headers)
+    assert response.status_code == 410
+    assert response.get_json()["cursor"] == encode_cursor([latest_change_id])
+
+    # the kept change shows which cursors are still valid
+    response = client.get(f"/sync_routes/sync?cursor={encode_cursor([latest_change_id - 1])}", headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()["cursor"] == encode_cursor([latest_change_id])
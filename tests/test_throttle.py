@@ -0,0 +1,53 @@
+from typing import Dict, Any, List
+
+import pytest
+
+EMAIL: str = "throttled_user@example.com"
+PASSWORD: str = "password123"
+
+
+@pytest.fixture(scope="module")
+def client(api, make_user):
+    """The test client and a user that logs in"""
+    from passwords import hash_password
+
+    make_user(email=EMAIL, password=hash_password(PASSWORD))
+    return api.test_client()
+
+
+def log_in(client, password: str, address: str, email: str = EMAIL) -> int:
+    body: Dict[str, Any] = {"email": email, "password": password, "notificationToken": ""}
+    return client.post("/auth_routes/log_in", json=body, environ_base={"REMOTE_ADDR": address}).status_code
+
+
+def test_successful_log_ins_are_not_limited(client):
+    from config import LOGIN_EMAIL_LIMIT
+
+    assert [log_in(client, PASSWORD, "10.0.0.1") for _ in range(LOGIN_EMAIL_LIMIT + 1)] == [201] * (LOGIN_EMAIL_LIMIT + 1)
+
+
+def test_failed_log_ins_do_not_lock_out_other_clients(client):
+    from config import LOGIN_EMAIL_LIMIT
+
+    assert [log_in(client, "wrong_password1", "10.0.0.2") for _ in range(LOGIN_EMAIL_LIMIT)] == [400] * LOGIN_EMAIL_LIMIT
+    assert log_in(client, PASSWORD, "10.0.0.2") == 429
+    # the user logs in from another address
+    assert log_in(client, PASSWORD, "10.0.0.3") == 201
+
+
+def test_failed_log_ins_from_many_clients_are_limited(api, make_user, client):
+    from config import LOGIN_EMAIL_LIMIT, LOGIN_ACCOUNT_LIMIT
+    from passwords import hash_password
+
+    email: str = "guessed_user@example.com"
+    make_user(email=email, password=hash_password(PASSWORD))
+    # each address stays under its own limit
+    addresses: List[str] = [f"10.0.1.{x}" for x in range(LOGIN_ACCOUNT_LIMIT // (LOGIN_EMAIL_LIMIT - 1) + 1)]
+    statuses: List[int] = [
+        log_in(client, "wrong_password1", address, email) for address in addresses for _ in range(LOGIN_EMAIL_LIMIT - 1)
+    ]
+    assert statuses[:LOGIN_ACCOUNT_LIMIT] == [400] * LOGIN_ACCOUNT_LIMIT
+    assert set(statuses[LOGIN_ACCOUNT_LIMIT:]) == {429}
+    # the email is limited from a new address too, the other users are not
+    assert log_in(client, PASSWORD, "10.0.2.1", email) == 429
+    assert log_in(client, PASSWORD, "10.0.2.1") == 201
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Tuple
+
+import pytest
+
+
+@pytest.fixture
+def data(api, make_user, make_task, token_for) -> Dict[str, Any]:
+    """A new subtask of a creator (not an assignee) with two assignees for each test"""
+    from config import db
+    from db import Subtask, User
+    from utils import set_assignees
+
+    creator_id: int = make_user()
+    assignee_ids: List[int] = [make_user(), make_user()]
+    task_id: int = make_task(creator_id, assignee_ids)
+    with api.app_context():
+        subtask: Subtask = Subtask(task_id=task_id, description="Subtask description " * 3, creator_id=creator_id,
+                                   due=datetime.now() + timedelta(days=3))
+        db.session.add(subtask)
+        set_assignees(subtask, assignee_ids)
+        db.session.commit()
+        return {
+            "subtask_id": subtask.subtask_id,
+            "creator_id": creator_id,
+            "creator_name": db.session.get(User, creator_id).name,
+            "assignee_ids": assignee_ids,
+            "assignee_name": db.session.get(User, assignee_ids[0]).name,
+            "creator": {"Authorization": token_for(creator_id)},
+            "assignee": {"Authorization": token_for(assignee_ids[0])}
+        }
+
+
+def update_subtask(api, headers: Dict[str, str], body: Dict[str, Any]):
+    return api.test_client().patch("/subtask_routes/update_subtask", headers=headers, json=body)
+
+
+def get_notifications(api, user_ids: List[int]) -> List[Tuple[int, str, str]]:
+    from config import db
+    from db import NotificationOutbox
+
+    with api.app_context():
+        return [
+            (x.user_id, x.title, x.body) for x in db.session.query(NotificationOutbox)
+            .filter(NotificationOutbox.user_id.in_(user_ids)).order_by(NotificationOutbox.user_id)
+        ]
+
+
+def test_creator_can_not_change_status(api, data):
+    # the creator is not an assignee, the status is rejected with the valid description
+    response = update_subtask(api, data["creator"], {
+        "subtaskId": data["subtask_id"], "description": "New subtask description " * 3, "status": "COMPLETE"
+    })
+    assert response.status_code == 400
+    assert response.get_json() == {"type": "Validation Error", "message": "Only assignees can edit status"}
+    assert get_notifications(api, data["assignee_ids"]) == []
+
+
+def test_assignee_can_not_change_priority(api, data):
+    response = update_subtask(api, data["assignee"], {
+        "subtaskId": data["subtask_id"], "priority": "HIGH", "status": "COMPLETE"
+    })
+    assert response.status_code == 400
+    assert response.get_json() == {"type": "Validation Error", "message": "Only task creator can edit priority"}
+
+
+def test_combined_notification(api, data):
+    from utils import date_to_string
+
+    response = update_subtask(api, data["creator"], {
+        "subtaskId": data["subtask_id"], "description": "New subtask description " * 3, "priority": "HIGH",
+        "due": date_to_string(datetime.now() + timedelta(days=5))
+    })
+    assert response.status_code == 201
+    # one notification with every change to each assignee
+    assert get_notifications(api, [data["creator_id"], *data["assignee_ids"]]) == [
+        (x, "Subtask Updated", f"{data['creator_name']} updated description, priority and due date of subtask.")
+        for x in data["assignee_ids"]
+    ]
+
+
+def test_status_notification(api, data):
+    response = update_subtask(api, data["assignee"], {"subtaskId": data["subtask_id"], "status": "COMPLETE"})
+    assert response.status_code == 201
+    # the creator and the other assignee know the status, the assignee that changed it does not
+    assert get_notifications(api, [data["creator_id"], *data["assignee_ids"]]) == sorted([
+        (x, "Subtask Status Updated", f"{data['assignee_name']} changed status of subtask.")
+        for x in [data["creator_id"], data["assignee_ids"][1]]
+    ])
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+from typing import Dict, Any
+
+import pytest
+
+
+@pytest.fixture
+def data(api, make_user, make_task, token_for) -> Dict[str, Any]:
+    """A new task of a creator with one assignee for each test"""
+    creator_id: int = make_user()
+    assignee_id: int = make_user()
+    task_id: int = make_task(creator_id, [assignee_id], "Task title before update", priority="LOW", type="TASK")
+    return {
+        "task_id": task_id,
+        "creator": {"Authorization": token_for(creator_id)},
+        "assignee": {"Authorization": token_for(assignee_id)}
+    }
+
+
+def update_task(api, headers: Dict[str, str], body: Dict[str, Any]):
+    return api.test_client().patch("/task_routes/update_task", headers=headers, json=body)
+
+
+def get_task(api, task_id: int):
+    from config import db
+    from db import Task
+
+    with api.app_context():
+        task: Task = db.session.get(Task, task_id)
+        db.session.expunge(task)
+        return task
+
+
+def test_update_several_fields(api, data):
+    from utils import date_to_string, string_to_date
+
+    before = get_task(api, data["task_id"])
+    due: str = date_to_string(datetime.now() + timedelta(days=10))
+    response = update_task(api, data["creator"], {
+        "taskId": data["task_id"], "title": "Task title after update", "priority": "URGENT", "due": due
+    })
+    assert response.status_code == 201
+
+    after = get_task(api, data["task_id"])
+    assert (after.title, after.priority, after.due) == ("Task title after update", "URGENT", string_to_date(due))
+    # the other fields are not changed
+    assert (after.description, after.type, after.assignee) == (before.description, before.type, before.assignee)
+    assert after.revision == before.revision + 1
+
+
+@pytest.mark.parametrize("fields, message", [
+    ({"title": "Valid new task title", "due": "01/01/2020 10:00 AM"}, "Due should not be earlier than now"),
+    ({"title": "Valid new task title", "due": "garbage"}, "Invalid due date"),
+    ({"title": "Valid new task title", "assignee": []}, "Assignees should range from 1 to 5"),
+    ({}, "No fields to update")
+])
+def test_invalid_update_changes_nothing(api, data, fields, message):
+    before = get_task(api, data["task_id"])
+    response = update_task(api, data["creator"], {"taskId": data["task_id"], **fields})
+    assert response.status_code == 400
+    assert response.get_json() == {"type": "Validation Error", "message": message}
+
+    after = get_task(api, data["task_id"])
+    assert (after.title, after.due, after.revision) == (before.title, before.due, before.revision)
+
+
+@pytest.mark.parametrize("fields, message", [
+    ({"priority": "HIGH"}, "Only task creator can edit priority"),
+    ({"type": "MILESTONE"}, "Only task creator can edit type"),
+    ({"title": "Title from the assignee"}, "Only task creator can edit name")
+])
+def test_only_creator_updates(api, data, fields, message):
+    response = update_task(api, data["assignee"], {"taskId": data["task_id"], **fields})
+    assert response.status_code == 400
+    assert response.get_json() == {"type": "Validation Error", "message": message}
+
+    after = get_task(api, data["task_id"])
+    assert (after.priority, after.type, after.title) == ("LOW", "TASK", "Task title before update")
@@ -0,0 +1,53 @@
+import re
+from typing import Dict, Any, List
+
+import pytest
+
+# statements that read users (e.g. SELECT ... FROM "user" WHERE "user".id IN (...))
+USER_QUERY: str = r'\bFROM "?user"?\b'
+
+
+@pytest.fixture(scope="module")
+def data(api, make_user, make_task, token_for) -> Dict[str, Any]:
+    """Two tasks of one creator, a small task and a large task with comments, subtasks and checklists of many users"""
+    from config import db
+    from db import TaskComment, Subtask, Checklist
+    from utils import set_assignees
+
+    creator_id: int = make_user()
+    user_ids: List[int] = [make_user() for _ in range(20)]
+    task_ids: List[int] = [make_task(creator_id, user_ids[:count], title=f"Loader task {count}") for count in (2, 20)]
+    with api.app_context():
+        for task_id, count in zip(task_ids, (2, 20)):
+            for user_id in user_ids[:count]:
+                db.session.add(TaskComment(description="comment text", user_id=user_id, task_id=task_id))
+                subtask: Subtask = Subtask(task_id=task_id, description="s" * 60, creator_id=user_id)
+                checklist: Checklist = Checklist(task_id=task_id, user_id=user_id, description="c" * 60)
+                db.session.add_all([subtask, checklist])
+                set_assignees(subtask, [user_id, creator_id])
+                set_assignees(checklist, [user_id])
+        db.session.commit()
+    return {"task_ids": task_ids, "headers": {"Authorization": token_for(creator_id)}}
+
+
+def get(api, url: str, headers: Dict[str, str], count_queries) -> List[str]:
+    """Get the url and the statements it executed"""
+    client = api.test_client()
+    # the identity of user is cached by the first request
+    assert client.get(url, headers=headers).status_code == 200
+    with count_queries() as statements:
+        assert client.get(url, headers=headers).status_code == 200
+    return statements
+
+
+def test_task_users_are_loaded_once(api, data, count_queries):
+    small, large = [get(api, f"/task_routes/get_task?task_id={x}", data["headers"], count_queries) for x in data["task_ids"]]
+
+    assert len([x for x in large if re.search(USER_QUERY, x)]) == 1
+    # the number of statements does not depend on the number of users in task
+    assert len(small) == len(large)
+
+
+def test_task_list_users_are_loaded_once(api, data, count_queries):
+    statements: List[str] = get(api, "/task_routes/get_created_tasks", data["headers"], count_queries)
+    assert len([x for x in statements if re.search(USER_QUERY, x)]) == 1
@@ -0,0 +1,94 @@
+import math
+import threading
+import time
+from typing import Optional, Tuple, Hashable
+
+from cachetools import TTLCache
+from flask import request, jsonify, Response
+
+from config import LOGIN_EMAIL_LIMIT, LOGIN_IP_LIMIT, LOGIN_ACCOUNT_LIMIT
+
+
+class TokenBucketLimiter:
+    """Limit the attempts per key with token buckets, each key can make up to limit attempts at once and gets back
+    one attempt every period / limit seconds
+    """
+
+    def __init__(self, limit: int, period: int = 60, size: int = 100000):
+        """
+        :param limit: maximum attempts in period
+        :param period: seconds to fill an empty bucket
+        :param size: maximum number of keys kept, a bucket not used for a period is full so it can be removed
+        """
+        self.capacity: int = limit
+        self.rate: float = limit / period
+        self.buckets: TTLCache = TTLCache(maxsize=size, ttl=period)
+        self.lock: threading.Lock = threading.Lock()
+
+    def get_wait(self, key: Hashable) -> float:
+        """Check the bucket of key without taking an attempt
+
+        :param key: the key to limit (e.g. email, client address)
+        :return: 0 if an attempt is allowed, otherwise the seconds to wait
+        """
+        now: float = time.monotonic()
+        with self.lock:
+            tokens, last = self.buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last) * self.rate)
+            return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    def acquire(self, key: Hashable) -> float:
+        """Take an attempt from the bucket of key
+
+        :param key: the key to limit (e.g. email, client address)
+        :return: 0 if the attempt is allowed, otherwise the seconds to wait
+        """
+        now: float = time.monotonic()
+        with self.lock:
+            tokens, last = self.buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                self.buckets[key] = (tokens - 1, now)
+                return 0.0
+            self.buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+
+# failed attempts of the same email from the same client address on log in and change password, keyed on both so
+# others can not lock the user out by failing to log in with the email of user
+email_limiter: TokenBucketLimiter = TokenBucketLimiter(LOGIN_EMAIL_LIMIT)
+# failed attempts of the same email from every client address, a higher limit over an hour so the password can not be
+# guessed from many addresses but the user is rarely locked out by others
+account_limiter: TokenBucketLimiter = TokenBucketLimiter(LOGIN_ACCOUNT_LIMIT, period=3600)
+# attempts of the same client address on sign up, log in and change password
+ip_limiter: TokenBucketLimiter = TokenBucketLimiter(LOGIN_IP_LIMIT)
+
+
+def throttle(email: Optional[str] = None) -> Optional[Tuple[Response, int]]:
+    """Limit the attempts of the client address of request and the failed attempts of the email from that address and
+    from every address (see throttle_failure)
+
+    :param email: the email used on the attempt, None to limit the client address only
+    :return: the too many requests response if the attempt is not allowed, otherwise None
+    """
+    wait: float = ip_limiter.acquire(request.remote_addr)
+    if email:
+        wait = max(
+            wait, email_limiter.get_wait((email.lower(), request.remote_addr)), account_limiter.get_wait(email.lower())
+        )
+    if not wait:
+        return None
+
+    response: Response = jsonify({"type": "Too Many Requests", "message": "Too many attempts, try again later"})
+    response.headers["Retry-After"] = str(math.ceil(wait))
+    return response, 429
+
+
+def throttle_failure(email: str) -> None:
+    """Count the failed attempt of the email from the client address of request and from every address, the successful
+    attempts are not counted so the user is only limited after failing
+
+    :param email: the email used on the attempt
+    """
+    email_limiter.acquire((email.lower(), request.remote_addr))
+    account_limiter.acquire(email.lower())
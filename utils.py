@@ -1,18 +1,75 @@
+import hashlib
 import io
+import json
+import os
+import random
 import re
-from base64 import encodebytes
-from datetime import datetime
-
-import bcrypt
-from PIL import Image
-from firebase_admin import messaging
-from typing import List, Dict, Optional, Any, Set
+import threading
+from base64 import encodebytes, urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+from PIL.ImageFont import FreeTypeFont
+from cachetools import LRUCache
+from flask import g, request, has_request_context, url_for, jsonify, Response
+from flask_sqlalchemy.query import Query
+from sqlalchemy import desc, tuple_, case, func, text, inspect, or_, and_, exists, select, literal, literal_column, \
+    table, union_all, insert
+from sqlalchemy.sql import column as sql_column
+from typing import List, Dict, Optional, Any, Set, Iterable, Tuple, Union, Type, Callable
 
 from werkzeug.datastructures import FileStorage
 from werkzeug.utils import secure_filename
 
-from config import EMAIL_REGEX, PASSWORD_REGEX, NAME_REGEX, ALLOWED_FILE_EXTENSIONS
-from db import User, Task, Message, TaskComment, Subtask, Checklist, Attachment, MessageReply
+from config import EMAIL_REGEX, PASSWORD_REGEX, NAME_REGEX, ALLOWED_FILE_EXTENSIONS, AVATAR_CACHE_SIZE, \
+    DELETED_USER_IMAGE, db, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NOTIFICATION_COALESCE_WINDOW, CHANGE_LOG_RETENTION_DAYS, \
+    UNPAGED_LISTS
+from db import User, Task, Message, TaskComment, Subtask, Checklist, Attachment, MessageReply, TaskAssignee, \
+    SubtaskAssignee, ChecklistAssignee, NotificationOutbox, ChangeLog, Revision
+from events import queue_events
+from passwords import check_password, password_needs_rehash, rehash_password_later
+
+# priorities of tasks/subtasks from lowest to highest
+TASK_PRIORITIES: List[str] = ["LOW", "NORMAL", "HIGH", "URGENT"]
+# assignee table and its id column of the items with assignees
+ASSIGNEE_TABLES: Dict[Type[db.Model], Tuple[Type[db.Model], str]] = {
+    Task: (TaskAssignee, "task_id"),
+    Subtask: (SubtaskAssignee, "subtask_id"),
+    Checklist: (ChecklistAssignee, "checklist_id")
+}
+# statuses and types of tasks/subtasks the tasks can be filtered by
+TASK_STATUSES: List[str] = ["OPEN", "IN PROGRESS", "ON HOLD", "COMPLETE"]
+TASK_TYPES: List[str] = ["TASK", "MILESTONE"]
+# fields of task that can be changed at once (request field -> name of change in notifications)
+TASK_UPDATE_FIELDS: Dict[str, str] = {
+    "title": "name",
+    "description": "description",
+    "priority": "priority",
+    "type": "type",
+    "due": "due date",
+    "assignee": "assignees"
+}
+# fields of subtask that can be changed at once (request field -> name of change in notifications)
+SUBTASK_UPDATE_FIELDS: Dict[str, str] = {
+    "description": "description",
+    "priority": "priority",
+    "type": "type",
+    "due": "due date",
+    "assignee": "assignees",
+    "status": "status"
+}
+
+# encoded avatars (image path -> (modified time, base64 encoded image)), shared by all requests of the worker
+avatar_cache: LRUCache = LRUCache(maxsize=AVATAR_CACHE_SIZE)
+avatar_cache_lock: threading.Lock = threading.Lock()
+avatar_cache_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+
+class InvalidQueryArgs(ValueError):
+    """Raised when the filter, sort or page query parameters of the client are not valid, the routes return the
+    message as a validation error
+    """
 
 
 def remove_item_from_stringed_list(stringed_list: str, item: int) -> str:
@@ -49,6 +106,41 @@ def int_list_to_string(lst: List[int]) -> str:
     return ','.join([str(x) for x in lst])
 
 
+def set_assignees(item: Union[Task, Subtask, Checklist], assignees: List[int]) -> None:
+    """Change the assignees of task/subtask/checklist, the assignees are saved as rows in its assignee table that
+    decides who is an assignee (see get_assignee_ids) and as stringed int list in the item that keeps their order for
+    the responses
+
+    :param item: the task/subtask/checklist, should be added to the session
+    :param assignees: ids of the assignees
+    """
+    assignee_model: Type[db.Model]
+    id_column: str
+    assignee_model, id_column = ASSIGNEE_TABLES[type(item)]
+
+    item.assignee = int_list_to_string(assignees)
+    # flush the new item to get its id
+    if getattr(item, id_column) is None:
+        db.session.flush()
+
+    item_id: int = getattr(item, id_column)
+    assignee_model.query.filter_by(**{id_column: item_id}).delete()
+    db.session.add_all([assignee_model(**{id_column: item_id}, user_id=x) for x in dict.fromkeys(assignees)])
+
+
+def get_assignee_ids(item: Union[Task, Subtask, Checklist]) -> List[int]:
+    """Get the assignees of task/subtask/checklist from its assignee table, every check of who is an assignee uses it
+    instead of the stringed int list of item
+
+    :param item: the task/subtask/checklist
+    :return: ids of the assignees
+    """
+    assignee_model: Type[db.Model]
+    id_column: str
+    assignee_model, id_column = ASSIGNEE_TABLES[type(item)]
+    return [x.user_id for x in assignee_model.query.filter_by(**{id_column: getattr(item, id_column)}).all()]
+
+
 def string_to_list(string: str) -> List[str]:
     """Convert stringed list with pipe as separator to string list"""
     return string.split('|') if string else []
@@ -69,6 +161,534 @@ def string_to_date(string: str) -> datetime:
     return datetime.strptime(string, "%d/%m/%Y %I:%M %p")
 
 
+def encode_cursor(values: List[Any]) -> str:
+    """Convert the sort values of the last item in page to opaque cursor string sent to the client"""
+    return urlsafe_b64encode(json.dumps([x.isoformat() if isinstance(x, datetime) else x for x in values]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Convert the cursor string from the client back to the sort values, raises ValueError if it is malformed"""
+    values: Any = json.loads(urlsafe_b64decode(cursor.encode()))
+    if not isinstance(values, list) or not values or not all(isinstance(x, (str, int, float)) for x in values):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def get_page_size(always: bool = False) -> Optional[int]:
+    """Get the number of items per page the client asks (limit and cursor query parameters)
+
+    :param always: (Optional) use the default page size if the client did not ask for pages
+    :return: the page size or None if the client did not ask for pages
+    """
+    if not always and "limit" not in request.args and "cursor" not in request.args:
+        return None
+    return max(1, min(int(request.args.get("limit", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+
+
+def validate_page_args() -> Optional[Tuple[Response, int]]:
+    """Check the limit and cursor query parameters before every request, so every paginated route rejects them with
+    the same validation error instead of failing inside the route
+
+    :return: the validation error or None if the parameters are valid (the request continues to the route)
+    """
+    if "limit" in request.args and not re.fullmatch(r"-?\d+", request.args["limit"]):
+        return jsonify({"type": "Validation Error", "message": "Invalid limit"}), 400
+    if request.args.get("cursor"):
+        try:
+            decode_cursor(request.args["cursor"])
+        except ValueError:
+            return jsonify({"type": "Validation Error", "message": "Invalid cursor"}), 400
+    return None
+
+
+def decode_sort_values(cursor: str, sort_columns: List[Any]) -> List[Any]:
+    """Convert the cursor from the client to the values of sort columns
+
+    :param cursor: the cursor of client (see encode_cursor)
+    :param sort_columns: columns the items are sorted by
+    :return: one value for each sort column
+    :raises InvalidQueryArgs: if the cursor does not have a value of the right type for each sort column
+    """
+    values: List[Any] = decode_cursor(cursor)
+    if len(values) != len(sort_columns):
+        raise InvalidQueryArgs("Invalid cursor")
+
+    for idx, (column, value) in enumerate(zip(sort_columns, values)):
+        try:
+            python_type: Optional[type] = column.type.python_type
+        except NotImplementedError:
+            # expressions without type (e.g. the rank of search) accept any value
+            python_type = None
+
+        if python_type is datetime:
+            try:
+                values[idx] = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise InvalidQueryArgs("Invalid cursor")
+        elif python_type is int and (not isinstance(value, int) or isinstance(value, bool)) or \
+                python_type is float and not isinstance(value, (int, float)) or \
+                python_type is str and not isinstance(value, str):
+            raise InvalidQueryArgs("Invalid cursor")
+    return values
+
+
+def paginate(query: Query, sort_columns: List[Any], descending: bool = False,
+             cursor_values: Optional[Callable[[Any], List[Any]]] = None,
+             first_page: bool = False, always: bool = False) -> Tuple[List[Any], Optional[str]]:
+    """Get the page of query the client asks, pages are continued from the cursor (sort values of the last item
+    in previous page) so every page is an index range no matter how many items are before it
+
+    :param query: the query of items
+    :param sort_columns: columns the items are sorted by, the last column should be unique (e.g. primary key)
+    :param descending: true if the items are sorted from highest to lowest
+    :param cursor_values: (Optional) get the sort values of item, needed if a sort column is an expression
+    :param first_page: (Optional) ignore the cursor of client and get the first page
+    :param always: (Optional) get a page even if the client did not ask for pages
+    :return: the items in page and the cursor of next page (None if there are no more items)
+    :raises InvalidQueryArgs: if the cursor is not from the same sort (e.g. the client changed the sort)
+    """
+    page_size: Optional[int] = get_page_size(always)
+    query = query.order_by(*[desc(x) if descending else x for x in sort_columns])
+
+    # return every item if the client did not ask for pages
+    if page_size is None:
+        return query.all(), None
+
+    cursor: Optional[str] = None if first_page else request.args.get("cursor")
+    if cursor:
+        # continue after the last item of previous page
+        values: List[Any] = decode_sort_values(cursor, sort_columns)
+        key: Any = tuple_(*sort_columns)
+        query = query.filter(key < tuple_(*values) if descending else key > tuple_(*values))
+
+    # get one more item to know if there is a next page
+    items: List[Any] = query.limit(page_size + 1).all()
+    if len(items) <= page_size:
+        return items, None
+    items = items[:page_size]
+    return items, encode_cursor(cursor_values(items[-1]) if cursor_values else [getattr(items[-1], x.key) for x in sort_columns])
+
+
+def query_tasks(query: Query) -> Tuple[List[Task], Optional[str]]:
+    """Filter, sort and paginate tasks with the query parameters of the client
+
+    status, priority, type = comma separated values to match (e.g. status=OPEN,IN PROGRESS)
+    due_from, due_to = range of due date (e.g. due_from=01/01/2024 12:00 AM)
+    sort = due, priority, sent_date or title, the tasks are sorted by id if not specified
+    order = asc or desc
+    limit, cursor = pagination (see paginate), the first page if not specified (unless UNPAGED_LISTS)
+
+    :param query: the query of tasks
+    :return: the tasks in page and the cursor of next page (None if there are no more tasks)
+    :raises InvalidQueryArgs: if a query parameter is not valid
+    """
+    for arg, column, allowed in (("status", Task.status, TASK_STATUSES), ("priority", Task.priority, TASK_PRIORITIES),
+                                 ("type", Task.type, TASK_TYPES)):
+        if request.args.get(arg):
+            values: List[str] = request.args.get(arg).split(",")
+            if not all(x in allowed for x in values):
+                raise InvalidQueryArgs(f"Invalid {arg}")
+            query = query.filter(column.in_(values))
+    for arg in ("due_from", "due_to"):
+        if request.args.get(arg):
+            try:
+                due: datetime = string_to_date(request.args.get(arg))
+            except ValueError:
+                raise InvalidQueryArgs(f"Invalid {arg}")
+            query = query.filter(Task.due >= due if arg == "due_from" else Task.due <= due)
+
+    # priorities are sorted by its level (LOW to URGENT), not lexicographically
+    priority_level: Any = case({x: i for i, x in enumerate(TASK_PRIORITIES)}, value=Task.priority, else_=len(TASK_PRIORITIES))
+    sort_columns: Dict[str, Any] = {"due": Task.due, "priority": priority_level, "sent_date": Task.date_sent, "title": Task.title}
+    sort: Optional[str] = request.args.get("sort") or None
+    if sort is not None and sort not in sort_columns:
+        raise InvalidQueryArgs("Invalid sort")
+    if request.args.get("order", "asc") not in ("asc", "desc"):
+        raise InvalidQueryArgs("Invalid order")
+    sort_column: Optional[Any] = sort_columns.get(sort)
+
+    return paginate(
+        query,
+        [sort_column, Task.task_id] if sort_column is not None else [Task.task_id],
+        descending=request.args.get("order") == "desc",
+        cursor_values=(lambda x: [get_priority_level(x.priority), x.task_id]) if sort == "priority" else None,
+        always=not UNPAGED_LISTS
+    )
+
+
+def query_users(search_query: str, user_id: int) -> Tuple[List[Any], Optional[str]]:
+    """Search the users by name, users whose name starts with the search query come first then the shorter names,
+    the results are always paginated (limit and cursor query parameters)
+
+    The names are matched with the trigram index (user_search table) on SQLite, short search queries and other
+    databases match the names without index
+
+    :param search_query: the text to find in names
+    :param user_id: the user that searches, not included in the results
+    :return: the id, name and image path of users in page and the cursor of next page
+    """
+    query: Query = db.session.query(User.id, User.name, User.image_path).filter(User.id != user_id)
+
+    # trigram index needs 3 characters at least
+    if len(search_query) >= 3 and search_table_available("user_search"):
+        phrase: str = '"' + search_query.replace('"', '""') + '"'
+        query = query.filter(User.id.in_(text("SELECT rowid FROM user_search WHERE user_search MATCH :phrase").bindparams(phrase=phrase)))
+    else:
+        query = query.filter(User.name.icontains(search_query, autoescape=True))
+
+    starts_with: Any = case((User.name.istartswith(search_query, autoescape=True), 0), else_=1)
+    return paginate(
+        query,
+        [starts_with, func.length(User.name), User.id],
+        cursor_values=lambda x: [0 if x.name.lower().startswith(search_query.lower()) else 1, len(x.name), x.id],
+        always=True
+    )
+
+
+@lru_cache(maxsize=None)
+def search_table_available(search_table: str) -> bool:
+    """Check if the database has the full-text search table (SQLite only, created by the migrations)"""
+    return db.engine.dialect.name == "sqlite" and inspect(db.engine).has_table(search_table)
+
+
+def to_search_phrase(search_query: str) -> Optional[str]:
+    """Convert the text of client to full-text search query that matches every word, the last word is matched
+    as prefix for searching while typing (e.g. fix log -> "fix" "log"*)
+
+    :param search_query: the text of client
+    :return: the full-text search query or None if there are no words
+    """
+    words: List[str] = re.findall(r"\w+", search_query)
+    if not words:
+        return None
+    return " ".join(f'"{x}"' for x in words) + "*"
+
+
+def search_content(search_query: str, user_id: int, types: List[str]) -> Tuple[List[Any], Optional[str]]:
+    """Search the tasks, subtasks, comments and messages the user can see, best matches first, the results are
+    always paginated (limit and cursor query parameters)
+
+    The user can see the tasks they created or assigned to, the subtasks and comments of those tasks, and the
+    messages they sent or received that they did not delete (same as get_tasks, get_created_tasks and the inbox)
+
+    :param search_query: full-text search query (see to_search_phrase)
+    :param user_id: the user that searches
+    :param types: the types of results (SEARCH_TYPES)
+    :return: the results in page (type, id, task id, title, snippet, date sent) and the cursor of next page
+    """
+    task_visible: Any = or_(Task.creator_id == user_id, exists().where(TaskAssignee.task_id == Task.task_id, TaskAssignee.user_id == user_id))
+    message_visible: Any = or_(
+        and_(Message.sender_id == user_id, Message.deleted_from_sender == False),
+        and_(Message.receiver_id == user_id, Message.deleted_from_receiver == False)
+    )
+
+    selects: List[Any] = []
+    for search_type in types:
+        search_table: str = SEARCH_TYPES[search_type]["table"]
+        fts: Any = table(search_table, sql_column("rowid"))
+        model: Type[db.Model] = SEARCH_TYPES[search_type]["model"]
+        id_column: Any = SEARCH_TYPES[search_type]["id"]
+
+        if model is Message:
+            title_columns: List[Any] = [literal(None).label("task_id"), Message.title]
+            visible: Any = message_visible
+        else:
+            title_columns = [Task.task_id, Task.title]
+            visible = task_visible
+
+        select_type: Any = select(
+            literal(search_type).label("type"),
+            id_column.label("id"),
+            *title_columns,
+            func.snippet(literal_column(search_table), -1, "<b>", "</b>", "...", 12).label("snippet"),
+            model.date_sent,
+            func.bm25(literal_column(search_table)).label("rank")
+        ).select_from(fts).join(model, id_column == fts.c.rowid).where(
+            literal_column(search_table).op("MATCH")(search_query),
+            visible
+        )
+        # subtasks and comments are visible with their task
+        if model in (Subtask, TaskComment):
+            select_type = select_type.join(Task, Task.task_id == model.task_id)
+        selects.append(select_type)
+
+    results: Any = union_all(*selects).subquery()
+    return paginate(
+        db.session.query(results),
+        [results.c.rank, results.c.type, results.c.id],
+        always=True
+    )
+
+
+def query_task_section(section: str, task_id: int, first_page: bool = False) -> Tuple[List[Any], Optional[str]]:
+    """Get the comments, subtasks, checklists or attachments of task, in pages if the client asks
+
+    :param section: comments, subtasks, checklists or attachments
+    :param task_id: the task of items
+    :param first_page: (Optional) ignore the cursor of client and get the first page
+    :return: the items in page and the cursor of next page (None if there are no more items)
+    """
+    model: Type[db.Model] = TASK_SECTIONS[section]["model"]
+    return paginate(model.query.filter_by(task_id=task_id), TASK_SECTIONS[section]["sort"], first_page=first_page)
+
+
+def get_priority_level(priority: str) -> int:
+    """Get the level of priority used for sorting (LOW = 0 to URGENT = 3)"""
+    return TASK_PRIORITIES.index(priority) if priority in TASK_PRIORITIES else len(TASK_PRIORITIES)
+
+
+def page_response(items: List[Dict[str, Any]], next_cursor: Optional[str], with_users: bool = True) -> Response:
+    """Create the response of list, the cursor of next page is sent in X-Next-Cursor header (the list is wrapped with
+    the users of items if the client asks for the users sidecar, see jsonify_with_users)
+
+    :param items: the mapped items
+    :param next_cursor: the cursor of next page or None if there are no more items
+    :param with_users: (Optional) false if the items do not have users (map_user), the list is never wrapped
+    :return: response with the items
+    """
+    response: Response = jsonify_with_users(items) if with_users else jsonify(items)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+def touch_message(message_id: int) -> None:
+    """Increase the revision of message, every route that changes the message or its replies calls it
+
+    :param message_id: the changed message
+    """
+    Message.query.filter_by(message_id=message_id).update({"revision": Message.revision + 1}, synchronize_session=False)
+
+
+def make_etag(*parts: Any) -> str:
+    """Create the ETag of response from the revisions it is built from, the query parameters are included since they
+    change the response (e.g. include, limit and cursor)
+
+    :param parts: the ids and revisions of items and the revision of users (see get_users_revision)
+    :return: the ETag
+    """
+    return hashlib.sha1(json.dumps([parts, request.query_string.decode()], default=str).encode()).hexdigest()
+
+
+def touch_users() -> None:
+    """Increase the revision of users, every route that changes what the responses show of a user (name, image) or
+    deletes a user calls it so the copies saved by the clients (ETag) are not valid anymore
+    """
+    Revision.query.filter_by(name="users").update({"revision": Revision.revision + 1}, synchronize_session=False)
+
+
+def get_users_revision() -> int:
+    """Get the revision of users, the ETag of response that shows users should include it so a renamed user, a new
+    image or a deleted user changes the ETag. It is one revision for every user, so the ETag is checked with one
+    primary key query before the items and users of response are loaded (the users rarely change compared to the
+    items, a change makes the clients get their copies again once)
+
+    :return: the revision of users
+    """
+    return db.session.query(Revision.revision).filter_by(name="users").scalar()
+
+
+def not_modified(etag: str) -> Optional[Response]:
+    """Check if the client already has the response (If-None-Match header), so the response is not built again
+
+    :param etag: the ETag of current response
+    :return: the not modified response if the client has it, otherwise None
+    """
+    # weak comparison, the compressed responses have weak ETags
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    return with_etag(Response(status=304), etag)
+
+
+def with_etag(response: Response, etag: str) -> Response:
+    """Add the ETag to response, the clients should ask again (with If-None-Match) before using their copy
+
+    :param response: the response
+    :param etag: the ETag of response
+    :return: the response
+    """
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def get_item_id(item_type: str, item: Any) -> int:
+    """Get the id of item, the added item is flushed to get its id
+
+    :param item_type: the type of item (SYNC_TYPES)
+    :param item: the item, should be added to the session
+    :return: the id of item
+    """
+    id_key: str = SYNC_TYPES[item_type]["id"].key
+    if getattr(item, id_key) is None:
+        db.session.flush()
+    return getattr(item, id_key)
+
+
+def record_change(item_type: str, item: Any, user_ids: Iterable[int], deleted: bool = False) -> None:
+    """Write the change of item to the change log of each user, the clients get the changes with the sync route
+
+    :param item_type: the type of item (SYNC_TYPES)
+    :param item: the added, changed or deleted item, should be added to the session
+    :param user_ids: the users that see the change, each user gets it once
+    :param deleted: (Optional) true if the item is deleted or not visible to the users anymore
+    """
+    item_id: int = get_item_id(item_type, item)
+    changes: List[ChangeLog] = [
+        ChangeLog(user_id=x, type=item_type, item_id=item_id, deleted=deleted) for x in dict.fromkeys(user_ids)
+    ]
+    db.session.add_all(changes)
+    # wake up the event streams of users after commit
+    queue_events([x.user_id for x in changes])
+
+
+def record_task_change(item_type: str, item: Any, task_id: int, deleted: bool = False) -> None:
+    """Write the change of task or its section to the change log of the creator and assignees of task, the users are
+    selected by the insert so the task does not need to be loaded
+
+    :param item_type: the type of item (SYNC_TYPES)
+    :param item: the added, changed or deleted task/subtask/comment/checklist/attachment, should be added to the session
+    :param task_id: the task of item
+    :param deleted: (Optional) true if the item is deleted
+    """
+    item_id: int = get_item_id(item_type, item)
+    # flush the changed assignees of task before selecting them
+    db.session.flush()
+    users = select(TaskAssignee.user_id).where(TaskAssignee.task_id == task_id).union(
+        select(Task.creator_id).where(Task.task_id == task_id)
+    ).subquery()
+    changes = db.session.execute(insert(ChangeLog).from_select(
+        ["user_id", "type", "item_id", "deleted", "date_changed"],
+        select(users.c.user_id, literal(item_type), literal(item_id), literal(deleted), literal(datetime.now()))
+    ).returning(ChangeLog.user_id))
+    # wake up the event streams of users after commit
+    queue_events([x.user_id for x in changes])
+
+
+def mark_task_changed(item_type: str, item: Any, task_id: int, deleted: bool = False) -> None:
+    """Mark the task as changed by a route that changes the task or its sections, the revision of task is increased so
+    the copies saved by the clients (ETag) are not valid anymore and the change is written to the change log of the
+    creator and assignees of task so the clients get it with sync
+
+    :param item_type: the type of item (SYNC_TYPES)
+    :param item: the changed or deleted task/subtask/comment/checklist/attachment, should be added to the session
+    :param task_id: the task of item
+    :param deleted: (Optional) true if the item is deleted
+    """
+    Task.query.filter_by(task_id=task_id).update({"revision": Task.revision + 1}, synchronize_session=False)
+    record_task_change(item_type, item, task_id, deleted)
+
+
+def read_change_events(user_id: int, change_id: int, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+    """Get the events of the changes of user after the change, from oldest (see stream_events)
+
+    :param user_id: the user of event stream
+    :param change_id: the id of last change sent to the stream
+    :param limit: maximum number of changes
+    :return: the change id and event (type, id, deleted and sync cursor) of each change
+    """
+    changes: List[ChangeLog] = ChangeLog.query.filter(
+        ChangeLog.user_id == user_id, ChangeLog.change_id > change_id
+    ).order_by(ChangeLog.change_id).limit(limit).all()
+    return [
+        (x.change_id, {"type": x.type, "id": x.item_id, "deleted": x.deleted, "cursor": encode_cursor([x.change_id])})
+        for x in changes
+    ]
+
+
+def query_changes(user_id: int, cursor: int) -> Tuple[List[ChangeLog], bool]:
+    """Get the page of changes of user after the cursor, from oldest
+
+    :param user_id: the user that syncs
+    :param cursor: the id of last change the client has, 0 to get every change
+    :return: the changes in page and if there are more changes after them
+    """
+    page_size: int = get_page_size(always=True)
+    changes: List[ChangeLog] = ChangeLog.query.filter(
+        ChangeLog.user_id == user_id, ChangeLog.change_id > cursor
+    ).order_by(ChangeLog.change_id).limit(page_size + 1).all()
+    return changes[:page_size], len(changes) > page_size
+
+
+def get_oldest_cursor() -> int:
+    """Get the oldest cursor the change log still has every change after, the clients with older cursors should get
+    every item again since their changes were removed (see prune_change_log)
+
+    :return: the oldest valid cursor, 0 if no change was removed
+    """
+    oldest_change_id: Optional[int] = db.session.query(func.min(ChangeLog.change_id)).scalar()
+    return oldest_change_id - 1 if oldest_change_id else 0
+
+
+def get_latest_cursor() -> int:
+    """Get the cursor of the latest change of every user, the client continues from it after getting every item"""
+    return db.session.query(func.max(ChangeLog.change_id)).scalar() or 0
+
+
+def prune_change_log(days: int = CHANGE_LOG_RETENTION_DAYS) -> int:
+    """Remove the changes older than the days, the latest of them is kept so the oldest change shows which cursors
+    are still valid (see get_oldest_cursor)
+
+    :param days: (Optional) days the changes are kept
+    :return: the number of removed changes
+    """
+    latest_old_change_id: Optional[int] = db.session.query(func.max(ChangeLog.change_id)).filter(
+        ChangeLog.date_changed < datetime.now() - timedelta(days=days)
+    ).scalar()
+    if not latest_old_change_id:
+        return 0
+    removed: int = ChangeLog.query.filter(ChangeLog.change_id < latest_old_change_id).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
+
+
+def map_changes(changes: List[ChangeLog], user_id: int) -> List[Dict[str, Any]]:
+    """Convert the changes to the current state of their items, an item changed multiple times is sent once and the
+    items that are deleted (or not visible to the user anymore) are sent as tombstones
+
+    :param changes: the changes of user from oldest
+    :param user_id: the user that syncs
+    :return: the list of type, id, deleted and item (None if deleted) of each changed item
+    """
+    # the last change of each item
+    last_changes: Dict[Tuple[str, int], ChangeLog] = {(x.type, x.item_id): x for x in changes}
+
+    # get the changed items of each type in one query
+    items: Dict[Tuple[str, int], Any] = {}
+    for item_type, sync_type in SYNC_TYPES.items():
+        item_ids: List[int] = [y for x, y in last_changes if x == item_type and not last_changes[(x, y)].deleted]
+        if item_ids:
+            for item in sync_type["model"].query.filter(sync_type["id"].in_(item_ids)).all():
+                items[(item_type, getattr(item, sync_type["id"].key))] = item
+    # get the tasks of sections in one query (except the changed tasks that are already loaded), the sections are
+    # visible to the creator and assignees of their task
+    g.setdefault("loaded_tasks", {}).update({y: item for (x, y), item in items.items() if x == "tasks"})
+    preload_tasks([item.task_id for (item_type, _), item in items.items() if item_type in TASK_SECTIONS])
+    preload_task_assignees([item.task_id for (item_type, _), item in items.items() if item_type in ("tasks", *TASK_SECTIONS)])
+    items = {key: item for key, item in items.items() if SYNC_TYPES[key[0]]["visible"](item, user_id)}
+    # get all the users of items in one query
+    preload_users([y for (item_type, _), item in items.items() for y in SYNC_TYPES[item_type]["user_ids"](item)])
+
+    return [
+        {
+            "type": item_type,
+            "id": item_id,
+            "deleted": (item_type, item_id) not in items,
+            "item": SYNC_TYPES[item_type]["map"](items[(item_type, item_id)], user_id) if (item_type, item_id) in items else None
+        } for (item_type, item_id), change in sorted(last_changes.items(), key=lambda x: x[1].change_id)
+    ]
+
+
+def user_exists(*criteria: Any) -> bool:
+    """Check if a user matches the criteria using the indexes of user, without loading the users
+
+    :param criteria: the filters of user (e.g. User.email == email)
+    :return: if the user exists
+    """
+    return db.session.query(User.query.filter(*criteria).exists()).scalar()
+
+
 def validate_signup(name: str, email: str, password: str, confirm_password: str) -> Dict[str, Any]:
     """Validate signup of user
 
@@ -90,9 +710,9 @@ def validate_signup(name: str, email: str, password: str, confirm_password: str)
         return {"isValid": False, "message": "Invalid Email"}
     if not re.search(PASSWORD_REGEX, password):
         return {"isValid": False, "message": "Invalid Password"}
-    if any(x.name == name for x in User.query.all()):
+    if user_exists(User.name == name):
         return {"isValid": False, "message": "Username already exist"}
-    if any(x.email == email for x in User.query.all()):
+    if user_exists(User.email == email):
         return {"isValid": False, "message": "Email already exist"}
 
     return {"isValid": True, "message": "Success"}
@@ -112,8 +732,12 @@ def validate_login(user: Optional[User], email: str, password: str) -> Dict[str,
         return {"isValid": False, "message": "Fill up fields with specified length"}
     if not user:
         return {"isValid": False, "message": "User not found"}
-    if not bcrypt.checkpw(password.encode(), user.password.encode()):
+    if not check_password(password, user.password):
         return {"isValid": False, "message": "Wrong password"}
+    # hash the password with the configured cost and its own salt when a password thread is free, the log in does not
+    # wait for it and keeps working with the old hash if the threads are busy
+    if password_needs_rehash(user.password):
+        rehash_password_later(user.id, password, user.password)
 
     return {"isValid": True, "message": "User Logged In"}
 
@@ -258,8 +882,68 @@ def validate_description(description: str, user_id: int, creator_id: int) -> Dic
     return {"isValid": True, "message": "Success"}
 
 
+def validate_task_update(data: Dict[str, Any], user_id: int, creator_id: int) -> Dict[str, Any]:
+    """Validate the fields of task to change at once, with the same rules of changing each field
+
+    :param data: the fields to change (title, description, priority, type, due and assignee), at least one
+    :param user_id: the user want to change the task
+    :param creator_id: the user created the task
+    :return: if every field is valid with message of the first invalid field
+    """
+    if not any(x in data for x in TASK_UPDATE_FIELDS):
+        return {"isValid": False, "message": "No fields to update"}
+    if "title" in data:
+        validation: Dict[str, Any] = validate_name(data["title"], user_id, creator_id)
+        if not validation["isValid"]:
+            return validation
+    if "description" in data:
+        validation = validate_description(data["description"], user_id, creator_id)
+        if not validation["isValid"]:
+            return validation
+    if "priority" in data and user_id != creator_id:
+        return {"isValid": False, "message": "Only task creator can edit priority"}
+    if "type" in data and user_id != creator_id:
+        return {"isValid": False, "message": "Only task creator can edit type"}
+    if "due" in data:
+        try:
+            due: datetime = string_to_date(data["due"])
+        except (TypeError, ValueError):
+            return {"isValid": False, "message": "Invalid due date"}
+        validation = validate_due(due, user_id, creator_id)
+        if not validation["isValid"]:
+            return validation
+    if "assignee" in data:
+        validation = validate_assignee(data["assignee"], user_id, creator_id)
+        if not validation["isValid"]:
+            return validation
+
+    return {"isValid": True, "message": "Success"}
+
+
+def validate_subtask_update(data: Dict[str, Any], user_id: int, subtask: Subtask) -> Dict[str, Any]:
+    """Validate the fields of subtask to change at once, with the same rules of changing each field
+
+    :param data: the fields to change (description, priority, type, due, assignee and status), at least one
+    :param user_id: the user want to change the subtask, only the creator can change the fields except status and
+        only the assignees can change status
+    :param subtask: the subtask to change
+    :return: if every field is valid with message of the first invalid field
+    """
+    if not any(x in data for x in SUBTASK_UPDATE_FIELDS):
+        return {"isValid": False, "message": "No fields to update"}
+    creator_fields: Dict[str, Any] = {x: y for x, y in data.items() if x in SUBTASK_UPDATE_FIELDS and x != "status"}
+    if creator_fields:
+        validation: Dict[str, Any] = validate_task_update(creator_fields, user_id, subtask.creator_id)
+        if not validation["isValid"]:
+            return validation
+    if "status" in data and user_id not in get_assignee_ids(subtask):
+        return {"isValid": False, "message": "Only assignees can edit status"}
+
+    return {"isValid": True, "message": "Success"}
+
+
 def validate_subtask(description: str, due: datetime, assignees: List[int], user_id: int, task_creator_id: int,
-                     task_assignees: str) -> Dict[str, Any]:
+                     task_assignees: List[int]) -> Dict[str, Any]:
     """Validate subtask of task
 
     :param description: should be 50-1000 characters
@@ -267,7 +951,7 @@ def validate_subtask(description: str, due: datetime, assignees: List[int], user
     :param assignees: should range from 1 to 5
     :param user_id: the user that create the subtask of task
     :param task_creator_id: the creator of task
-    :param task_assignees: the assignees of task
+    :param task_assignees: the assignees of task (see get_assignee_ids)
     :return: if the subtask is valid with message
     """
     if not description or not 50 <= len(description) <= 1000:
@@ -276,43 +960,46 @@ def validate_subtask(description: str, due: datetime, assignees: List[int], user
         return {"isValid": False, "message": "Due should not be earlier than now"}
     if not 1 <= len(assignees) <= 5:
         return {"isValid": False, "message": "Assignees should range from 1 to 5"}
-    if user_id != task_creator_id and user_id not in string_to_int_list(task_assignees):
+    if user_id != task_creator_id and user_id not in task_assignees:
         return {"isValid": False, "message": "Only assignees and task creator can add subtask"}
 
     return {"isValid": True, "message": "Success"}
 
 
 def validate_checklist(description: str, assignees: List[int], user_id: int, task_creator_id: int,
-                       task_assignees: str) -> Dict[str, Any]:
+                       task_assignees: List[int]) -> Dict[str, Any]:
     """Validate checklist of task
 
     :param description: should be 50-1000 characters
     :param assignees: should range from 1 to 5
     :param user_id: the user created the checklist of task
     :param task_creator_id: the user created the task
-    :param task_assignees: the assignees of task
+    :param task_assignees: the assignees of task (see get_assignee_ids)
     :return:
     """
     if not description or not 50 <= len(description) <= 1000:
         return {"isValid": False, "message": "Description should be 50-1000 characters"}
     if not 1 <= len(assignees) <= 5:
         return {"isValid": False, "message": "Assignees should range from 1 to 5"}
-    if user_id != task_creator_id and user_id not in string_to_int_list(task_assignees):
+    if user_id != task_creator_id and user_id not in task_assignees:
         return {"isValid": False, "message": "Only assignees and task creator can add checklist"}
 
     return {"isValid": True, "message": "Success"}
 
 
-def validate_user_name(name: str) -> Dict[str, Any]:
+def validate_user_name(name: str, user_id: int = 0) -> Dict[str, Any]:
     """Validate the name of user
 
     :param name: the name to validate
+    :param user_id: the id of user that changes the name, their current name is not taken by other user
     :return: if the name is valid with message
     """
     if not name or not 5 <= len(name) <= 20:
         return {"isValid": False, "message": "Username should be 5-20 characters"}
     if not re.search(NAME_REGEX, name):
         return {"isValid": False, "message": "Invalid Username"}
+    if user_exists(User.name == name, User.id != user_id):
+        return {"isValid": False, "message": "Username already exist"}
 
     return {"isValid": True, "message": "Success"}
 
@@ -341,7 +1028,7 @@ def validate_password(current_password: str, new_password: str, confirm_password
     """
     if not current_password or not new_password or not confirm_password:
         return {"isValid": False, "message": "Fill up empty fields."}
-    if not bcrypt.checkpw(current_password.encode(), current_password_2.encode()):
+    if not check_password(current_password, current_password_2):
         return {"isValid": False, "message": "Current password do not match."}
     if not re.search(PASSWORD_REGEX, new_password):
         return {"isValid": False, "message": "Invalid New Password."}
@@ -375,6 +1062,7 @@ def map_tasks(task: Task) -> Dict[str, Any]:
     :return: dictionary with the task information
     """
     assignee_ids: List[int] = string_to_int_list(task.assignee)
+    preload_users(task_user_ids(task))
     return {
         "taskId": task.task_id,
         "title": task.title,
@@ -383,6 +1071,7 @@ def map_tasks(task: Task) -> Dict[str, Any]:
         "priority": task.priority,
         "status": task.status,
         "type": task.type,
+        "revision": task.revision,
         "assignees": [map_user(x) for x in assignee_ids],
         "creator": map_user(task.creator_id)
     }
@@ -422,6 +1111,7 @@ def map_comments(comment: TaskComment) -> Dict[str, Any]:
     :param comment: The comment to convert
     :return: dictionary with the comment information
     """
+    preload_users(comment_user_ids(comment))
     return {
         "commentId": comment.comment_id,
         "taskId": comment.task_id,
@@ -440,7 +1130,7 @@ def get_name(user_id: int) -> str:
     :param user_id: id of user
     :return: name of user
     """
-    user: Optional[User] = User.query.filter_by(id=user_id).first()
+    user: Optional[User] = get_loaded_user(user_id)
     return user.name if user else "UnknownUser"
 
 
@@ -451,6 +1141,7 @@ def map_subtasks(subtask: Subtask) -> Dict[str, Any]:
     :return: dictionary with the subtask information
     """
     assignee_ids: List[int] = string_to_int_list(subtask.assignee)
+    preload_users(subtask_user_ids(subtask))
     return {
         "subtaskId": subtask.subtask_id,
         "taskId": subtask.task_id,
@@ -471,6 +1162,7 @@ def map_checklists(checklist: Checklist) -> Dict[str, Any]:
     :return: dictionary with the checklist information
     """
     assignee_ids: List[int] = string_to_int_list(checklist.assignee)
+    preload_users(checklist_user_ids(checklist))
     return {
         "checklistId": checklist.checklist_id,
         "taskId": checklist.task_id,
@@ -516,18 +1208,103 @@ def map_replies(reply: MessageReply) -> Dict[str, Any]:
 
 
 def get_response_image(image_path: str) -> str:
-    """Get base64 encoded image from image path
+    """Get base64 encoded image from image path, the encoded image is cached until the image file is modified
 
     :param image_path: The path of image to convert
     :return: base64 encoded image
     """
+    mtime: float = os.path.getmtime(image_path)
+
+    with avatar_cache_lock:
+        cached: Optional[Tuple[float, str]] = avatar_cache.get(image_path)
+        if cached and cached[0] == mtime:
+            avatar_cache_stats["hits"] += 1
+            return cached[1]
+        avatar_cache_stats["misses"] += 1
+
     pil_img: Image = Image.open(image_path, mode='r')
     byte_arr: io.BytesIO = io.BytesIO()
     pil_img.save(byte_arr, format='PNG')
     encoded_img: str = encodebytes(byte_arr.getvalue()).decode('ascii')
+
+    with avatar_cache_lock:
+        avatar_cache[image_path] = (mtime, encoded_img)
     return encoded_img
 
 
+@lru_cache(maxsize=None)
+def get_avatar_font() -> FreeTypeFont:
+    """Get the font of letter avatars, loaded from disk once per worker"""
+    return ImageFont.truetype("fonts/RobotoSlab-Black.ttf", 150)
+
+
+@lru_cache(maxsize=256)
+def get_letter_mask(letter: str) -> Image:
+    """Get the rendered letter at the center of a 200x200 mask, the glyphs are rendered once and reused
+
+    :param letter: the letter to render
+    :return: grayscale mask of the letter, used to composite the letter on the avatar
+    """
+    mask: Image = Image.new("L", (200, 200), 0)
+    ImageDraw.Draw(mask).text((100, 100), letter, fill=255, font=get_avatar_font(), anchor="mm")
+    return mask
+
+
+def create_letter_avatar(name: str) -> bytes:
+    """Create 200x200 png image with random background color and the first letter of name in uppercase at center
+
+    :param name: the name of user
+    :return: the png image
+    """
+    img: Image = Image.new("RGBA", (200, 200), (int(random.random() * 100) + 100, int(random.random() * 100) + 100, int(random.random() * 100) + 100))
+    img.paste((0, 0, 0, 255), (0, 0), get_letter_mask(name[0].upper()))
+    byte_arr: io.BytesIO = io.BytesIO()
+    img.save(byte_arr, format='PNG')
+    return byte_arr.getvalue()
+
+
+def save_response_image(image_path: str, image: bytes) -> str:
+    """Save the png image and cache its base64 encoded image, so it is not read from disk again
+
+    :param image_path: the path to save the image
+    :param image: the png image
+    :return: base64 encoded image
+    """
+    with open(image_path, "wb") as file:
+        file.write(image)
+    encoded_img: str = encodebytes(image).decode('ascii')
+
+    with avatar_cache_lock:
+        avatar_cache[image_path] = (os.path.getmtime(image_path), encoded_img)
+    return encoded_img
+
+
+def invalidate_response_image(image_path: str) -> None:
+    """Remove the encoded image from cache (e.g. the image is replaced or deleted)
+
+    :param image_path: The path of image to remove
+    """
+    with avatar_cache_lock:
+        avatar_cache.pop(image_path, None)
+
+
+def get_avatar_cache_info() -> Dict[str, Any]:
+    """Get the size and hit ratio of encoded avatars cache
+
+    :return: dictionary with the cache information
+    """
+    with avatar_cache_lock:
+        hits: int = avatar_cache_stats["hits"]
+        misses: int = avatar_cache_stats["misses"]
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hitRatio": hits / (hits + misses) if hits + misses else 0.0,
+            "size": len(avatar_cache),
+            "maxSize": avatar_cache.maxsize
+        }
+
+
 def allowed_file(filename: str, allowed_extensions: Set[str]) -> bool:
     """Check if the file is included in allowed file extensions
 
@@ -548,41 +1325,344 @@ def filename_secure(file: FileStorage, idx: str = "") -> str:
     return secure_filename(datetime.now().strftime("%d_%m_%Y_%H_%M_%S") + idx + '.' + file.filename.rsplit('.', 1)[1])
 
 
-def send_notification_to_assignees(title: str, body: str, assignees_id: List[int]):
-    """Wrapper function for sending push notifications to users
+def send_notification_to_assignees(title: str, body: str, assignees_id: List[int], sender_id: Optional[int] = None):
+    """Wrapper function for sending push notifications to users, the notifications are saved in the outbox
+    (committed together with the changes of route) and sent in background by the notification dispatcher
 
     :param title: Title of the notification
     :param body: Body of the notification
-    :param assignees_id: The users that will receive the push notification
+    :param assignees_id: The users that will receive the push notification, each user receives it once
+    :param sender_id: (Optional) The user who made the change, he/she will not receive the push notification
+    """
+    db.session.add_all([
+        NotificationOutbox(user_id=x, title=title, body=body) for x in dict.fromkeys(assignees_id) if x != sender_id
+    ])
+
+
+def send_task_change_notification(task: Task, changes: List[str], sender: Dict[str, Any]) -> None:
+    """Send push notifications to the assignees of task that the task is changed, the changes made within the
+    coalesce window are merged into one notification per assignee (e.g. X updated name, priority and due date of task)
+
+    :param task: the changed task
+    :param changes: what are changed in the task (e.g. name, due date)
+    :param sender: the user changed the task
+    """
+    now: datetime = datetime.now()
+    recipients: List[int] = [x for x in dict.fromkeys(string_to_int_list(task.assignee)) if x != sender["id"]]
+    # the notifications of task that are waiting for the coalesce window to end
+    pending: Dict[int, Any] = {
+        x.user_id: x for x in db.session.query(
+            NotificationOutbox.notification_id, NotificationOutbox.user_id, NotificationOutbox.changes
+        ).filter(
+            NotificationOutbox.task_id == task.task_id,
+            NotificationOutbox.user_id.in_(recipients),
+            NotificationOutbox.claim_token == "",
+            NotificationOutbox.attempts == 0,
+            NotificationOutbox.next_attempt > now
+        ).all()
+    }
+
+    for user_id in recipients:
+        if user_id in pending:
+            merged_changes: List[str] = string_to_list(pending[user_id].changes)
+            merged_changes += [x for x in changes if x not in merged_changes]
+            # merge only if the dispatcher has not claimed the notification since it was read
+            merged: int = NotificationOutbox.query.filter(
+                NotificationOutbox.notification_id == pending[user_id].notification_id,
+                NotificationOutbox.claim_token == ""
+            ).update({
+                "changes": list_to_string(merged_changes),
+                **task_change_message(task, merged_changes, sender)
+            }, synchronize_session=False)
+            if merged:
+                continue
+        # a new notification if there is nothing to merge into (or it was claimed to be sent)
+        db.session.add(NotificationOutbox(
+            user_id=user_id,
+            task_id=task.task_id,
+            changes=list_to_string(changes),
+            next_attempt=now + timedelta(seconds=NOTIFICATION_COALESCE_WINDOW),
+            **task_change_message(task, changes, sender)
+        ))
+
+
+def task_change_message(task: Task, changes: List[str], sender: Dict[str, Any]) -> Dict[str, str]:
+    """Get the title and body of push notification of the changes of task
+
+    :param task: the changed task
+    :param changes: what are changed in the task (e.g. name, due date)
+    :param sender: the user changed the task
+    :return: the title and body of notification
+    """
+    if len(changes) == 1:
+        return {
+            "title": "Task " + changes[0].title() + " Updated",
+            "body": sender["name"] + " changed " + changes[0] + " of task \"" + task.title + "\"."
+        }
+    return {
+        "title": "Task Updated",
+        "body": sender["name"] + " updated " + changes_to_string(changes) + " of task \"" + task.title + "\"."
+    }
+
+
+def changes_to_string(changes: List[str]) -> str:
+    """Join the changes for notifications (e.g. name, priority and due date)"""
+    return ", ".join(changes[:-1]) + " and " + changes[-1] if len(changes) > 1 else changes[0]
+
+
+def map_user(user_id: int) -> Union[Dict[str, Any], int]:
+    """Get user and convert it to dictionary that can be sent as a response to the client, only the id of user if the
+    client asks for the users sidecar (users=sidecar query parameter)
+
+    :param user_id: the user to get
+    :return: dictionary with the user information or the id of user
     """
-    for assignee in assignees_id:
-        user: Optional[User] = User.query.filter_by(id=assignee).first()
-        if user:
-            notification: messaging.Message = messaging.Message(
-                data={"title": title, "body": body},
-                android=messaging.AndroidConfig(priority="high"),
-                token=user.push_notifications_token
-            )
-            messaging.send(notification)
+    if is_users_sidecar():
+        # the user is sent once in the users of response (see jsonify_with_users)
+        g.setdefault("sidecar_user_ids", {})[user_id] = None
+        return user_id
+    return map_user_info(user_id)
 
 
-def map_user(user_id: int) -> Dict[str, Any]:
-    """Get user and convert it to dictionary that can be sent as a response to the client
+def map_user_info(user_id: int) -> Dict[str, Any]:
+    """Get user and convert it to dictionary with the id, name and image of user
 
     :param user_id: the user to get
     :return: dictionary with the user information
     """
-    user: Optional[User] = User.query.filter_by(id=user_id).first()
+    user: Optional[User] = get_loaded_user(user_id)
 
     if user:
         return {
             "id": user.id,
             "name": user.name,
-            "image": get_response_image(user.image_path)
+            **map_user_image(user.id, user.image_path)
         }
     else:
         return {
             "id": user_id,
             "name": "UnknownUser",
-            "image": get_response_image("images/deleted_user.png")
+            **map_user_image(user_id, DELETED_USER_IMAGE)
         }
+
+
+def map_user_image(user_id: int, image_path: str) -> Dict[str, str]:
+    """Get the image of user that can be sent as a response to the client, the client can ask for the image url
+    instead of base64 encoded image with image_mode=url query parameter
+
+    :param user_id: the user of image
+    :param image_path: the path of image
+    :return: dictionary with base64 encoded image or the versioned url of image
+    """
+    if has_request_context() and request.args.get("image_mode") == "url":
+        return {"imageUrl": url_for("user_routes.get_user_image", user_id=user_id, v=get_image_version(image_path))}
+    return {"image": get_response_image(image_path)}
+
+
+def is_users_sidecar() -> bool:
+    """Check if the client asks for the users sidecar (users=sidecar query parameter), the items of response have the
+    ids of users and each user is sent once in the users of response
+    """
+    return has_request_context() and request.args.get("users") == "sidecar"
+
+
+def jsonify_with_users(body: Union[Dict[str, Any], List[Any]]) -> Response:
+    """Create the response of item or list, the users of items are added to the response if the client asks for the
+    users sidecar, the list is sent as {"items": [...], "users": {...}} then
+
+    :param body: the mapped item or items
+    :return: response with the items
+    """
+    if not is_users_sidecar():
+        return jsonify(body)
+
+    user_ids: List[int] = list(g.get("sidecar_user_ids", {}))
+    # get all the users of response in one query
+    preload_users(user_ids)
+    users: Dict[str, Dict[str, Any]] = {str(x): map_user_info(x) for x in user_ids}
+    return jsonify({"items": body, "users": users} if isinstance(body, list) else {**body, "users": users})
+
+
+def get_image_version(image_path: str) -> str:
+    """Get the version of image, the version changes when the image is replaced or modified
+
+    :param image_path: the path of image
+    :return: version of image used in image url and etag
+    """
+    return hashlib.sha1(f"{image_path}:{os.path.getmtime(image_path)}".encode()).hexdigest()[:16]
+
+
+def preload_users(user_ids: Iterable[int]) -> None:
+    """Fetch the users a response needs with one query and keep them for the rest of the request,
+    map_user and get_name will use them instead of querying each user
+
+    :param user_ids: ids of the users that will be mapped in the response
+    """
+    loaded_users: Dict[int, Optional[User]] = g.setdefault("loaded_users", {})
+    missing_ids: Set[int] = {x for x in user_ids if x not in loaded_users}
+
+    if missing_ids:
+        for user in User.query.filter(User.id.in_(missing_ids)).all():
+            loaded_users[user.id] = user
+        # remember the users that do not exist (deleted users) so they will not be queried again
+        for user_id in missing_ids:
+            loaded_users.setdefault(user_id, None)
+
+
+def get_loaded_user(user_id: int) -> Optional[User]:
+    """Get user from the users loaded in the request, the user is queried if not loaded yet
+
+    :param user_id: id of user
+    :return: the user or None if the user not exist
+    """
+    preload_users([user_id])
+    return g.loaded_users[user_id]
+
+
+def preload_tasks(task_ids: Iterable[int]) -> None:
+    """Fetch the tasks a response needs with one query and keep them for the rest of the request,
+    get_loaded_task will use them instead of querying each task
+
+    :param task_ids: ids of the tasks
+    """
+    loaded_tasks: Dict[int, Optional[Task]] = g.setdefault("loaded_tasks", {})
+    missing_ids: Set[int] = {x for x in task_ids if x not in loaded_tasks}
+
+    if missing_ids:
+        for task in Task.query.filter(Task.task_id.in_(missing_ids)).all():
+            loaded_tasks[task.task_id] = task
+        # remember the tasks that do not exist (deleted tasks) so they will not be queried again
+        for task_id in missing_ids:
+            loaded_tasks.setdefault(task_id, None)
+
+
+def get_loaded_task(task_id: int) -> Optional[Task]:
+    """Get task from the tasks loaded in the request, the task is queried if not loaded yet
+
+    :param task_id: id of task
+    :return: the task or None if the task not exist
+    """
+    preload_tasks([task_id])
+    return g.loaded_tasks[task_id]
+
+
+def preload_task_assignees(task_ids: Iterable[int]) -> None:
+    """Fetch the assignees of tasks from the assignee table with one query and keep them for the rest of the request,
+    is_task_member will use them instead of querying each task
+
+    :param task_ids: ids of the tasks
+    """
+    loaded_assignees: Dict[int, Set[int]] = g.setdefault("loaded_task_assignees", {})
+    missing_ids: Set[int] = {x for x in task_ids if x not in loaded_assignees}
+
+    if missing_ids:
+        for task_id in missing_ids:
+            loaded_assignees[task_id] = set()
+        for assignee in TaskAssignee.query.filter(TaskAssignee.task_id.in_(missing_ids)).all():
+            loaded_assignees[assignee.task_id].add(assignee.user_id)
+
+
+def is_task_member(task_id: int, user_id: int) -> bool:
+    """Check if the user is the creator or an assignee (from the assignee table) of task
+
+    :param task_id: id of task
+    :param user_id: id of user
+    :return: false if the user is not a member or the task not exist
+    """
+    task: Optional[Task] = get_loaded_task(task_id)
+    if task is None:
+        return False
+    preload_task_assignees([task_id])
+    return user_id == task.creator_id or user_id in g.loaded_task_assignees[task_id]
+
+
+def task_user_ids(task: Task) -> List[int]:
+    """Get the ids of users referenced by task (assignees and creator)"""
+    return [*string_to_int_list(task.assignee), task.creator_id]
+
+
+def comment_user_ids(comment: TaskComment) -> List[int]:
+    """Get the ids of users referenced by comment (sender and mentions)"""
+    return [comment.user_id, *string_to_int_list(comment.mentions_id)]
+
+
+def subtask_user_ids(subtask: Subtask) -> List[int]:
+    """Get the ids of users referenced by subtask (assignees and creator)"""
+    return [*string_to_int_list(subtask.assignee), subtask.creator_id]
+
+
+def checklist_user_ids(checklist: Checklist) -> List[int]:
+    """Get the ids of users referenced by checklist (creator and assignees)"""
+    return [checklist.user_id, *string_to_int_list(checklist.assignee)]
+
+
+# sections of task that can be selected in get_task (include query parameter) and paginated in its own route
+TASK_SECTIONS: Dict[str, Dict[str, Any]] = {
+    "comments": {
+        "model": TaskComment,
+        "sort": [TaskComment.date_sent, TaskComment.comment_id],
+        "map": map_comments,
+        "user_ids": comment_user_ids
+    },
+    "subtasks": {
+        "model": Subtask,
+        "sort": [Subtask.subtask_id],
+        "map": map_subtasks,
+        "user_ids": subtask_user_ids
+    },
+    "checklists": {
+        "model": Checklist,
+        "sort": [Checklist.checklist_id],
+        "map": map_checklists,
+        "user_ids": checklist_user_ids
+    },
+    "attachments": {
+        "model": Attachment,
+        "sort": [Attachment.attachment_id],
+        "map": map_attachments,
+        "user_ids": lambda x: [x.user_id]
+    }
+}
+
+# the types of items the clients sync (sync route), the sections of deleted task (or of task the user is not a member
+# of anymore) are sent as tombstones, the clients should remove them with the task
+SYNC_TYPES: Dict[str, Dict[str, Any]] = {
+    "tasks": {
+        "model": Task,
+        "id": Task.task_id,
+        "map": lambda x, _: map_tasks(x),
+        "user_ids": task_user_ids,
+        "visible": lambda x, user_id: is_task_member(x.task_id, user_id)
+    },
+    **{
+        section: {
+            "model": TASK_SECTIONS[section]["model"],
+            "id": TASK_SECTIONS[section]["sort"][-1],
+            "map": lambda x, _, section=section: TASK_SECTIONS[section]["map"](x),
+            "user_ids": TASK_SECTIONS[section]["user_ids"],
+            "visible": lambda x, user_id: is_task_member(x.task_id, user_id)
+        } for section in TASK_SECTIONS
+    },
+    "messages": {
+        "model": Message,
+        "id": Message.message_id,
+        "map": lambda x, user_id: map_sent_messages(x) if x.sender_id == user_id else map_received_messages(x),
+        "user_ids": lambda x: [x.sender_id, x.receiver_id],
+        "visible": lambda x, user_id: not (x.deleted_from_sender if x.sender_id == user_id else x.deleted_from_receiver)
+    },
+    "replies": {
+        "model": MessageReply,
+        "id": MessageReply.message_reply_id,
+        "map": lambda x, _: map_replies(x),
+        "user_ids": lambda x: [x.from_id],
+        "visible": lambda x, user_id: True
+    }
+}
+
+# the types of full-text search results and their search tables
+SEARCH_TYPES: Dict[str, Dict[str, Any]] = {
+    "tasks": {"table": "task_search", "model": Task, "id": Task.task_id},
+    "subtasks": {"table": "subtask_search", "model": Subtask, "id": Subtask.subtask_id},
+    "comments": {"table": "comment_search", "model": TaskComment, "id": TaskComment.comment_id},
+    "messages": {"table": "message_search", "model": Message, "id": Message.message_id}
+}